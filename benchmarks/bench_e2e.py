@@ -0,0 +1,639 @@
+"""
+Worker 처리량 / 지연시간 벤치마크 (외부 서비스 없이 로컬 대체 서버 사용)
+
+YouTube Data API / 자막 페이지, Gemini, Anthropic, Notion, Telegram, Supabase(PostgREST RPC)를
+로컬 HTTP 서버로 대체하고, 서비스별 지연 분포(lognormal) / 오류율 / 429 비율을 재현
+동시 처리 수준마다 새 프로세스에서 process_pending_jobs(batch) 또는 process_single_job(single)을 실행하여
+jobs/s, 단계별 p50 / p95 (result.timings), 최대 RSS 측정
+
+실행:
+python -m benchmarks.bench_e2e                                   # 작업 40개, 동시 처리 1 / 2 / 5 / 10
+python -m benchmarks.bench_e2e --jobs 100 --concurrency 5 10 20
+python -m benchmarks.bench_e2e --mode single --jobs 10           # 작업 하나씩 (배치 / 큐 없이)
+python -m benchmarks.bench_e2e --set gemini.error_rate=0.2 --set notion.rate_limit_rate=0.1
+python -m benchmarks.bench_e2e --save after.json --baseline before.json  # 이전 결과와 비교
+
+--time-scale(기본 0.1): 모든 지연 / Retry-After / hedging 대기 / 제한 시간에 곱하는 배수
+--real-limits: 서비스별 요청 한도(RATE_LIMIT_*)를 실제 기본값으로 유지 (기본은 대체 서버의 429만 적용)
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+import subprocess
+import statistics
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 서비스별 기본 응답 특성 (초, time-scale 적용 전)
+# median / sigma: lognormal 지연, error_rate: 5xx 비율, rate_limit_rate: 429 비율, retry_after: 429 응답의 Retry-After
+DEFAULT_PROFILES = {
+    'supabase': {'median': 0.04, 'sigma': 0.3, 'error_rate': 0.0, 'rate_limit_rate': 0.0, 'retry_after': 1.0},
+    'youtube': {'median': 0.15, 'sigma': 0.3, 'error_rate': 0.0, 'rate_limit_rate': 0.0, 'retry_after': 1.0},
+    'transcript': {'median': 0.6, 'sigma': 0.4, 'error_rate': 0.0, 'rate_limit_rate': 0.0, 'retry_after': 1.0},
+    'gemini': {'median': 6.0, 'sigma': 0.5, 'error_rate': 0.03, 'rate_limit_rate': 0.03, 'retry_after': 5.0},
+    'anthropic': {'median': 5.0, 'sigma': 0.4, 'error_rate': 0.01, 'rate_limit_rate': 0.01, 'retry_after': 5.0},
+    'notion': {'median': 0.4, 'sigma': 0.4, 'error_rate': 0.01, 'rate_limit_rate': 0.03, 'retry_after': 1.0},
+    'telegram': {'median': 0.1, 'sigma': 0.3, 'error_rate': 0.0, 'rate_limit_rate': 0.01, 'retry_after': 1.0},
+}
+
+# time-scale을 함께 적용하는 Worker 설정 (기본값, 초)
+SCALED_SETTINGS = {
+    'LLM_HEDGE_DEFAULT_DELAY': 25,
+    'LLM_HEDGE_MIN_DELAY': 5,
+    'GEMINI_TIMEOUT': 90,
+    'CLAUDE_TIMEOUT': 90,
+    'RATE_LIMIT_BACKOFF_BASE': 1,
+    'INVOCATION_TIMEOUT_SECONDS': 540,
+    'SCHEDULER_SAFETY_SECONDS': 30,
+    'SCHEDULER_DEFAULT_JOB_SECONDS': 90,
+}
+
+STAGES = ['claim', 'metadata', 'transcript', 'preprocess', 'summary', 'notion', 'notify', 'total']
+
+# supabase-py가 형식만 확인하는 JWT 모양의 키
+FAKE_SUPABASE_KEY = 'eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.YmVuY2g'
+
+SENTENCES = [
+    "오늘은 에이전트가 도구를 어떻게 사용하는지 이야기해 보겠습니다",
+    "먼저 각 도구에 대한 명확한 설명이 필요합니다",
+    "모델은 어떤 도구를 어떤 인자로 호출할지 스스로 결정합니다",
+    "so today we're going to talk about how agents use tools",
+    "in practice most failures come from ambiguous instructions",
+]
+
+
+def summary_markdown(rng: random.Random, sections: int = 6) -> str:
+    """LLM 요약과 비슷한 마크다운 (제목 / 목록 / 문단)"""
+    lines = ['# 영상 요약', '', '## 핵심 요약', rng.choice(SENTENCES) + '.']
+    for i in range(sections):
+        lines += ['', f"## 섹션 {i + 1}"]
+        lines += [f"- **{rng.choice(SENTENCES)[:12]}**: {rng.choice(SENTENCES)}" for _ in range(rng.randint(3, 6))]
+        lines.append(' '.join(rng.choice(SENTENCES) for _ in range(3)) + '.')
+    return '\n'.join(lines)
+
+
+class FakeState:
+    """대체 Supabase의 작업 큐 / outbox와 측정 기록"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset(0, 0)
+
+    def reset(self, jobs: int, transcript_chars: int):
+        with self.lock:
+            self.transcript_chars = transcript_chars
+            self.jobs = []
+            self.claimed_at = {}
+            self.finished = []
+            self.outbox = {}
+            self.outbox_seq = 0
+            self.requests = {}
+            run = uuid.uuid4().hex[:4]
+            for i in range(jobs):
+                self.jobs.append({
+                    'id': str(uuid.uuid4()),
+                    # 실행마다 다른 영상 id (요약 캐시 적중 방지)
+                    'youtube_url': f"https://youtu.be/b{run}{i:06d}",
+                    'telegram_chat_id': 1000 + i % 20,
+                    'channel': 'archive' if i % 3 else 'agent-reference',
+                    'created_at': f"2024-01-01T00:00:{i:06d}",
+                    'attempts': 0,
+                    'status': 'pending'
+                })
+
+    def count(self, service: str):
+        with self.lock:
+            self.requests[service] = self.requests.get(service, 0) + 1
+
+    def rpc(self, name: str, params: dict):
+        now = time.monotonic()
+        with self.lock:
+            if name == 'claim_jobs':
+                claimed = [job for job in self.jobs if job['status'] == 'pending'][:params.get('p_limit', 5)]
+                for job in claimed:
+                    job['status'] = 'processing'
+                    job['attempts'] += 1
+                    self.claimed_at[job['id']] = now
+                return [{key: job[key] for key in
+                         ('id', 'youtube_url', 'telegram_chat_id', 'channel', 'created_at', 'attempts')}
+                        for job in claimed]
+
+            if name == 'finish_jobs':
+                jobs = {job['id']: job for job in self.jobs}
+                finished = []
+                for item in params.get('p_items', []):
+                    job = jobs.get(item['job_id'])
+                    if not job or job['status'] != 'processing':
+                        continue
+                    job['status'] = item['status']
+                    self.finished.append({
+                        'job_id': job['id'],
+                        'status': item['status'],
+                        'result': item.get('result') or {},
+                        'total': now - self.claimed_at.get(job['id'], now)
+                    })
+                    if item.get('notification'):
+                        self.outbox_seq += 1
+                        self.outbox[self.outbox_seq] = {
+                            'id': self.outbox_seq, 'chat_id': job['telegram_chat_id'],
+                            'payload': item['notification'], 'attempts': 0,
+                            'status': 'pending', 'created': now, 'sent': None, 'locked': False
+                        }
+                    finished.append({'job_id': job['id']})
+                return finished
+
+            if name == 'claim_notifications':
+                rows = [row for row in self.outbox.values() if row['status'] == 'pending' and not row['locked']]
+                rows = rows[:params.get('p_limit', 50)]
+                for row in rows:
+                    row['locked'] = True
+                    row['attempts'] += 1
+                return [{key: row[key] for key in ('id', 'chat_id', 'payload', 'attempts')} for row in rows]
+
+            if name == 'release_jobs':
+                released = 0
+                for job in self.jobs:
+                    if job['id'] in params.get('p_job_ids', []) and job['status'] == 'processing':
+                        job['status'] = 'pending'
+                        job['attempts'] -= 1
+                        released += 1
+                return released
+
+            if name == 'extend_job_leases':
+                return len(params.get('p_job_ids', []))
+            return 0
+
+    def update_outbox(self, query: dict, fields: dict):
+        ids = query.get('id', [''])[0]
+        if ids.startswith('in.('):
+            ids = [int(i) for i in ids[4:-1].split(',') if i]
+        elif ids.startswith('eq.'):
+            ids = [int(ids[3:])]
+        now = time.monotonic()
+        with self.lock:
+            for row_id in ids:
+                row = self.outbox.get(row_id)
+                if not row:
+                    continue
+                row['locked'] = False
+                if fields.get('status'):
+                    row['status'] = fields['status']
+                if row['status'] == 'sent':
+                    row['sent'] = now
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                'finished': list(self.finished),
+                'notify': [row['sent'] - row['created'] for row in self.outbox.values() if row['sent']],
+                'pending': sum(1 for job in self.jobs if job['status'] in ('pending', 'processing')),
+                'requests': dict(self.requests)
+            }
+
+
+def make_handler(service: str, profiles: dict, time_scale: float, state: FakeState, seed: int):
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+
+    def draw(profile_name: str):
+        profile = profiles[profile_name]
+        with rng_lock:
+            latency = rng.lognormvariate(0, profile['sigma']) * profile['median'] * time_scale
+            roll = rng.random()
+            text_rng = random.Random(rng.random())
+        if roll < profile['rate_limit_rate']:
+            outcome = 'rate_limited'
+        elif roll < profile['rate_limit_rate'] + profile['error_rate']:
+            outcome = 'error'
+        else:
+            outcome = 'ok'
+        return latency, outcome, profile['retry_after'] * time_scale, text_rng
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive (클라이언트 연결 풀 재사용)
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            self._handle('GET')
+
+        def do_POST(self):
+            self._handle('POST')
+
+        def do_PATCH(self):
+            self._handle('PATCH')
+
+        def _handle(self, method: str):
+            length = int(self.headers.get('Content-Length') or 0)
+            raw = self.rfile.read(length) if length else b''
+            try:
+                body = json.loads(raw) if raw else {}
+            except ValueError:
+                body = {}
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+
+            if url.path.startswith('/_bench/'):
+                return self._admin(url.path, body)
+
+            profile_name = 'transcript' if url.path in ('/watch', '/timedtext') else service
+            state.count(profile_name)
+            latency, outcome, retry_after, text_rng = draw(profile_name)
+            time.sleep(latency)
+
+            if outcome == 'rate_limited':
+                return self._rate_limited(retry_after)
+            if outcome == 'error':
+                return self._error()
+            return getattr(self, f"_{service}")(method, url.path, query, body, text_rng)
+
+        # 응답 도우미
+        def _send(self, status: int, payload, content_type: str = 'application/json', headers: dict = None):
+            data = payload if isinstance(payload, bytes) else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _rate_limited(self, retry_after: float):
+            headers = {'Retry-After': f"{retry_after:.3f}"}
+            if service == 'telegram':
+                return self._send(429, {'ok': False, 'error_code': 429, 'description': 'Too Many Requests',
+                                        'parameters': {'retry_after': retry_after}})
+            if service == 'youtube':
+                return self._send(403, {'error': {'code': 403, 'message': 'rate',
+                                                  'errors': [{'reason': 'rateLimitExceeded'}]}}, headers=headers)
+            if service == 'gemini':
+                return self._send(429, {'error': {'code': 429, 'message': 'quota', 'status': 'RESOURCE_EXHAUSTED'}},
+                                  headers=headers)
+            if service == 'notion':
+                return self._send(429, {'object': 'error', 'status': 429, 'code': 'rate_limited', 'message': 'slow down'},
+                                  headers=headers)
+            return self._send(429, {'type': 'error', 'error': {'type': 'rate_limit_error', 'message': 'slow down'}},
+                              headers=headers)
+
+        def _error(self):
+            if service == 'telegram':
+                return self._send(500, {'ok': False, 'error_code': 500, 'description': 'Internal Server Error'})
+            if service == 'gemini':
+                return self._send(500, {'error': {'code': 500, 'message': 'internal', 'status': 'INTERNAL'}})
+            if service == 'notion':
+                return self._send(500, {'object': 'error', 'status': 500, 'code': 'internal_server_error',
+                                        'message': 'internal'})
+            return self._send(500, {'type': 'error', 'error': {'type': 'api_error', 'message': 'internal'}})
+
+        def _admin(self, path: str, body: dict):
+            if path == '/_bench/reset':
+                state.reset(body['jobs'], body['transcript_chars'])
+                return self._send(200, {'ok': True})
+            return self._send(200, state.snapshot())
+
+        # 서비스별 응답
+        def _supabase(self, method, path, query, body, text_rng):
+            if path.startswith('/rest/v1/rpc/'):
+                return self._send(200, state.rpc(path.rsplit('/', 1)[1], body))
+            if path == '/rest/v1/notification_outbox' and method == 'PATCH':
+                state.update_outbox(query, body)
+            return self._send(200, [])
+
+        def _youtube(self, method, path, query, body, text_rng):
+            if path.endswith('/videos'):
+                ids = query.get('id', [''])[0].split(',')
+                return self._send(200, {'items': [{
+                    'id': video_id,
+                    'snippet': {
+                        'title': f"벤치마크 영상 {video_id} <테스트>",
+                        'channelTitle': '벤치마크 채널',
+                        'description': '',
+                        'publishedAt': '2024-01-01T00:00:00Z',
+                        'thumbnails': {'high': {'url': 'https://example.com/thumb.jpg'}}
+                    },
+                    'contentDetails': {'duration': 'PT12M30S'},
+                    'statistics': {}
+                } for video_id in ids if video_id]})
+
+            video_id = query.get('v', [''])[0]
+            if path == '/watch':
+                host = self.headers.get('Host')
+                captions = {'playerCaptionsTracklistRenderer': {
+                    'captionTracks': [{
+                        'baseUrl': f"http://{host}/timedtext?v={video_id}&lang=ko",
+                        'name': {'simpleText': 'Korean'}, 'languageCode': 'ko', 'isTranslatable': False
+                    }],
+                    'translationLanguages': []
+                }}
+                html = f'<html><script>var x = {{"playabilityStatus":{{}},"captions":{json.dumps(captions)},"videoDetails":{{}}}}</script></html>'
+                return self._send(200, html.encode('utf-8'), 'text/html; charset=utf-8')
+
+            lines, size = [], 0
+            while size < state.transcript_chars:
+                line = text_rng.choice(SENTENCES)
+                lines.append(f'<text start="{len(lines) * 2}" dur="2">{line}</text>')
+                size += len(line) + 1
+            xml = '<?xml version="1.0" encoding="utf-8" ?><transcript>' + ''.join(lines) + '</transcript>'
+            return self._send(200, xml.encode('utf-8'), 'text/xml; charset=utf-8')
+
+        def _gemini(self, method, path, query, body, text_rng):
+            return self._send(200, {
+                'candidates': [{
+                    'content': {'parts': [{'text': summary_markdown(text_rng)}], 'role': 'model'},
+                    'finishReason': 'STOP',
+                    'index': 0,
+                    'safetyRatings': []
+                }],
+                'usageMetadata': {'promptTokenCount': 4000, 'candidatesTokenCount': 800, 'totalTokenCount': 4800}
+            })
+
+        def _anthropic(self, method, path, query, body, text_rng):
+            return self._send(200, {
+                'id': f"msg_{uuid.uuid4().hex[:12]}",
+                'type': 'message',
+                'role': 'assistant',
+                'model': body.get('model', 'claude'),
+                'content': [{'type': 'text', 'text': summary_markdown(text_rng)}],
+                'stop_reason': 'end_turn',
+                'stop_sequence': None,
+                'usage': {'input_tokens': 4000, 'output_tokens': 800}
+            })
+
+        def _notion(self, method, path, query, body, text_rng):
+            if path == '/v1/pages' and method == 'POST':
+                page_id = str(uuid.uuid4())
+                return self._send(200, {'object': 'page', 'id': page_id,
+                                        'url': f"https://www.notion.so/{page_id.replace('-', '')}"})
+            if path.endswith('/children'):
+                return self._send(200, {'object': 'list', 'results': [], 'has_more': False, 'next_cursor': None})
+            return self._send(200, {'object': 'page', 'id': path.rsplit('/', 1)[1], 'archived': True})
+
+        def _telegram(self, method, path, query, body, text_rng):
+            return self._send(200, {'ok': True, 'result': {'message_id': text_rng.randint(1, 10 ** 6)}})
+
+    return Handler
+
+
+class FakeServices:
+    """서비스마다 로컬 HTTP 서버 하나 (ThreadingHTTPServer, 요청마다 스레드)"""
+
+    SERVICES = ['supabase', 'youtube', 'gemini', 'anthropic', 'notion', 'telegram']
+
+    def __init__(self, profiles: dict, time_scale: float, seed: int = 7):
+        self.state = FakeState()
+        self.servers = {}
+        for i, service in enumerate(self.SERVICES):
+            handler = make_handler(service, profiles, time_scale, self.state, seed + i)
+            server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name=f"fake-{service}", daemon=True).start()
+            self.servers[service] = server
+
+    def url(self, service: str) -> str:
+        host, port = self.servers[service].server_address
+        return f"http://{host}:{port}"
+
+    def env(self) -> dict:
+        return {
+            'SUPABASE_URL': self.url('supabase'),
+            'SUPABASE_SERVICE_KEY': FAKE_SUPABASE_KEY,
+            'YOUTUBE_API_KEY': 'bench',
+            'YOUTUBE_API_ENDPOINT': self.url('youtube') + '/',
+            'BENCH_WATCH_URL': self.url('youtube') + '/watch?v={video_id}',
+            'GEMINI_API_KEY': 'bench',
+            'GEMINI_API_ENDPOINT': self.url('gemini'),
+            'ANTHROPIC_API_KEY': 'bench',
+            'ANTHROPIC_BASE_URL': self.url('anthropic'),
+            'NOTION_API_KEY': 'bench',
+            'NOTION_BASE_URL': self.url('notion'),
+            'NOTION_DATABASE_ID_ARCHIVE': 'bench-archive',
+            'NOTION_DATABASE_ID_AGENT_REF': 'bench-agent-reference',
+            'TELEGRAM_BOT_TOKEN': 'bench',
+            'TELEGRAM_API_BASE': self.url('telegram'),
+        }
+
+    def shutdown(self):
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
+
+
+def run_child(config: dict):
+    """측정 대상 프로세스: Worker를 import하여 작업이 모두 끝날 때까지 실행"""
+    import resource
+    import youtube_transcript_api._transcripts as transcripts
+
+    # youtube-transcript-api는 시청 페이지 주소를 상수로 가짐
+    transcripts.WATCH_URL = os.environ['BENCH_WATCH_URL']
+
+    import main
+
+    class BenchRequest:
+        headers = {}
+
+    started = time.perf_counter()
+    invocations = 0
+    if config['mode'] == 'batch':
+        while invocations < config['max_invocations']:
+            invocations += 1
+            message, _ = main.process_pending_jobs(BenchRequest())
+            if message == 'No pending jobs':
+                break
+    else:
+        # 배치 조회 / 동시 처리 없이 작업 하나씩 (나머지 구성은 process_pending_jobs와 동일)
+        from core.job_queue import FinishBatcher
+        from core.telegram_outbox import OutboxDrainer
+        main.init_services()
+        jobs = main.job_queue.claim(config['jobs'])
+        with OutboxDrainer(main.outbox), \
+                FinishBatcher(main.job_queue, on_flush=lambda finished: main.outbox.wake()):
+            for job in jobs:
+                main.process_single_job(job)
+        invocations = 1
+
+    elapsed = time.perf_counter() - started
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print('BENCH_RESULT ' + json.dumps({'elapsed': elapsed, 'invocations': invocations, 'peak_rss_kb': peak_rss_kb}))
+
+
+def percentile(values: list, pct: float):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def run_level(services: FakeServices, args, concurrency: int) -> dict:
+    request = json.dumps({'jobs': args.jobs, 'transcript_chars': args.transcript_chars}).encode('utf-8')
+    import urllib.request
+    urllib.request.urlopen(urllib.request.Request(
+        services.url('supabase') + '/_bench/reset', data=request, method='POST',
+        headers={'Content-Type': 'application/json'}
+    )).read()
+
+    env = dict(os.environ)
+    env.update(services.env())
+    env.update({
+        'JOB_BATCH_SIZE': str(args.batch_size or concurrency),
+        'MAX_CONCURRENT_JOBS': str(concurrency),
+        'PROVIDER_HEALTH_BACKEND': 'memory',
+        'VIDEO_CACHE_BACKEND': 'memory',
+        'SUMMARY_CACHE_BACKEND': 'memory',
+        'STREAMING_MODE': '0',
+        'PYTHONUNBUFFERED': '1',
+    })
+    env.pop('RATE_LIMIT_BACKEND', None)
+    for key, default in SCALED_SETTINGS.items():
+        env[key] = str(float(os.getenv(key, default)) * args.time_scale)
+    if not args.real_limits:
+        for service in ('NOTION', 'YOUTUBE', 'GEMINI', 'ANTHROPIC', 'TELEGRAM', 'TELEGRAM_CHAT'):
+            env[f'RATE_LIMIT_{service}'] = '100000/1'
+
+    config = {'mode': args.mode, 'jobs': args.jobs, 'max_invocations': args.jobs + 10}
+    process = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_e2e', '--child', json.dumps(config)],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    lines = [line for line in process.stdout.splitlines() if line.startswith('BENCH_RESULT ')]
+    if process.returncode != 0 or not lines:
+        print(process.stdout[-3000:])
+        print(process.stderr[-3000:])
+        raise RuntimeError(f"벤치마크 프로세스 실패 (동시 처리 {concurrency})")
+    if args.verbose:
+        print(process.stdout)
+
+    child = json.loads(lines[-1][len('BENCH_RESULT '):])
+    with urllib.request.urlopen(services.url('supabase') + '/_bench/state') as response:
+        snapshot = json.loads(response.read())
+
+    finished = snapshot['finished']
+    stages = {stage: [] for stage in STAGES}
+    providers = {}
+    for item in finished:
+        for stage, seconds in (item['result'].get('timings') or {}).items():
+            stages.setdefault(stage, []).append(seconds)
+        stages['total'].append(item['total'])
+        provider = ((item['result'].get('llm') or {}).get('provider')) or '-'
+        providers[provider] = providers.get(provider, 0) + 1
+    stages['notify'] = snapshot['notify']
+
+    completed = sum(1 for item in finished if item['status'] == 'completed')
+    return {
+        'mode': args.mode,
+        'concurrency': concurrency,
+        'jobs': args.jobs,
+        'completed': completed,
+        'failed': len(finished) - completed,
+        'unfinished': snapshot['pending'],
+        'elapsed': round(child['elapsed'], 3),
+        'jobs_per_sec': round(len(finished) / child['elapsed'], 3) if child['elapsed'] else 0,
+        'invocations': child['invocations'],
+        'peak_rss_mb': round(child['peak_rss_kb'] / 1024, 1),
+        'providers': providers,
+        'requests': snapshot['requests'],
+        'stages': {
+            stage: {'p50': percentile(values, 50), 'p95': percentile(values, 95), 'samples': len(values)}
+            for stage, values in stages.items() if values
+        }
+    }
+
+
+def print_report(results: list, baseline: dict = None):
+    def fmt(value):
+        return f"{value:7.3f}" if value is not None else '      -'
+
+    for result in results:
+        key = f"{result['mode']}-{result['concurrency']}"
+        base = (baseline or {}).get(key)
+        delta = ''
+        if base and base['jobs_per_sec']:
+            delta = f" ({(result['jobs_per_sec'] / base['jobs_per_sec'] - 1) * 100:+.1f}% vs baseline)"
+
+        print(f"\n{'='*72}")
+        print(
+            f"📊 {result['mode']} / 동시 처리 {result['concurrency']}: "
+            f"{result['jobs_per_sec']:.2f} jobs/s{delta}, {result['elapsed']:.2f}s, "
+            f"완료 {result['completed']} / 실패 {result['failed']} / 미처리 {result['unfinished']}, "
+            f"호출 {result['invocations']}회, 최대 RSS {result['peak_rss_mb']} MB"
+        )
+        print(f"   모델: {result['providers']}  요청 수: {result['requests']}")
+        print(f"   {'stage':<12} {'p50 (s)':>8} {'p95 (s)':>8} {'n':>5}" + ('   p95 vs baseline' if base else ''))
+        for stage in STAGES:
+            stats = result['stages'].get(stage)
+            if not stats:
+                continue
+            line = f"   {stage:<12} {fmt(stats['p50']):>8} {fmt(stats['p95']):>8} {stats['samples']:>5}"
+            base_stats = (base or {}).get('stages', {}).get(stage)
+            if base_stats and base_stats['p95'] and stats['p95'] is not None:
+                line += f"   {(stats['p95'] / base_stats['p95'] - 1) * 100:+.1f}%"
+            print(line)
+
+
+def parse_overrides(values: list, profiles: dict) -> dict:
+    """--set gemini.error_rate=0.2 → profiles['gemini']['error_rate'] = 0.2"""
+    profiles = {service: dict(profile) for service, profile in profiles.items()}
+    for value in values or []:
+        key, _, number = value.partition('=')
+        service, _, field = key.partition('.')
+        if service not in profiles or field not in profiles[service]:
+            raise SystemExit(f"알 수 없는 설정: {value} (서비스: {', '.join(profiles)})")
+        profiles[service][field] = float(number)
+    return profiles
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description='Worker 처리량 / 지연시간 벤치마크 (로컬 대체 서버)')
+    parser.add_argument('--jobs', type=int, default=40)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 5, 10])
+    parser.add_argument('--batch-size', type=int, help='호출 1회당 작업 수 (기본: 동시 처리 수)')
+    parser.add_argument('--mode', choices=['batch', 'single'], default='batch')
+    parser.add_argument('--time-scale', type=float, default=0.1)
+    parser.add_argument('--transcript-chars', type=int, default=15000)
+    parser.add_argument('--set', action='append', metavar='SERVICE.FIELD=VALUE')
+    parser.add_argument('--real-limits', action='store_true')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--save', help='결과를 JSON으로 저장')
+    parser.add_argument('--baseline', help='비교할 이전 결과 JSON')
+    parser.add_argument('--verbose', action='store_true', help='Worker 로그 출력')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(json.loads(args.child))
+        return
+
+    profiles = parse_overrides(args.set, DEFAULT_PROFILES)
+    services = FakeServices(profiles, args.time_scale, args.seed)
+    concurrency_levels = [1] if args.mode == 'single' else args.concurrency
+
+    print(f"🧪 작업 {args.jobs}개, time-scale {args.time_scale}, 모드 {args.mode}, 동시 처리 {concurrency_levels}")
+    results = []
+    try:
+        for concurrency in concurrency_levels:
+            results.append(run_level(services, args, concurrency))
+    finally:
+        services.shutdown()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = {f"{r['mode']}-{r['concurrency']}": r for r in json.load(f)['results']}
+    print_report(results, baseline)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'profiles': profiles, 'time_scale': args.time_scale, 'results': results}, f, indent=1)
+        print(f"\n💾 저장: {args.save}")
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,127 @@
+"""
+마크다운 → Notion 블록 변환 벤치마크
+1000줄 요약을 기존 줄 단위 변환(startswith)과 core.markdown_blocks로 변환하여
+변환 시간 / 블록 수 / Notion 요청 수 / 전송 바이트 비교
+
+실행:
+python -m benchmarks.bench_markdown_blocks            # 합성 1000줄 요약
+python -m benchmarks.bench_markdown_blocks a.md b.md  # 실제 요약 파일
+"""
+import os
+import sys
+import time
+import random
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.markdown_blocks import markdown_to_blocks, count_blocks, split_text
+from core.notion_saver import batch_blocks, payload_bytes
+
+WORDS = [
+    '에이전트', '도구', '호출', '컨텍스트', '모델', '프롬프트', '검색', '결과', '평가', '지연시간',
+    'agent', 'tool', 'retrieval', 'latency', 'cache', 'token', 'pipeline', 'batch'
+]
+
+
+def legacy_markdown_to_blocks(markdown_text: str) -> list:
+    """기존 NotionSaver._markdown_to_blocks (줄마다 startswith 검사, 한 줄 = 블록 하나)"""
+    def block(block_type, text):
+        return {
+            "object": "block",
+            "type": block_type,
+            block_type: {"rich_text": [{"text": {"content": piece}} for piece in split_text(text)]}
+        }
+
+    blocks = []
+    for line in markdown_text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('# '):
+            blocks.append(block('heading_1', line[2:]))
+        elif line.startswith('## '):
+            blocks.append(block('heading_2', line[3:]))
+        elif line.startswith('### '):
+            blocks.append(block('heading_3', line[4:]))
+        elif line.startswith('- ') or line.startswith('* '):
+            blocks.append(block('bulleted_list_item', line[2:]))
+        else:
+            blocks.append(block('paragraph', line))
+    return blocks
+
+
+def sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(6, 16))]
+    if rng.random() < 0.3:
+        i = rng.randrange(len(words))
+        words[i] = f"**{words[i]}**"
+    if rng.random() < 0.2:
+        i = rng.randrange(len(words))
+        words[i] = f"`{words[i]}`"
+    return ' '.join(words) + '.'
+
+
+def synthetic_summary(lines: int, seed: int) -> str:
+    """LLM 요약과 비슷한 구성 (제목 / 여러 줄 문단 / 중첩 목록 / 번호 목록 / 인용 / 코드)"""
+    rng = random.Random(seed)
+    out = ['# 영상 요약']
+    while len(out) < lines:
+        out.append('')
+        out.append(f"## {sentence(rng)[:30]}")
+        kind = rng.choice(['paragraph', 'bullets', 'numbers', 'quote', 'code'])
+        if kind == 'paragraph':
+            out.extend(sentence(rng) for _ in range(rng.randint(2, 6)))
+        elif kind == 'bullets':
+            for _ in range(rng.randint(3, 8)):
+                out.append(f"- {sentence(rng)}")
+                if rng.random() < 0.4:
+                    out.append(f"  - {sentence(rng)}")
+        elif kind == 'numbers':
+            out.extend(f"{i}. {sentence(rng)}" for i in range(1, rng.randint(3, 7)))
+        elif kind == 'quote':
+            out.extend(f"> {sentence(rng)}" for _ in range(rng.randint(1, 4)))
+        else:
+            out.append('```python')
+            out.extend(f"result_{i} = agent.call('{rng.choice(WORDS)}')" for i in range(rng.randint(3, 10)))
+            out.append('```')
+    return '\n'.join(out[:lines])
+
+
+def measure(convert, markdown_text: str, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        blocks = convert(markdown_text)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    batches = batch_blocks(blocks)
+    return {
+        'ms': statistics.median(timings),
+        'blocks': count_blocks(blocks),
+        'requests': len(batches),
+        'bytes': sum(payload_bytes(batch) for batch in batches)
+    }
+
+
+def run(summaries: dict, repeat: int = 20):
+    print(f"{'sample':<20} {'converter':<10} {'ms (median)':>12} {'blocks':>8} {'requests':>9} {'KB':>8}")
+    for name, markdown_text in summaries.items():
+        for label, convert in (('legacy', legacy_markdown_to_blocks), ('compiler', markdown_to_blocks)):
+            result = measure(convert, markdown_text, repeat)
+            print(
+                f"{name:<20} {label:<10} {result['ms']:>12.2f} {result['blocks']:>8} "
+                f"{result['requests']:>9} {result['bytes'] / 1000:>8.1f}"
+            )
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        summaries = {}
+        for path in sys.argv[1:]:
+            with open(path, encoding='utf-8') as f:
+                summaries[os.path.basename(path)] = f.read()
+    else:
+        summaries = {f'synthetic-1000 #{seed}': synthetic_summary(1000, seed) for seed in (1, 2, 3)}
+
+    run(summaries)
@@ -0,0 +1,116 @@
+"""
+자막 전처리 벤치마크
+샘플 자막마다 글자 수 / 추정 토큰 수 절감량과 추가 CPU 시간 측정
+
+실행:
+python -m benchmarks.bench_transcript_preprocess            # 합성 샘플
+python -m benchmarks.bench_transcript_preprocess a.txt b.txt  # 실제 자막 파일 (한 줄 = 자막 한 조각)
+"""
+import os
+import sys
+import random
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.transcript_preprocessor import TranscriptPreprocessor
+
+EN_SENTENCES = [
+    "so today we're going to talk about how agents use tools",
+    "the first thing you need is a clear description of each tool",
+    "then the model decides which tool to call and with what arguments",
+    "you want to keep the context window small so the model stays focused",
+    "in practice most failures come from ambiguous instructions",
+    "let me show you an example of a retrieval step",
+]
+
+KO_SENTENCES = [
+    "오늘은 에이전트가 도구를 어떻게 사용하는지 이야기해 보겠습니다",
+    "먼저 각 도구에 대한 명확한 설명이 필요합니다",
+    "모델은 어떤 도구를 어떤 인자로 호출할지 스스로 결정합니다",
+    "컨텍스트를 작게 유지해야 모델이 집중할 수 있습니다",
+    "실제로 대부분의 실패는 모호한 지시에서 나옵니다",
+]
+
+NOISE = ['[Music]', '[Applause]', '[음악]', '♪♪', '(웃음)']
+FILLERS_EN = ['um', 'uh', 'hmm']
+FILLERS_KO = ['음', '어...', '그...']
+
+
+def rolling_captions(sentences: list, fillers: list, lines: int, seed: int) -> str:
+    """
+    자동 생성 자막 흉내
+    - 3~7 단어 창이 1~3 단어씩 밀리며 겹치는 줄 (rolling caption)
+    - 가끔 효과음 태그 / 추임새 / 한 단어 줄
+    """
+    rng = random.Random(seed)
+    words = []
+    while len(words) < lines * 3:
+        sentence = rng.choice(sentences).split()
+        for word in sentence:
+            words.append(word)
+            if rng.random() < 0.05:
+                words.append(rng.choice(fillers))
+
+    out = []
+    pos = 0
+    while len(out) < lines and pos < len(words):
+        size = rng.randint(3, 7)
+        out.append(' '.join(words[pos:pos + size]))
+        if rng.random() < 0.05:
+            out.append(rng.choice(NOISE))
+        if rng.random() < 0.05:
+            out.append(words[pos + size - 1] if pos + size - 1 < len(words) else words[-1])
+        pos += rng.randint(1, 3)
+    return '\n'.join(out)
+
+
+def clean_captions(sentences: list, lines: int) -> str:
+    """수동 자막 흉내 (겹침 없음, 문장 단위) - 전처리로 줄일 것이 거의 없는 경우"""
+    return '\n'.join(sentences[i % len(sentences)] + '.' for i in range(lines))
+
+
+def samples() -> dict:
+    return {
+        'auto-en (10분)': rolling_captions(EN_SENTENCES, FILLERS_EN, 600, 1),
+        'auto-en (60분)': rolling_captions(EN_SENTENCES, FILLERS_EN, 3600, 2),
+        'auto-ko (10분)': rolling_captions(KO_SENTENCES, FILLERS_KO, 600, 3),
+        'auto-ko (60분)': rolling_captions(KO_SENTENCES, FILLERS_KO, 3600, 4),
+        'manual-ko (30분)': clean_captions(KO_SENTENCES, 900),
+    }
+
+
+def run(transcripts: dict, repeat: int = 5):
+    preprocessor = TranscriptPreprocessor()
+
+    print(f"{'sample':<22} {'chars':>16} {'tokens(est)':>16} {'ratio':>7} {'cpu ms (median)':>16}")
+    total_before = total_after = 0
+    for name, transcript in transcripts.items():
+        runs = [preprocessor.process(transcript) for _ in range(repeat)]
+        _, stats = runs[-1]
+        cpu_ms = statistics.median(run_stats['cpu_ms'] for _, run_stats in runs)
+
+        total_before += stats['original_tokens']
+        total_after += stats['processed_tokens']
+        print(
+            f"{name:<22} "
+            f"{stats['original_chars']:>7} → {stats['processed_chars']:<6} "
+            f"{stats['original_tokens']:>7} → {stats['processed_tokens']:<6} "
+            f"{stats['compression_ratio']:>7} "
+            f"{cpu_ms:>16.2f}"
+        )
+
+    if total_before:
+        print(f"\n추정 토큰 절감: {total_before - total_after} ({(1 - total_after / total_before) * 100:.1f}%)")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        transcripts = {}
+        for path in sys.argv[1:]:
+            with open(path, encoding='utf-8') as f:
+                transcripts[os.path.basename(path)] = f.read()
+    else:
+        transcripts = samples()
+
+    run(transcripts)
@@ -3,36 +3,18 @@ AI 요약 모듈
 Gemini 2.0 Flash 사용 (무료)
 """
 import os
-import google.generativeai as genai
+import time
+import hashlib
+from dataclasses import dataclass, asdict
+from typing import Optional
 
+from core import clients
+from core.rate_limiter import rate_limiter
+from core.transcript_preprocessor import estimate_tokens
 
-class GeminiSummarizer:
-    def __init__(self):
-        self.api_key = os.getenv('GEMINI_API_KEY')
-        if not self.api_key:
-            print("⚠️ GEMINI_API_KEY가 설정되지 않았습니다.")
-            self.model = None
-        else:
-            genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
-            print("✅ Gemini 2.0 Flash 초기화 완료")
-
-    def summarize(self, video_info: dict, transcript: str, prompt_key: str = 'archive') -> str:
-        """
-        Gemini로 영상 요약
-        """
-        if not self.model:
-            return "❌ Gemini API 키가 설정되지 않았습니다."
-
-        # 자막 길이 제한 (토큰 절약)
-        max_chars = 24000  # 약 8K tokens
-        if len(transcript) > max_chars:
-            transcript = transcript[:max_chars] + "\n\n...(이하 생략)"
-            print(f"⚠️ 자막이 너무 길어 {max_chars}자로 제한했습니다.")
-
-        # 프롬프트 구성
-        system_prompts = {
-            'archive': """당신은 텍스트 정제 및 아카이브 전문가입니다.
+# 채널별 시스템 프롬프트 (Gemini)
+GEMINI_SYSTEM_PROMPTS = {
+    'archive': """당신은 텍스트 정제 및 아카이브 전문가입니다.
 
 주요 작업:
 1. 영상 자막/설명을 한글로 정제 (영어는 번역 후 정제)
@@ -55,7 +37,7 @@ class GeminiSummarizer:
 - 인사이트 1
 - 인사이트 2
 """,
-            'agent-reference': """당신은 AI 에이전트 참고자료 번역 및 정리 전문가입니다.
+    'agent-reference': """당신은 AI 에이전트 참고자료 번역 및 정리 전문가입니다.
 
 주요 작업:
 1. 영상 내용을 한글로 번역 및 정제
@@ -80,17 +62,38 @@ class GeminiSummarizer:
 ## 참고 사항
 (추가 정보)
 """
-        }
+}
+
+# 채널별 시스템 프롬프트 (Claude)
+CLAUDE_SYSTEM_PROMPTS = {
+    'archive': """당신은 텍스트 정제 및 아카이브 전문가입니다.
+영상 자막을 한글로 정제하고 1000줄 이내로 요약하여 마크다운 형식으로 작성하세요.""",
+    'agent-reference': """당신은 AI 에이전트 참고자료 전문가입니다.
+AI 에이전트 개발/활용에 유용한 인사이트를 추출하여 마크다운 형식으로 작성하세요."""
+}
 
-        system_prompt = system_prompts.get(prompt_key, system_prompts['archive'])
+# 긴 자막의 부분 요약(map) 프롬프트
+CHUNK_SYSTEM_PROMPT = """당신은 긴 영상 자막을 나누어 정리하는 전문가입니다.
 
-        prompt = f"""{system_prompt}
+주요 작업:
+1. 주어진 자막 일부의 핵심 내용을 빠짐없이 한글로 정리 (영어는 번역)
+2. 수치, 고유명사, 예시, 결론은 그대로 보존
+3. 인사말, 반복, 잡담은 제외
+4. 마크다운 글머리표(-)로만 작성 (제목 없이)
+"""
+
+# 한 번에 모델에 보내는 자막 최대 길이 (약 8K tokens)
+MAX_TRANSCRIPT_CHARS = 24000
+TRUNCATION_MARKER = "\n\n...(이하 생략)"
+
+# 사용자 프롬프트 템플릿 (바뀌면 prompt_version이 달라짐)
+GEMINI_PROMPT_TEMPLATE = """{system_prompt}
 
 ---
 
-영상 제목: {video_info['title']}
-채널: {video_info['channel']}
-길이: {video_info['duration']}
+영상 제목: {title}
+채널: {channel}
+길이: {duration}
 
 자막 내용:
 {transcript}
@@ -100,77 +103,288 @@ class GeminiSummarizer:
 위 내용을 요약하고 정제해주세요.
 """
 
+CLAUDE_USER_TEMPLATE = """영상 제목: {title}
+채널: {channel}
+
+자막:
+{transcript}
+
+위 내용을 요약하고 정제해주세요."""
+
+
+def prompt_fingerprint(*parts: str) -> str:
+    """프롬프트 구성 요소 해시 (하나라도 바뀌면 요약 캐시가 자동으로 무효화됨)"""
+    return hashlib.sha256('\x00'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def truncate_transcript(transcript: str) -> str:
+    """자막 길이 제한 (토큰 절약) - 긴 자막은 MapReduceSummarizer가 먼저 줄여서 전달"""
+    if len(transcript) <= MAX_TRANSCRIPT_CHARS:
+        return transcript
+    print(f"⚠️ 자막이 너무 길어 {MAX_TRANSCRIPT_CHARS}자로 제한했습니다.")
+    return transcript[:MAX_TRANSCRIPT_CHARS] + TRUNCATION_MARKER
+
+
+@dataclass
+class SummaryResult:
+    """
+    요약 호출 결과
+    오류 여부는 success로 판단 (요약 본문에 '오류' 같은 단어가 있어도 성공)
+    tokens_estimated: SDK가 사용량을 주지 않아 글자 수로 추정한 토큰 수인지
+    """
+    success: bool
+    text: str
+    provider: str
+    model: str
+    latency: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    tokens_estimated: bool = False
+    error: Optional[str] = None
+
+    @classmethod
+    def failure(cls, provider: str, model: str, error: str, latency: float = 0.0) -> 'SummaryResult':
+        return cls(success=False, text='', provider=provider, model=model, latency=latency, error=error)
+
+    def add_usage(self, other: 'SummaryResult'):
+        """map 단계 호출의 토큰 사용량 합산"""
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.tokens_estimated = self.tokens_estimated or other.tokens_estimated
+
+    def to_dict(self) -> dict:
+        """작업 결과(jobs.result) 기록용 (본문 제외)"""
+        data = asdict(self)
+        del data['text']
+        data['latency'] = round(self.latency, 3)
+        return data
+
+
+class GeminiSummarizer:
+    provider = 'gemini'
+
+    def __init__(self):
+        self.api_key = os.getenv('GEMINI_API_KEY')
+        self.model_name = 'gemini-2.0-flash-exp'
+        if not self.api_key:
+            print("⚠️ GEMINI_API_KEY가 설정되지 않았습니다.")
+            self.model = None
+        else:
+            self.model = clients.get_gemini_model(self.api_key, self.model_name)
+
+    def prompt_version(self, prompt_key: str = 'archive') -> str:
+        """요약 캐시 키에 사용할 프롬프트 해시 (시스템 프롬프트 + 사용자 프롬프트 템플릿 + 자막 길이 제한)"""
+        return prompt_fingerprint(GEMINI_SYSTEM_PROMPTS.get(prompt_key, GEMINI_SYSTEM_PROMPTS['archive']),
+                                  GEMINI_PROMPT_TEMPLATE, str(MAX_TRANSCRIPT_CHARS), TRUNCATION_MARKER)
+
+    def summarize(self, video_info: dict, transcript: str, prompt_key: str = 'archive') -> SummaryResult:
+        """
+        Gemini로 영상 요약
+        """
+        if not self.model:
+            return SummaryResult.failure(self.provider, self.model_name, "Gemini API 키가 설정되지 않았습니다.")
+
+        started = time.monotonic()
+
         try:
+            prompt = self._build_prompt(video_info, transcript, prompt_key)
             print("🤖 Gemini AI 요약 시작...")
-            response = self.model.generate_content(prompt)
-            summary = response.text
+            response = rate_limiter.call(self.provider, self.model.generate_content, prompt)
+            result = self._to_result(prompt, response, started)
 
-            print(f"✅ AI 요약 완료: {len(summary)} 글자")
-            return summary
+            print(f"✅ AI 요약 완료: {len(result.text)} 글자")
+            return result
 
         except Exception as e:
             print(f"❌ Gemini API 오류: {e}")
-            return f"❌ AI 요약 중 오류가 발생했습니다: {str(e)}"
+            return SummaryResult.failure(self.provider, self.model_name, str(e), time.monotonic() - started)
+
+    def summarize_stream(self, video_info: dict, transcript: str, prompt_key: str = 'archive'):
+        """
+        Gemini 스트리밍 요약 - 생성되는 대로 텍스트 조각을 yield
+        오류는 예외로 전달 (호출 측에서 폴백 처리)
+        """
+        if not self.model:
+            raise RuntimeError("Gemini API 키가 설정되지 않았습니다.")
+
+        prompt = self._build_prompt(video_info, transcript, prompt_key)
+
+        print("🤖 Gemini AI 스트리밍 요약 시작...")
+        rate_limiter.acquire(self.provider)
+        for chunk in self.model.generate_content(prompt, stream=True):
+            if chunk.text:
+                yield chunk.text
+
+    def summarize_chunk(self, video_info: dict, chunk: str, index: int, total: int) -> SummaryResult:
+        """
+        긴 자막의 일부를 요약 (map 단계)
+        오류는 예외로 전달
+        """
+        if not self.model:
+            raise RuntimeError("Gemini API 키가 설정되지 않았습니다.")
+
+        prompt = f"""{CHUNK_SYSTEM_PROMPT}
+
+---
+
+영상 제목: {video_info['title']}
+채널: {video_info['channel']}
+
+자막 ({index}/{total} 부분):
+{chunk}
+"""
+        started = time.monotonic()
+        response = rate_limiter.call(self.provider, self.model.generate_content, prompt)
+        return self._to_result(prompt, response, started)
+
+    def _to_result(self, prompt: str, response, started: float) -> SummaryResult:
+        """
+        generate_content 응답 → SummaryResult
+        google-generativeai 0.3.x 응답에는 사용량(usage_metadata)이 없어 글자 수로 추정
+        """
+        text = response.text
+        usage = getattr(response, 'usage_metadata', None)
+        if not text.strip():
+            return SummaryResult.failure(self.provider, self.model_name, "빈 요약이 생성되었습니다.",
+                                         time.monotonic() - started)
+        return SummaryResult(
+            success=True,
+            text=text,
+            provider=self.provider,
+            model=self.model_name,
+            latency=time.monotonic() - started,
+            input_tokens=usage.prompt_token_count if usage else estimate_tokens(prompt),
+            output_tokens=usage.candidates_token_count if usage else estimate_tokens(text),
+            tokens_estimated=usage is None
+        )
+
+    def _build_prompt(self, video_info: dict, transcript: str, prompt_key: str) -> str:
+        return GEMINI_PROMPT_TEMPLATE.format(
+            system_prompt=GEMINI_SYSTEM_PROMPTS.get(prompt_key, GEMINI_SYSTEM_PROMPTS['archive']),
+            title=video_info['title'],
+            channel=video_info['channel'],
+            duration=video_info['duration'],
+            transcript=truncate_transcript(transcript)
+        )
 
 
 # Claude Haiku 백업 옵션 (유료지만 저렴)
 class ClaudeSummarizer:
+    provider = 'anthropic'
+
     def __init__(self, model_name: str = 'claude-3-haiku-20240307'):
-        import anthropic
         self.api_key = os.getenv('ANTHROPIC_API_KEY')
+        self.model_name = model_name
         if not self.api_key:
             print("⚠️ ANTHROPIC_API_KEY가 설정되지 않았습니다.")
             self.client = None
         else:
-            self.client = anthropic.Anthropic(api_key=self.api_key)
-            self.model_name = model_name
-            print(f"✅ Claude {model_name} 초기화 완료")
+            self.client = clients.get_anthropic_client(self.api_key)
 
-    def summarize(self, video_info: dict, transcript: str, prompt_key: str = 'archive', max_tokens: int = 2048) -> str:
-        """Claude로 영상 요약"""
-        if not self.client:
-            return "❌ Claude API 키가 설정되지 않았습니다."
-
-        # 자막 길이 제한
-        max_chars = 24000
-        if len(transcript) > max_chars:
-            transcript = transcript[:max_chars] + "\n\n...(이하 생략)"
-
-        system_prompts = {
-            'archive': """당신은 텍스트 정제 및 아카이브 전문가입니다.
-영상 자막을 한글로 정제하고 1000줄 이내로 요약하여 마크다운 형식으로 작성하세요.""",
-            'agent-reference': """당신은 AI 에이전트 참고자료 전문가입니다.
-AI 에이전트 개발/활용에 유용한 인사이트를 추출하여 마크다운 형식으로 작성하세요."""
-        }
+    def prompt_version(self, prompt_key: str = 'archive') -> str:
+        """요약 캐시 키에 사용할 프롬프트 해시 (시스템 프롬프트 + 사용자 프롬프트 템플릿 + 자막 길이 제한)"""
+        return prompt_fingerprint(CLAUDE_SYSTEM_PROMPTS.get(prompt_key, CLAUDE_SYSTEM_PROMPTS['archive']),
+                                  CLAUDE_USER_TEMPLATE, str(MAX_TRANSCRIPT_CHARS), TRUNCATION_MARKER)
 
-        system_prompt = system_prompts.get(prompt_key, system_prompts['archive'])
+    def summarize(self, video_info: dict, transcript: str, prompt_key: str = 'archive', max_tokens: int = 2048,
+                  timeout: float = None) -> SummaryResult:
+        """Claude로 영상 요약 (timeout: 요청 제한 시간(초), 없으면 SDK 기본값)"""
+        if not self.client:
+            return SummaryResult.failure(self.provider, self.model_name, "Claude API 키가 설정되지 않았습니다.")
 
+        started = time.monotonic()
         try:
             print(f"🤖 Claude AI 요약 시작 (모델: {self.model_name})...")
 
-            message = self.client.messages.create(
-                model=self.model_name,
-                max_tokens=max_tokens,
-                system=system_prompt,
-                messages=[{
-                    "role": "user",
-                    "content": f"""영상 제목: {video_info['title']}
-채널: {video_info['channel']}
-
-자막:
-{transcript}
+            request = self._build_request(video_info, transcript, prompt_key, max_tokens)
+            if timeout:
+                request['timeout'] = timeout
+            message = rate_limiter.call(self.provider, self.client.messages.create, **request)
+            result = self._to_result(message, started)
 
-위 내용을 요약하고 정제해주세요."""
-                }]
-            )
-
-            summary = message.content[0].text
-            print(f"✅ Claude 요약 완료: {len(summary)} 글자")
-            return summary
+            print(f"✅ Claude 요약 완료: {len(result.text)} 글자")
+            return result
 
         except Exception as e:
             print(f"❌ Claude API 오류: {e}")
-            return f"❌ AI 요약 중 오류가 발생했습니다: {str(e)}"
+            return SummaryResult.failure(self.provider, self.model_name, str(e), time.monotonic() - started)
+
+    def summarize_stream(self, video_info: dict, transcript: str, prompt_key: str = 'archive', max_tokens: int = 2048,
+                         timeout: float = None):
+        """
+        Claude 스트리밍 요약 - 생성되는 대로 텍스트 조각을 yield
+        오류는 예외로 전달 (호출 측에서 폴백 처리)
+        timeout: 요청 제한 시간(초), 없으면 SDK 기본값
+        """
+        if not self.client:
+            raise RuntimeError("Claude API 키가 설정되지 않았습니다.")
+
+        print(f"🤖 Claude AI 스트리밍 요약 시작 (모델: {self.model_name})...")
+        request = self._build_request(video_info, transcript, prompt_key, max_tokens)
+        if timeout:
+            request['timeout'] = timeout
+        rate_limiter.acquire(self.provider)
+        with self.client.messages.stream(**request) as stream:
+            for text in stream.text_stream:
+                yield text
+
+    def summarize_chunk(self, video_info: dict, chunk: str, index: int, total: int,
+                        max_tokens: int = 1024) -> SummaryResult:
+        """
+        긴 자막의 일부를 요약 (map 단계)
+        오류는 예외로 전달
+        """
+        if not self.client:
+            raise RuntimeError("Claude API 키가 설정되지 않았습니다.")
+
+        started = time.monotonic()
+        message = rate_limiter.call(
+            self.provider,
+            self.client.messages.create,
+            model=self.model_name,
+            max_tokens=max_tokens,
+            system=CHUNK_SYSTEM_PROMPT,
+            messages=[{
+                "role": "user",
+                "content": f"""영상 제목: {video_info['title']}
+채널: {video_info['channel']}
+
+자막 ({index}/{total} 부분):
+{chunk}"""
+            }]
+        )
+        return self._to_result(message, started)
+
+    def _to_result(self, message, started: float) -> SummaryResult:
+        """messages.create 응답 → SummaryResult"""
+        text = ''.join(block.text for block in message.content if getattr(block, 'type', 'text') == 'text')
+        if not text.strip():
+            return SummaryResult.failure(self.provider, self.model_name, "빈 요약이 생성되었습니다.",
+                                         time.monotonic() - started)
+        return SummaryResult(
+            success=True,
+            text=text,
+            provider=self.provider,
+            model=self.model_name,
+            latency=time.monotonic() - started,
+            input_tokens=message.usage.input_tokens,
+            output_tokens=message.usage.output_tokens
+        )
+
+    def _build_request(self, video_info: dict, transcript: str, prompt_key: str, max_tokens: int) -> dict:
+        return {
+            'model': self.model_name,
+            'max_tokens': max_tokens,
+            'system': CLAUDE_SYSTEM_PROMPTS.get(prompt_key, CLAUDE_SYSTEM_PROMPTS['archive']),
+            'messages': [{
+                "role": "user",
+                "content": CLAUDE_USER_TEMPLATE.format(
+                    title=video_info['title'],
+                    channel=video_info['channel'],
+                    transcript=truncate_transcript(transcript)
+                )
+            }]
+        }
 
 
 if __name__ == '__main__':
@@ -189,5 +403,7 @@ if __name__ == '__main__':
 
     test_transcript = "This is a test transcript. " * 100
 
-    summary = summarizer.summarize(test_video_info, test_transcript)
-    print(f"\n요약 결과:\n{summary[:500]}...")
+    result = summarizer.summarize(test_video_info, test_transcript)
+    if result.success:
+        print(f"\n요약 결과:\n{result.text[:500]}...")
+    print(result.to_dict())
@@ -0,0 +1,280 @@
+"""
+캐시 모듈
+video_id 기준으로 영상 정보 / 자막을 캐시 (TTL + 크기 제한 LRU)
+
+백엔드:
+- memory: 프로세스 메모리 (warm 인스턴스 동안 유지)
+- sqlite: 로컬 SQLite 파일 (장시간 실행 Worker)
+- supabase: Supabase 테이블 (모든 인스턴스 공유, supabase_schema.sql의 video_cache)
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+
+class MemoryCacheBackend:
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        """Returns: (value, expires_at) 또는 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value, expires_at: float):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SQLiteCacheBackend:
+    def __init__(self, path: str, max_entries: int = 1000, table: str = 'video_cache'):
+        self.path = path
+        self.max_entries = max_entries
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_accessed ON {table}(accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value, expires_at: float):
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at, time.time())
+            )
+            # 오래 사용되지 않은 항목부터 삭제
+            self._conn.execute(f"""
+                DELETE FROM {self.table} WHERE key IN (
+                    SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+
+class SupabaseCacheBackend:
+    # set 호출 N회마다 evict RPC 실행 (매번 실행하면 왕복 비용 증가)
+    EVICT_EVERY = 20
+    # accessed_at이 이 시간(초)보다 오래된 항목만 조회 시 갱신 (LRU 순서는 대략적이면 충분)
+    TOUCH_SECONDS = int(os.getenv('CACHE_TOUCH_SECONDS', '3600'))
+
+    def __init__(self, client, max_entries: int = 1000, table: str = 'video_cache'):
+        self.client = client
+        self.max_entries = max_entries
+        self.table = table
+        self._sets = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        response = self.client.table(self.table) \
+            .select('value, expires_at, accessed_at') \
+            .eq('key', key) \
+            .limit(1) \
+            .execute()
+
+        if not response.data:
+            return None
+
+        row = response.data[0]
+        accessed_at = datetime.fromisoformat(row['accessed_at']).timestamp() if row.get('accessed_at') else 0
+        if time.time() - accessed_at >= self.TOUCH_SECONDS:
+            # 조회 응답을 기다리게 하지 않도록 백그라운드에서 갱신
+            threading.Thread(target=self._touch, args=(key,), daemon=True).start()
+
+        return row['value'], datetime.fromisoformat(row['expires_at']).timestamp()
+
+    def _touch(self, key: str):
+        """LRU용 accessed_at 갱신 (실패해도 조회 결과에는 영향 없음)"""
+        try:
+            self.client.table(self.table) \
+                .update({'accessed_at': datetime.now(timezone.utc).isoformat()}) \
+                .eq('key', key) \
+                .execute()
+        except Exception as e:
+            print(f"⚠️ 캐시 접근 시각 갱신 실패 ({key}): {e}")
+
+    def set(self, key: str, value, expires_at: float):
+        now = datetime.now(timezone.utc).isoformat()
+        self.client.table(self.table).upsert({
+            'key': key,
+            'value': value,
+            'expires_at': datetime.fromtimestamp(expires_at, timezone.utc).isoformat(),
+            'accessed_at': now
+        }).execute()
+
+        with self._lock:
+            self._sets += 1
+            evict = self._sets % self.EVICT_EVERY == 0
+
+        if evict:
+            self.client.rpc('evict_cache', {
+                'p_table': self.table,
+                'p_max_entries': self.max_entries
+            }).execute()
+
+    def delete(self, key: str):
+        self.client.table(self.table).delete().eq('key', key).execute()
+
+
+class VideoCache:
+    def __init__(self, backend, ttl_seconds: int = 86400):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str):
+        """캐시 조회 (만료되었거나 백엔드 오류면 None)"""
+        cache_key = f"{namespace}:{key}"
+        try:
+            entry = self.backend.get(cache_key)
+        except Exception as e:
+            print(f"⚠️ 캐시 조회 실패 ({cache_key}): {e}")
+            entry = None
+
+        if entry is not None and entry[1] < time.time():
+            self._safe_delete(cache_key)
+            entry = None
+
+        self._record(namespace, hit=entry is not None)
+        return entry[0] if entry is not None else None
+
+    def set(self, namespace: str, key: str, value, ttl_seconds: int = None):
+        """캐시 저장 (실패해도 작업에는 영향 없음)"""
+        cache_key = f"{namespace}:{key}"
+        expires_at = time.time() + (ttl_seconds or self.ttl_seconds)
+        try:
+            self.backend.set(cache_key, value, expires_at)
+        except Exception as e:
+            print(f"⚠️ 캐시 저장 실패 ({cache_key}): {e}")
+
+    def get_video_info(self, video_id: str) -> dict:
+        return self.get('video_info', video_id)
+
+    def set_video_info(self, video_id: str, video_info: dict):
+        self.set('video_info', video_id, video_info)
+
+    def get_transcript(self, video_id: str) -> tuple:
+        """Returns: (transcript_text, source) 또는 (None, None)"""
+        cached = self.get('transcript', video_id)
+        if not cached:
+            return None, None
+        return cached['text'], cached['source']
+
+    def set_transcript(self, video_id: str, transcript: str, source: str):
+        self.set('transcript', video_id, {'text': transcript, 'source': source})
+
+    def set_transcript_chars(self, video_id: str, video_info: dict, transcript_chars: int):
+        """
+        자막 글자 수를 영상 정보 항목에 함께 저장 (스케줄러의 처리 시간 추정용)
+        영상 정보는 배치로 미리 조회하므로 추정할 때 자막을 내려받거나 따로 조회하지 않아도 됨
+        """
+        if video_info and video_info.get('transcript_chars') != transcript_chars:
+            self.set_video_info(video_id, dict(video_info, transcript_chars=transcript_chars))
+
+    def stats(self) -> dict:
+        """namespace별 hit/miss 통계"""
+        with self._lock:
+            stats = {}
+            for namespace, counts in self._stats.items():
+                total = counts['hits'] + counts['misses']
+                stats[namespace] = dict(counts, hit_rate=round(counts['hits'] / total, 3) if total else 0.0)
+            return stats
+
+    def _record(self, namespace: str, hit: bool):
+        with self._lock:
+            counts = self._stats.setdefault(namespace, {'hits': 0, 'misses': 0})
+            counts['hits' if hit else 'misses'] += 1
+
+    def _safe_delete(self, cache_key: str):
+        try:
+            self.backend.delete(cache_key)
+        except Exception as e:
+            print(f"⚠️ 캐시 삭제 실패 ({cache_key}): {e}")
+
+
+def create_cache_backend(kind: str, supabase_client=None, table: str = 'video_cache', max_entries: int = 1000):
+    """
+    캐시 백엔드 생성
+    kind: 'memory' | 'sqlite' | 'supabase'
+    """
+    if kind == 'sqlite':
+        path = os.getenv('CACHE_SQLITE_PATH', '/tmp/youtube_summarizer_cache.sqlite3')
+        return SQLiteCacheBackend(path, max_entries=max_entries, table=table)
+
+    if kind == 'supabase':
+        if supabase_client is None:
+            print("⚠️ Supabase 클라이언트가 없어 memory 캐시를 사용합니다.")
+            return MemoryCacheBackend(max_entries=max_entries)
+        return SupabaseCacheBackend(supabase_client, max_entries=max_entries, table=table)
+
+    return MemoryCacheBackend(max_entries=max_entries)
+
+
+def create_video_cache(supabase_client=None) -> VideoCache:
+    """환경변수 설정으로 VideoCache 생성"""
+    kind = os.getenv('VIDEO_CACHE_BACKEND', 'memory')
+    backend = create_cache_backend(
+        kind,
+        supabase_client=supabase_client,
+        table='video_cache',
+        max_entries=int(os.getenv('VIDEO_CACHE_MAX_ENTRIES', '1000'))
+    )
+    print(f"✅ 영상 캐시 초기화 완료 (backend: {kind})")
+    return VideoCache(backend, ttl_seconds=int(os.getenv('VIDEO_CACHE_TTL', '86400')))
+
+
+if __name__ == '__main__':
+    # 테스트
+    cache = VideoCache(MemoryCacheBackend(max_entries=2), ttl_seconds=60)
+
+    cache.set_video_info('aaaaaaaaaaa', {'title': 'A'})
+    cache.set_video_info('bbbbbbbbbbb', {'title': 'B'})
+    cache.get_video_info('aaaaaaaaaaa')
+    cache.set_video_info('ccccccccccc', {'title': 'C'})  # bbb 삭제 (LRU)
+
+    print(cache.get_video_info('aaaaaaaaaaa'))
+    print(cache.get_video_info('bbbbbbbbbbb'))
+    print(cache.stats())
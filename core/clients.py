@@ -0,0 +1,143 @@
+"""
+클라이언트 레지스트리
+warm 인스턴스에서 SDK 클라이언트 / HTTP 세션을 한 번만 생성하여 재사용
+(호출마다 discovery 문서 로드, genai.configure, TLS 연결 수립을 반복하지 않음)
+
+API 주소 변경 (프록시 / 로컬 대체 서버, benchmarks/bench_e2e.py):
+YOUTUBE_API_ENDPOINT, GEMINI_API_ENDPOINT, NOTION_BASE_URL, TELEGRAM_API_BASE
+(Anthropic은 SDK의 ANTHROPIC_BASE_URL, Supabase는 SUPABASE_URL 사용)
+"""
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core import startup_profiler
+
+# 서비스별 keep-alive 연결 수
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '10'))
+
+TELEGRAM_API_BASE = os.getenv('TELEGRAM_API_BASE', 'https://api.telegram.org')
+
+_clients = {}
+_lock = threading.Lock()
+_http_pool = queue.LifoQueue()
+
+
+def _get_or_create(key: tuple, factory):
+    """key별로 한 번만 factory() 실행 (스레드 안전)"""
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                with startup_profiler.timed(f"init:{key[0]}"):
+                    client = factory()
+                _clients[key] = client
+    return client
+
+
+def get_supabase():
+    """Supabase 클라이언트 (환경변수가 없으면 None)"""
+    url = os.getenv('SUPABASE_URL')
+    key = os.getenv('SUPABASE_SERVICE_KEY')
+    if not (url and key):
+        return None
+
+    def factory():
+        from supabase import create_client
+        client = create_client(url, key)
+        print("✅ Supabase 클라이언트 초기화 완료")
+        return client
+
+    return _get_or_create(('supabase', url, key), factory)
+
+
+def get_http_session() -> requests.Session:
+    """keep-alive 연결 풀을 가진 공용 requests 세션 (Telegram 등)"""
+    def factory():
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    return _get_or_create(('http_session',), factory)
+
+
+def get_youtube_service(api_key: str):
+    """
+    YouTube Data API 서비스 객체
+    패키지에 포함된 정적 discovery 문서를 사용하여 네트워크 요청 없이 생성
+    """
+    def factory():
+        from googleapiclient.discovery import build
+        endpoint = os.getenv('YOUTUBE_API_ENDPOINT')
+        service = build(
+            'youtube', 'v3', developerKey=api_key, static_discovery=True, cache_discovery=False,
+            client_options={'api_endpoint': endpoint} if endpoint else None
+        )
+        print("✅ YouTube API 클라이언트 초기화 완료")
+        return service
+
+    return _get_or_create(('youtube', api_key), factory)
+
+
+@contextmanager
+def borrow_youtube_http():
+    """
+    YouTube API 요청용 httplib2.Http 대여
+    httplib2는 스레드 안전하지 않으므로 요청마다 풀에서 하나씩 빌려 씀 (연결은 재사용)
+    """
+    try:
+        http = _http_pool.get_nowait()
+    except queue.Empty:
+        import httplib2
+        http = httplib2.Http(timeout=30)
+
+    try:
+        yield http
+    finally:
+        _http_pool.put(http)
+
+
+def get_gemini_model(api_key: str, model_name: str):
+    """Gemini 모델 (genai.configure는 프로세스당 한 번만)"""
+    def factory():
+        import google.generativeai as genai
+        endpoint = os.getenv('GEMINI_API_ENDPOINT')
+        if endpoint:
+            genai.configure(api_key=api_key, transport='rest', client_options={'api_endpoint': endpoint})
+        else:
+            genai.configure(api_key=api_key)
+        model = genai.GenerativeModel(model_name)
+        print(f"✅ Gemini {model_name} 초기화 완료")
+        return model
+
+    return _get_or_create(('gemini', api_key, model_name), factory)
+
+
+def get_anthropic_client(api_key: str):
+    """Anthropic 클라이언트 (내부 httpx 연결 풀 재사용)"""
+    def factory():
+        import anthropic
+        client = anthropic.Anthropic(api_key=api_key)
+        print("✅ Claude 클라이언트 초기화 완료")
+        return client
+
+    return _get_or_create(('anthropic', api_key), factory)
+
+
+def get_notion_client(api_key: str):
+    """Notion 클라이언트 (내부 httpx 연결 풀 재사용)"""
+    def factory():
+        from notion_client import Client
+        base_url = os.getenv('NOTION_BASE_URL')
+        client = Client(auth=api_key, base_url=base_url) if base_url else Client(auth=api_key)
+        print("✅ Notion 클라이언트 초기화 완료")
+        return client
+
+    return _get_or_create(('notion', api_key), factory)
@@ -0,0 +1,176 @@
+"""
+LLM 헤징(hedged request) 모듈
+1순위 모델이 평소 지연시간(백분위)보다 늦어지면 2순위 모델을 동시에 시작하고,
+먼저 유효한 결과를 낸 쪽을 사용 (늦은 쪽 결과는 버림)
+"""
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class LatencyTracker:
+    """
+    모델별 최근 지연시간 (warm 인스턴스 동안 유지)
+    끝난 호출뿐 아니라 버려지거나 시간 초과된 1순위 호출의 경과 시간도 하한값으로 기록
+    (끝난 호출만 세면 느린 호출이 빠져 백분위가 낮게 잡히고 헤지가 너무 자주 시작됨)
+    """
+
+    def __init__(self, window: int = 100):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, latency: float):
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(latency)
+
+    def percentile(self, key: str, pct: float, min_samples: int = 5) -> float:
+        """Returns: pct 백분위 지연시간 (표본이 부족하면 None)"""
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < min_samples:
+            return None
+        index = min(int(round(pct / 100 * (len(samples) - 1))), len(samples) - 1)
+        return samples[index]
+
+
+latency_tracker = LatencyTracker()
+
+
+class HedgePolicy:
+    def __init__(self):
+        self.enabled = os.getenv('LLM_HEDGE', '1') == '1'
+        self.percentile = float(os.getenv('LLM_HEDGE_PERCENTILE', '90'))
+        self.default_delay = float(os.getenv('LLM_HEDGE_DEFAULT_DELAY', '25'))
+        self.min_delay = float(os.getenv('LLM_HEDGE_MIN_DELAY', '5'))
+        self.timeouts = {
+            'gemini': float(os.getenv('GEMINI_TIMEOUT', '90')),
+            'claude': float(os.getenv('CLAUDE_TIMEOUT', '90'))
+        }
+
+    def timeout_for(self, provider: str) -> float:
+        """모델 이름 앞부분(gemini / claude)으로 제한 시간 선택"""
+        for prefix, timeout in self.timeouts.items():
+            if provider.startswith(prefix):
+                return timeout
+        return max(self.timeouts.values())
+
+    def hedge_delay(self, latency_key: str) -> float:
+        """1순위 모델의 pct 백분위 지연시간 (기록이 없으면 기본값)"""
+        observed = latency_tracker.percentile(latency_key, self.percentile)
+        if observed is None:
+            return self.default_delay
+        return max(observed, self.min_delay)
+
+
+def hedged_call(primary, secondary, is_valid, policy: HedgePolicy = None, latency_key: str = None,
+                timeout_factor: float = 1.0) -> dict:
+    """
+    primary / secondary: (이름, 인자 없는 호출 함수)
+    is_valid(result): 결과가 사용 가능한지
+
+    Returns: {
+        'result', 'provider', 'reason',
+        'attempts': [{'provider', 'status', 'latency'}]
+    }
+    status: ok | error | timeout | abandoned (먼저 끝난 쪽이 있어 버려진 요청)
+    reason: primary | primary-failed | primary-timeout | hedge-primary | hedge-secondary
+    모두 실패하면 attempts를 담은 HedgeError
+    """
+    policy = policy or HedgePolicy()
+    primary_name, primary_fn = primary
+    secondary_name, secondary_fn = secondary
+    latency_key = latency_key or primary_name
+
+    executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='hedge')
+    attempts = []
+    started = {}
+    deadlines = {}
+    running = {}
+
+    def start(name, fn, timeout):
+        started[name] = time.monotonic()
+        deadlines[name] = started[name] + timeout * timeout_factor
+        running[executor.submit(fn)] = name
+
+    def finish(name, status):
+        latency = round(time.monotonic() - started[name], 3)
+        attempts.append({'provider': name, 'status': status, 'latency': latency})
+        return latency
+
+    try:
+        start(primary_name, primary_fn, policy.timeout_for(primary_name))
+        hedged = False
+        reason = None
+
+        # 1순위가 hedge_delay 안에 끝나면 2순위는 시작하지 않음
+        delay = policy.hedge_delay(latency_key) if policy.enabled else policy.timeout_for(primary_name)
+        done, _ = wait(list(running), timeout=delay * timeout_factor)
+
+        while True:
+            for future in done:
+                name = running.pop(future)
+                try:
+                    result = future.result()
+                    valid = is_valid(result)
+                except Exception as e:
+                    print(f"⚠️ {name} 요약 오류: {e}")
+                    valid = False
+
+                if valid:
+                    latency = finish(name, 'ok')
+                    if name == primary_name:
+                        latency_tracker.record(latency_key, latency)
+                    if reason is None:
+                        reason = 'primary' if name == primary_name else 'primary-failed'
+                    elif hedged:
+                        reason = 'hedge-primary' if name == primary_name else 'hedge-secondary'
+                    for other in running.values():
+                        elapsed = finish(other, 'abandoned')
+                        if other == primary_name:
+                            latency_tracker.record(latency_key, elapsed)
+                    return {'result': result, 'provider': name, 'reason': reason, 'attempts': attempts}
+
+                finish(name, 'error')
+                if name == primary_name and secondary_name not in started:
+                    print(f"⚠️ {primary_name} 실패, {secondary_name}로 전환")
+                    reason = 'primary-failed'
+                    start(secondary_name, secondary_fn, policy.timeout_for(secondary_name))
+
+            # 시간 초과된 시도는 결과를 기다리지 않고 버림
+            now = time.monotonic()
+            for future, name in list(running.items()):
+                if now >= deadlines[name]:
+                    running.pop(future)
+                    elapsed = finish(name, 'timeout')
+                    print(f"⚠️ {name} 응답 시간 초과")
+                    if name == primary_name:
+                        latency_tracker.record(latency_key, elapsed)
+                    if name == primary_name and secondary_name not in started:
+                        reason = 'primary-timeout'
+                        start(secondary_name, secondary_fn, policy.timeout_for(secondary_name))
+
+            # 1순위가 hedge_delay를 넘기면 2순위를 동시에 시작
+            if policy.enabled and primary_name in running.values() and secondary_name not in started:
+                print(f"⏱️ {primary_name} 응답 지연 ({delay:.1f}s 초과), {secondary_name} 동시 시작")
+                hedged = True
+                reason = 'hedged'
+                start(secondary_name, secondary_fn, policy.timeout_for(secondary_name))
+
+            if not running:
+                raise HedgeError("AI 요약에 실패했습니다.", attempts)
+
+            timeout = max(min(deadlines[name] for name in running.values()) - time.monotonic(), 0)
+            done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+    finally:
+        # 늦은 쪽은 취소할 수 없으므로 기다리지 않고 결과를 버림
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class HedgeError(Exception):
+    def __init__(self, message: str, attempts: list):
+        super().__init__(message)
+        self.attempts = attempts
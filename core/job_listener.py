@@ -0,0 +1,130 @@
+"""
+새 작업 알림 수신 모듈 (Postgres LISTEN / NOTIFY)
+supabase_schema.sql의 jobs_notify_pending 트리거가 작업이 pending이 될 때 'jobs_pending' 채널로 알림
+
+- 전용 연결 하나로 LISTEN 하고 select()로 알림 / timeout / interrupt()를 기다림
+- 연결이 끊기면 다음 wait()에서 다시 연결 (그동안은 timeout마다 깨어나는 폴링으로 동작)
+- LISTEN은 세션 단위이므로 트랜잭션 풀러(Supabase의 6543 포트)가 아니라
+  Direct connection / Session pooler 주소(DATABASE_URL) 사용
+"""
+import os
+import time
+import select
+
+CHANNEL = 'jobs_pending'
+
+
+class JobListener:
+    def __init__(self, dsn: str, channel: str = CHANNEL):
+        self.dsn = dsn
+        self.channel = channel
+        self.reconnect_seconds = float(os.getenv('WORKER_RECONNECT_SECONDS', '5'))
+        self._conn = None
+        self._next_connect = 0.0
+        # 연결이 끊긴 동안 온 알림은 받을 수 없으므로 다시 연결하면 한 번 알림을 받은 것처럼 처리
+        self._missed = False
+        # 시그널 핸들러에서도 안전하게 wait()를 깨우기 위한 self-pipe
+        self._wake_read, self._wake_write = os.pipe()
+        os.set_blocking(self._wake_read, False)
+        os.set_blocking(self._wake_write, False)
+
+    def connect(self) -> bool:
+        """LISTEN 연결 (실패하면 False, reconnect_seconds 뒤에 다시 시도)"""
+        if self._conn is not None:
+            return True
+        if time.monotonic() < self._next_connect:
+            return False
+
+        import psycopg2
+        try:
+            conn = psycopg2.connect(
+                self.dsn,
+                application_name='youtube-summarizer-listener',
+                # 조용히 끊긴 연결을 감지하도록 TCP keepalive
+                keepalives=1, keepalives_idle=30, keepalives_interval=10, keepalives_count=3
+            )
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {self.channel}")
+        except psycopg2.Error as e:
+            print(f"⚠️ 작업 알림 연결 실패 ({self.reconnect_seconds:.0f}초 후 재시도, 그동안 폴링): {e}")
+            self._next_connect = time.monotonic() + self.reconnect_seconds
+            self._missed = True
+            return False
+
+        self._conn = conn
+        print(f"👂 작업 알림 대기 (LISTEN {self.channel})")
+        return True
+
+    def wait(self, timeout: float) -> bool:
+        """
+        알림 / timeout / interrupt() 중 먼저 오는 것까지 대기
+        Returns: 알림을 받았으면(또는 끊겼던 연결을 다시 연결했으면) True (받은 알림은 모두 비움)
+        """
+        import psycopg2
+
+        deadline = time.monotonic() + timeout
+        if not self.connect():
+            self._select([self._wake_read], timeout)
+            return False
+
+        if self._missed:
+            self._missed = False
+            return True
+
+        try:
+            # 이전 처리 중에 쌓인 알림
+            self._conn.poll()
+            if self._take_notifies():
+                return True
+
+            readable = self._select([self._conn, self._wake_read], max(deadline - time.monotonic(), 0))
+            if self._conn in readable:
+                self._conn.poll()
+                return self._take_notifies()
+            return False
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            print(f"⚠️ 작업 알림 연결이 끊어졌습니다 (다시 연결, 그동안 폴링): {e}")
+            self.close()
+            self._missed = True
+            return False
+
+    def interrupt(self):
+        """wait()를 바로 깨움 (시그널 핸들러에서 호출 가능)"""
+        try:
+            os.write(self._wake_write, b'x')
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def _take_notifies(self) -> bool:
+        received = bool(self._conn.notifies)
+        self._conn.notifies.clear()
+        return received
+
+    def _select(self, fds: list, timeout: float) -> list:
+        readable, _, _ = select.select(fds, [], [], timeout)
+        if self._wake_read in readable:
+            try:
+                while os.read(self._wake_read, 64):
+                    pass
+            except BlockingIOError:
+                pass
+        return readable
+
+
+if __name__ == '__main__':
+    # 테스트: 다른 터미널에서 INSERT INTO jobs ... 또는 NOTIFY jobs_pending
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    listener = JobListener(os.getenv('DATABASE_URL'))
+    while True:
+        print('notified' if listener.wait(10) else 'timeout')
@@ -0,0 +1,213 @@
+"""
+작업별 프로파일러 (CPU / 메모리)
+
+켜는 방법:
+- JOB_PROFILE=1: 모든 작업
+- 요청 헤더 X-Job-Profile: <JOB_PROFILE_TOKEN>: 해당 호출의 작업만 (토큰이 설정된 경우에만 허용)
+
+파이프라인 단계마다 cProfile(단계 스레드) + tracemalloc 스냅샷 차이를 기록하고
+작업별 디렉터리(JOB_PROFILE_DIR)에 단계별 .prof 파일과 report.json(함수 / 할당 위치 상위 N개)을 저장
+JOB_PROFILE_BUCKET이 있으면 Supabase Storage 버킷에도 업로드
+
+꺼져 있으면 Pipeline은 profiler=None 확인만 하므로 추가 비용 없음
+참고:
+- 단계 안에서 만든 스레드(map-reduce 조각, hedging)의 CPU 시간은 cProfile에 잡히지 않음
+- tracemalloc은 프로세스 전체를 추적하므로 동시에 실행되는 작업의 할당이 섞임
+  (정확한 단계별 할당은 MAX_CONCURRENT_JOBS=1로 측정)
+"""
+import os
+import io
+import json
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from datetime import datetime, timezone
+from contextlib import contextmanager
+
+ENABLED = os.getenv('JOB_PROFILE') == '1'
+HEADER = 'X-Job-Profile'
+
+_sessions = 0
+_sessions_lock = threading.Lock()
+
+# tracemalloc 자체와 import 과정의 할당은 제외
+ALLOCATION_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def requested(request=None) -> bool:
+    """이번 호출에서 프로파일링할지 (환경변수 또는 토큰이 맞는 요청 헤더)"""
+    if ENABLED:
+        return True
+    token = os.getenv('JOB_PROFILE_TOKEN')
+    headers = getattr(request, 'headers', None)
+    return bool(token and headers and headers.get(HEADER) == token)
+
+
+@contextmanager
+def session(enabled: bool):
+    """
+    프로파일링하는 배치 동안 tracemalloc 추적
+    (동시에 여러 배치가 실행되어도 마지막 배치가 끝날 때 한 번만 중지)
+    """
+    global _sessions
+    if not enabled:
+        yield
+        return
+
+    with _sessions_lock:
+        _sessions += 1
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(int(os.getenv('JOB_PROFILE_FRAMES', '10')))
+    try:
+        yield
+    finally:
+        with _sessions_lock:
+            _sessions -= 1
+            if _sessions == 0:
+                tracemalloc.stop()
+
+
+class JobProfiler:
+    def __init__(self, job_id: str, output_dir: str = None, top_n: int = None):
+        self.job_id = job_id
+        self.output_dir = output_dir or os.getenv('JOB_PROFILE_DIR', '/tmp/job_profiles')
+        self.top_n = top_n or int(os.getenv('JOB_PROFILE_TOP', '20'))
+        self.started_at = datetime.now(timezone.utc)
+        self.stages = {}
+        self._profiles = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        """단계 하나의 CPU 프로파일 / 할당 변화 기록 (Pipeline이 단계 스레드에서 호출)"""
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+에서는 프로파일러를 동시에 하나만 켤 수 있음 (다른 작업의 단계가 실행 중)
+            profile = None
+
+        before = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        wall_started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            entry = {
+                'wall_seconds': round(time.perf_counter() - wall_started, 4),
+                'cpu_seconds': round(time.thread_time() - cpu_started, 4),
+            }
+            if before is not None and tracemalloc.is_tracing():
+                entry.update(self._allocations(before, tracemalloc.take_snapshot()))
+            if profile is not None:
+                entry['top_functions'] = self._top_functions(profile)
+
+            with self._lock:
+                self.stages[name] = entry
+                if profile is not None:
+                    self._profiles[name] = profile
+
+    def report(self) -> dict:
+        report = {
+            'job_id': self.job_id,
+            'started_at': self.started_at.isoformat(),
+            'stages': self.stages,
+        }
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            report['traced_memory'] = {'current_bytes': current, 'peak_bytes': peak}
+        return report
+
+    def write(self, storage_client=None) -> str:
+        """
+        report.json + 단계별 .prof 파일 저장 (pstats / snakeviz로 열람)
+        Returns: 저장한 디렉터리
+        """
+        prefix = f"{self.started_at.strftime('%Y%m%dT%H%M%S')}-{self.job_id}"
+        directory = os.path.join(self.output_dir, prefix)
+        os.makedirs(directory, exist_ok=True)
+
+        files = {'report.json': json.dumps(self.report(), ensure_ascii=False, indent=1).encode('utf-8')}
+        with self._lock:
+            profiles = dict(self._profiles)
+        for name, profile in profiles.items():
+            path = os.path.join(directory, f"{name}.prof")
+            profile.dump_stats(path)
+            with open(path, 'rb') as f:
+                files[f"{name}.prof"] = f.read()
+
+        with open(os.path.join(directory, 'report.json'), 'wb') as f:
+            f.write(files['report.json'])
+
+        bucket = os.getenv('JOB_PROFILE_BUCKET')
+        if bucket and storage_client is not None:
+            try:
+                for filename, data in files.items():
+                    storage_client.storage.from_(bucket).upload(f"{prefix}/{filename}", data)
+            except Exception as e:
+                print(f"⚠️ 프로파일 업로드 실패: {e}")
+
+        self._print_summary(directory)
+        return directory
+
+    def _allocations(self, before, after) -> dict:
+        before = before.filter_traces(ALLOCATION_FILTERS)
+        after = after.filter_traces(ALLOCATION_FILTERS)
+        diff = after.compare_to(before, 'lineno')
+        growth = [stat for stat in diff if stat.size_diff > 0]
+        return {
+            'allocated_bytes': sum(stat.size_diff for stat in growth),
+            'net_bytes': sum(stat.size_diff for stat in diff),
+            'top_allocations': [
+                {
+                    'where': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    'size_diff': stat.size_diff,
+                    'count_diff': stat.count_diff
+                }
+                for stat in growth[:self.top_n]
+            ]
+        }
+
+    def _top_functions(self, profile: cProfile.Profile) -> list:
+        stats = pstats.Stats(profile, stream=io.StringIO())
+        rows = sorted(stats.stats.items(), key=lambda item: -item[1][3])
+        return [
+            {
+                'function': f"{filename}:{lineno}({func})",
+                'calls': calls,
+                'total_seconds': round(total, 4),
+                'cumulative_seconds': round(cumulative, 4)
+            }
+            for (filename, lineno, func), (_, calls, total, cumulative, _) in rows[:self.top_n]
+        ]
+
+    def _print_summary(self, directory: str):
+        print(f"🔬 [{self.job_id}] 프로파일 저장: {directory}")
+        for name, entry in self.stages.items():
+            top = (entry.get('top_allocations') or [{}])[0]
+            print(
+                f"  {name:<12} wall {entry['wall_seconds']:7.3f}s  cpu {entry['cpu_seconds']:7.3f}s  "
+                f"alloc {entry.get('allocated_bytes', 0) / 1024:9.1f} KB  {top.get('where', '')}"
+            )
+
+
+if __name__ == '__main__':
+    # 테스트
+    from core.markdown_blocks import markdown_to_blocks
+
+    with session(True):
+        profiler = JobProfiler('profile-test', output_dir='/tmp/job_profiles')
+        with profiler.stage('build'):
+            text = '\n'.join(f"- 항목 {i} **굵게** `코드`" for i in range(3000))
+        with profiler.stage('blocks'):
+            blocks = markdown_to_blocks(text)
+        profiler.write()
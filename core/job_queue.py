@@ -0,0 +1,360 @@
+"""
+작업 큐 모듈
+Supabase RPC로 작업을 원자적으로 가져오고 임대(lease)를 관리
+(supabase_schema.sql의 claim_jobs / extend_job_leases / release_jobs / reap_expired_jobs / finish_jobs 사용)
+TelegramOutbox도 같은 연결로 notification_outbox를 읽고 씀 (claim_notifications / update_notifications)
+
+claim_jobs는 채팅(telegram_chat_id)별로 공정하게 분배 - 한 채팅이 작업을 몰아 보내도 다른 채팅이 밀리지 않음
+- JOB_CHAT_INFLIGHT_LIMIT: 채팅별 동시 처리 상한 (0이면 제한 없음)
+- JOB_CHANNEL_WEIGHTS: 채널별 가중치 (예: "agent-reference=2,archive=1", 클수록 자주 차례가 옴)
+"""
+import os
+import socket
+import threading
+import uuid
+
+
+def parse_channel_weights(value: str) -> dict:
+    """"agent-reference=2,archive=1" → {'agent-reference': 2.0, 'archive': 1.0} (잘못된 항목은 무시)"""
+    weights = {}
+    for item in (value or '').split(','):
+        channel, _, weight = item.partition('=')
+        try:
+            if channel.strip() and float(weight) > 0:
+                weights[channel.strip()] = float(weight)
+        except ValueError:
+            print(f"⚠️ JOB_CHANNEL_WEIGHTS 항목 무시: {item.strip()}")
+    return weights
+
+
+class JobQueue:
+    def __init__(self, client, worker_id: str = None, lease_seconds: int = None):
+        self.client = client
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds or int(os.getenv('JOB_LEASE_SECONDS', '120'))
+        self.max_attempts = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+        self.chat_limit = int(os.getenv('JOB_CHAT_INFLIGHT_LIMIT', '0'))
+        self.channel_weights = parse_channel_weights(os.getenv('JOB_CHANNEL_WEIGHTS', ''))
+        self._pending = []  # finish_later로 예약한 (job_id, fields, notification)
+        self._pending_lock = threading.Lock()
+
+    def _rpc(self, name: str, params: dict):
+        """Supabase(PostgREST)로 supabase_schema.sql의 함수 호출. Returns: 행 목록 또는 스칼라 값"""
+        return self.client.rpc(name, params).execute().data
+
+    def close(self):
+        """연결 정리 (Supabase 클라이언트는 공유하므로 닫지 않음)"""
+
+    def claim(self, limit: int) -> list:
+        """
+        pending 작업을 최대 limit개 가져오면서 processing으로 전환
+        FOR UPDATE SKIP LOCKED로 다른 Worker와 겹치지 않음
+        채팅별 공정 분배 순서(라운드 로빈 / 채널 가중치)대로 반환 - 이 순서대로 처리
+        """
+        return self._rpc('claim_jobs', {
+            'p_worker_id': self.worker_id,
+            'p_limit': limit,
+            'p_lease_seconds': self.lease_seconds,
+            'p_chat_limit': self.chat_limit,
+            'p_channel_weights': self.channel_weights
+        }) or []
+
+    def extend(self, job_ids: list) -> int:
+        """처리 중인 작업의 임대 연장 (heartbeat)"""
+        if not job_ids:
+            return 0
+
+        return self._rpc('extend_job_leases', {
+            'p_worker_id': self.worker_id,
+            'p_job_ids': list(job_ids),
+            'p_lease_seconds': self.lease_seconds
+        }) or 0
+
+    def release(self, job_ids: list) -> int:
+        """
+        가져왔지만 시작하지 않은 작업을 pending으로 되돌림 (attempts도 되돌림)
+        Returns: 되돌린 작업 수
+        """
+        if not job_ids:
+            return 0
+
+        return self._rpc('release_jobs', {
+            'p_worker_id': self.worker_id,
+            'p_job_ids': list(job_ids)
+        }) or 0
+
+    def reap(self, notification: dict = None) -> int:
+        """
+        임대가 만료된 processing 작업을 다시 pending으로 되돌림
+        (Worker가 비정상 종료된 경우). max_attempts 초과 시 failed 처리
+        notification이 있으면 failed 처리한 작업마다 같은 트랜잭션으로 notification_outbox에 알림 추가
+        """
+        return self._rpc('reap_expired_jobs', {
+            'p_max_attempts': self.max_attempts,
+            'p_notification': notification
+        }) or 0
+
+    def claim_notifications(self, limit: int, lock_seconds: int) -> list:
+        """전송할 차례가 된 알림을 잠그면서 가져오기 (claim_notifications RPC)"""
+        return self._rpc('claim_notifications', {
+            'p_worker_id': self.worker_id,
+            'p_limit': limit,
+            'p_lock_seconds': lock_seconds
+        }) or []
+
+    def update_notifications(self, ids: list, fields: dict):
+        """이 Worker가 잠근 알림의 전송 결과 기록 (잠금이 만료되어 다른 Worker가 가져간 행은 건드리지 않음)"""
+        self.client.table('notification_outbox').update(fields) \
+            .in_('id', list(ids)) \
+            .eq('locked_by', self.worker_id) \
+            .execute()
+
+    def finish(self, job_id: str, fields: dict, notification: dict = None) -> bool:
+        """
+        작업 최종 상태 기록 (completed / failed)
+        notification이 있으면 같은 트랜잭션으로 notification_outbox에 알림 추가
+        임대를 가진 Worker만 기록 가능 - 임대를 잃었으면 False (알림도 추가되지 않음)
+        """
+        return job_id in self.finish_many([(job_id, fields, notification)])
+
+    def finish_many(self, items: list) -> set:
+        """
+        여러 작업의 최종 상태를 finish_jobs RPC 한 번으로 기록
+        items: [(job_id, fields, notification)]
+        Returns: 기록된 job_id 집합
+        """
+        if not items:
+            return set()
+
+        rows = self._rpc('finish_jobs', {
+            'p_worker_id': self.worker_id,
+            'p_items': [
+                {
+                    'job_id': job_id,
+                    'status': fields['status'],
+                    'result': fields.get('result'),
+                    'error_message': fields.get('error_message'),
+                    'notification': notification
+                }
+                for job_id, fields, notification in items
+            ]
+        })
+
+        finished = {str(row['job_id']) for row in rows or []}
+        for job_id, _, _ in items:
+            if job_id not in finished:
+                print(f"⚠️ [{job_id}] 임대가 만료되어 상태를 기록하지 못했습니다.")
+        return finished
+
+    def finish_later(self, job_id: str, fields: dict, notification: dict = None):
+        """
+        최종 상태 기록 예약 - flush()에서 다른 작업과 함께 기록 (FinishBatcher가 주기적으로 호출)
+        기록 전까지는 processing 상태로 남아 LeaseHeartbeat가 임대를 계속 연장
+        """
+        with self._pending_lock:
+            self._pending.append((job_id, fields, notification))
+
+    def pending_count(self) -> int:
+        with self._pending_lock:
+            return len(self._pending)
+
+    def flush(self) -> set:
+        """
+        예약된 최종 상태를 한 번에 기록
+        실패하면 다음 flush에서 다시 시도하도록 되돌려 둠
+        Returns: 기록된 job_id 집합
+        """
+        with self._pending_lock:
+            items, self._pending = self._pending, []
+
+        try:
+            return self.finish_many(items)
+        except Exception:
+            with self._pending_lock:
+                self._pending[:0] = items
+            raise
+
+
+class PostgresJobQueue(JobQueue):
+    """
+    같은 SQL 함수를 PostgREST 대신 Postgres 연결(psycopg2)로 호출하는 작업 큐
+    dsn: DATABASE_URL (Supabase는 Direct connection 또는 Session pooler 주소)
+    연결 하나를 스레드끼리 공유 (psycopg2 연결은 스레드 안전, 요청은 순서대로 실행)
+    """
+
+    # 함수별 호출문 (UUID[] / JSONB 인자는 명시적으로 변환)
+    SQL = {
+        'claim_jobs': ("SELECT * FROM claim_jobs(%(p_worker_id)s, %(p_limit)s, %(p_lease_seconds)s, "
+                       "%(p_chat_limit)s, %(p_channel_weights)s::JSONB)"),
+        'extend_job_leases': "SELECT extend_job_leases(%(p_worker_id)s, %(p_job_ids)s::UUID[], %(p_lease_seconds)s)",
+        'release_jobs': "SELECT release_jobs(%(p_worker_id)s, %(p_job_ids)s::UUID[])",
+        'reap_expired_jobs': "SELECT reap_expired_jobs(%(p_max_attempts)s, %(p_notification)s::JSONB)",
+        'finish_jobs': "SELECT * FROM finish_jobs(%(p_worker_id)s, %(p_items)s::JSONB)",
+        'claim_notifications': "SELECT * FROM claim_notifications(%(p_worker_id)s, %(p_limit)s, %(p_lock_seconds)s)",
+    }
+    SCALAR = {'extend_job_leases', 'release_jobs', 'reap_expired_jobs'}
+    # 연결이 끊겼을 때 다시 호출해도 되는 함수 (claim / finish는 이미 실행되었을 수 있으므로 호출한 쪽에 맡김)
+    # claim_notifications는 다시 호출하지 않아도 잠금이 만료되면 다음 전송에서 가져감
+    RETRYABLE = {'extend_job_leases', 'release_jobs', 'reap_expired_jobs'}
+
+    def __init__(self, dsn: str, worker_id: str = None, lease_seconds: int = None):
+        if not dsn:
+            raise ValueError("JOB_QUEUE_BACKEND=postgres에는 DATABASE_URL이 필요합니다.")
+        super().__init__(None, worker_id, lease_seconds)
+        self.dsn = dsn
+        self._conn = None
+        self._conn_lock = threading.Lock()
+
+    def _connect(self):
+        import psycopg2
+        conn = psycopg2.connect(self.dsn, application_name=f"youtube-summarizer-{self.worker_id}")
+        conn.autocommit = True
+        return conn
+
+    def _rpc(self, name: str, params: dict):
+        from psycopg2.extras import Json
+
+        params = {key: Json(value) if key in ('p_items', 'p_channel_weights', 'p_notification') else value
+                  for key, value in params.items()}
+        rows = self._execute(self.SQL[name], params, retry=name in self.RETRYABLE)
+
+        if name in self.SCALAR:
+            return next(iter(rows[0].values())) if rows else 0
+        return rows
+
+    def update_notifications(self, ids: list, fields: dict):
+        from psycopg2 import sql
+
+        # 같은 값을 다시 쓰는 UPDATE이므로 연결이 끊겼으면 다시 실행
+        query = sql.SQL("UPDATE notification_outbox SET {} WHERE id = ANY(%(ids)s) AND locked_by = %(worker_id)s").format(
+            sql.SQL(', ').join(
+                sql.SQL("{} = {}").format(sql.Identifier(column), sql.Placeholder(column)) for column in fields
+            )
+        )
+        self._execute(query, dict(fields, ids=list(ids), worker_id=self.worker_id), retry=True)
+
+    def _execute(self, query, params: dict, retry: bool = False) -> list:
+        """공유 연결로 실행. Returns: 결과 행 목록 (결과가 없는 문장이면 빈 목록)"""
+        from psycopg2.extras import RealDictCursor
+        import psycopg2
+
+        with self._conn_lock:
+            for attempt in range(2):
+                if self._conn is None or self._conn.closed:
+                    self._conn = self._connect()
+                try:
+                    with self._conn.cursor(cursor_factory=RealDictCursor) as cur:
+                        cur.execute(query, params)
+                        return [dict(row) for row in cur.fetchall()] if cur.description else []
+                except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                    # 끊긴 연결은 버리고 다음 호출에서 다시 연결
+                    self.close()
+                    if attempt or not retry:
+                        raise
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+
+class LeaseHeartbeat:
+    """
+    백그라운드 스레드에서 주기적으로 임대를 연장
+    with 블록 동안만 동작, 처리 중에 가져온 작업은 add, 상태를 기록했거나 되돌린 작업은 discard
+    """
+
+    def __init__(self, queue: JobQueue, job_ids: list = (), interval: float = None):
+        self.queue = queue
+        self.job_ids = set(job_ids)
+        self.interval = interval or max(queue.lease_seconds / 3, 1)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, job_ids):
+        with self._lock:
+            self.job_ids.update(job_ids)
+
+    def discard(self, job_ids):
+        with self._lock:
+            self.job_ids.difference_update(job_ids)
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, name='lease-heartbeat', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                job_ids = list(self.job_ids)
+            if not job_ids:
+                continue
+            try:
+                extended = self.queue.extend(job_ids)
+                print(f"💓 임대 연장: {extended}개")
+            except Exception as e:
+                print(f"⚠️ 임대 연장 실패: {e}")
+
+
+class FinishBatcher:
+    """
+    with 블록 동안 finish_later로 예약된 최종 상태를 모아서 기록
+    interval초마다 그 사이 끝난 작업을 한 번에 기록하고, 블록을 나갈 때 남은 예약을 기록
+    on_flush(기록된 job_id 집합): 기록 후 호출 (예: 알림 outbox 깨우기)
+    """
+
+    def __init__(self, queue: JobQueue, on_flush=None, interval: float = None):
+        self.queue = queue
+        self.on_flush = on_flush
+        self.interval = interval or float(os.getenv('JOB_FINISH_FLUSH_SECONDS', '1'))
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, name='finish-batcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        self._flush()
+        return False
+
+    def _run(self):
+        # 비슷한 시각에 끝난 작업을 한 번의 요청으로 묶음 (예약이 없으면 요청하지 않음)
+        while not self._stop.wait(self.interval):
+            if self.queue.pending_count():
+                self._flush()
+
+    def _flush(self):
+        try:
+            finished = self.queue.flush()
+        except Exception as e:
+            print(f"⚠️ 작업 상태 일괄 기록 실패 (다음에 다시 시도): {e}")
+            return
+        if finished:
+            print(f"🗂️ 작업 상태 {len(finished)}개 기록")
+            if self.on_flush:
+                self.on_flush(finished)
+
+
+if __name__ == '__main__':
+    # 테스트
+    from dotenv import load_dotenv
+    from supabase import create_client
+    load_dotenv()
+
+    queue = JobQueue(create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_KEY')))
+    print(f"Worker ID: {queue.worker_id}")
+    print(f"Reaped: {queue.reap()}")
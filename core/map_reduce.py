@@ -0,0 +1,126 @@
+"""
+긴 자막 map-reduce 요약 모듈
+자막을 문장/자막 줄 경계로 나누어 동시에 부분 요약(map)한 뒤,
+부분 요약을 모아 기존 채널 프롬프트로 최종 요약(reduce)
+- 자막 뒷부분을 잘라내지 않으면서 처리 시간은 단일 호출과 비슷하게 유지
+"""
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.ai_summarizer import CHUNK_SYSTEM_PROMPT, MAX_TRANSCRIPT_CHARS, SummaryResult, prompt_fingerprint
+
+# 문장 끝 (마침표/물음표/느낌표 + 공백)
+SENTENCE_END = re.compile(r'(?<=[.!?。？！])\s+')
+
+# reduce 입력이 여전히 길 때 다시 map을 수행하는 최대 횟수
+MAX_REDUCE_ROUNDS = 3
+
+
+def split_transcript(transcript: str, max_chars: int) -> list:
+    """
+    자막을 max_chars 이하의 조각으로 분할
+    자막 줄 → 문장 경계 순으로 자르고, 그래도 긴 문장만 강제로 자름
+    """
+    pieces = []
+    for line in transcript.split('\n'):
+        if len(line) <= max_chars:
+            pieces.append(line)
+            continue
+        for sentence in SENTENCE_END.split(line):
+            while len(sentence) > max_chars:
+                pieces.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            pieces.append(sentence)
+
+    chunks = []
+    current = []
+    current_len = 0
+    for piece in pieces:
+        # +1: 조각 사이 줄바꿈
+        if current and current_len + len(piece) + 1 > max_chars:
+            chunks.append('\n'.join(current))
+            current = []
+            current_len = 0
+        current.append(piece)
+        current_len += len(piece) + 1
+
+    if current and '\n'.join(current).strip():
+        chunks.append('\n'.join(current))
+
+    return chunks
+
+
+class MapReduceSummarizer:
+    """
+    GeminiSummarizer / ClaudeSummarizer를 감싸서 긴 자막만 map-reduce로 처리
+    짧은 자막은 기존과 동일하게 한 번에 요약
+    """
+
+    def __init__(self, summarizer, chunk_chars: int = None, max_concurrency: int = None):
+        self.summarizer = summarizer
+        self.model_name = summarizer.model_name
+        self.provider = summarizer.provider
+        self.chunk_chars = chunk_chars or int(os.getenv('MAP_REDUCE_CHUNK_CHARS', '12000'))
+        self.max_concurrency = max_concurrency or int(os.getenv('MAP_REDUCE_CONCURRENCY', '4'))
+
+    def prompt_version(self, prompt_key: str = 'archive') -> str:
+        """요약 캐시 키 - map 프롬프트나 조각 크기가 바뀌어도 무효화"""
+        return prompt_fingerprint(self.summarizer.prompt_version(prompt_key), CHUNK_SYSTEM_PROMPT, str(self.chunk_chars))
+
+    def summarize(self, video_info: dict, transcript: str, prompt_key: str = 'archive', **options) -> SummaryResult:
+        """Returns: 최종 요약 결과 (지연시간 / 토큰 수는 map 단계 포함)"""
+        started = time.monotonic()
+        map_results = []
+        try:
+            transcript = self.reduce_input(video_info, transcript, map_results)
+        except Exception as e:
+            print(f"❌ 부분 요약 오류 ({self.model_name}): {e}")
+            return SummaryResult.failure(self.provider, self.model_name, f"부분 요약 실패: {e}", time.monotonic() - started)
+
+        result = self.summarizer.summarize(video_info, transcript, prompt_key, **options)
+        for map_result in map_results:
+            result.add_usage(map_result)
+        result.latency = time.monotonic() - started
+        return result
+
+    def summarize_stream(self, video_info: dict, transcript: str, prompt_key: str = 'archive', **options):
+        """map 단계는 한 번에, 최종 요약(reduce)만 스트리밍"""
+        transcript = self.reduce_input(video_info, transcript)
+        yield from self.summarizer.summarize_stream(video_info, transcript, prompt_key, **options)
+
+    def reduce_input(self, video_info: dict, transcript: str, map_results: list = None) -> str:
+        """
+        최종 요약에 넣을 텍스트 준비
+        자막이 MAX_TRANSCRIPT_CHARS 이하이면 그대로, 길면 부분 요약을 합친 텍스트
+        map_results: 주어지면 부분 요약 결과(SummaryResult)를 추가 (토큰 사용량 합산용)
+        """
+        rounds = 0
+        while len(transcript) > MAX_TRANSCRIPT_CHARS and rounds < MAX_REDUCE_ROUNDS:
+            chunks = split_transcript(transcript, self.chunk_chars)
+            print(f"🧩 긴 자막 분할 요약: {len(transcript)} 글자 → {len(chunks)}개 조각 (동시 {self.max_concurrency}개)")
+            notes = self._map(video_info, chunks)
+            if map_results is not None:
+                map_results.extend(notes)
+            transcript = '\n\n'.join(
+                f"[{i}/{len(notes)} 부분]\n{note.text.strip()}" for i, note in enumerate(notes, 1)
+            )
+            rounds += 1
+
+        return transcript
+
+    def _map(self, video_info: dict, chunks: list) -> list:
+        """조각별 부분 요약 (순서 유지, 하나라도 실패하면 예외)"""
+        total = len(chunks)
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, total)) as executor:
+            futures = [
+                executor.submit(self.summarizer.summarize_chunk, video_info, chunk, index, total)
+                for index, chunk in enumerate(chunks, 1)
+            ]
+            results = [future.result() for future in futures]
+
+        for index, result in enumerate(results, 1):
+            if not result.success:
+                raise RuntimeError(f"{index}/{total} 부분: {result.error}")
+        return results
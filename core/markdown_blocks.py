@@ -0,0 +1,295 @@
+"""
+마크다운 → Notion 블록 변환 모듈
+줄 단위로 한 번만 훑으면서 블록을 만듦 (single pass)
+
+지원:
+- 제목 (#, ##, ### / 그 이상은 heading_3)
+- 문단 (연속된 줄은 한 블록으로 합침)
+- 글머리 / 번호 목록 (들여쓰기로 중첩, 최대 2단계)
+- 인용 (>), 코드 블록 (```), 구분선 (---)
+- 인라인 **굵게**, *기울임*, ~~취소선~~, `코드`, [링크](url)
+"""
+import re
+
+# Notion API 제한
+MAX_TEXT_CHARS = 2000  # rich_text 항목 하나의 content 최대 길이 (UTF-16 기준)
+MAX_RICH_TEXT_ITEMS = 100  # 블록 하나의 rich_text 배열 최대 길이
+MAX_CHILDREN = 100  # 요청 하나의 children 배열 최대 길이 (넘는 하위 항목은 notion_saver가 이어서 추가)
+MAX_NESTING = 2  # 한 요청에서 허용되는 중첩 단계
+
+# 한 줄 분류 (위에서부터 먼저 맞는 그룹)
+LINE = re.compile(
+    r'(?P<indent>[ \t]*)(?:'
+    r'(?P<fence>```|~~~)\s*(?P<lang>[\w+#.-]*)\s*$'
+    r'|(?P<heading>#{1,6})\s+(?P<heading_text>.*)'
+    r'|(?P<rule>(?:-\s*){3,}|(?:\*\s*){3,}|(?:_\s*){3,})$'
+    r'|[-*+]\s+(?P<bullet_text>.*)'
+    r'|\d{1,9}[.)]\s+(?P<number_text>.*)'
+    r'|>\s?(?P<quote_text>.*)'
+    r')'
+)
+
+# 인라인 서식 (앞에서부터 먼저 맞는 것)
+INLINE = re.compile(
+    r'`(?P<code>[^`]+)`'
+    r'|\*\*(?P<bold>.+?)\*\*'
+    r'|__(?P<bold2>.+?)__'
+    r'|~~(?P<strike>.+?)~~'
+    r'|\[(?P<link_text>[^\]]+)\]\((?P<url>https?://[^)\s]+)\)'
+    r'|(?<![\w*])\*(?![\s*])(?P<italic>.+?)(?<![\s*])\*(?![\w*])'
+    r'|(?<![\w_])_(?![\s_])(?P<italic2>.+?)(?<![\s_])_(?![\w_])'
+)
+
+INLINE_MARKERS = ('`', '*', '_', '~', '[')
+
+INLINE_ANNOTATIONS = {
+    'code': 'code',
+    'bold': 'bold',
+    'bold2': 'bold',
+    'strike': 'strikethrough',
+    'italic': 'italic',
+    'italic2': 'italic',
+}
+
+# Notion 코드 블록 언어 (자주 쓰는 것만, 나머지는 plain text)
+CODE_LANGUAGES = {
+    'bash', 'c', 'c#', 'c++', 'css', 'diff', 'docker', 'go', 'graphql', 'html', 'java', 'javascript',
+    'json', 'kotlin', 'markdown', 'mermaid', 'php', 'python', 'ruby', 'rust', 'scala', 'shell', 'sql',
+    'swift', 'typescript', 'xml', 'yaml'
+}
+CODE_LANGUAGE_ALIASES = {
+    'py': 'python', 'js': 'javascript', 'ts': 'typescript', 'sh': 'shell', 'zsh': 'shell',
+    'yml': 'yaml', 'cpp': 'c++', 'cs': 'c#', 'md': 'markdown', 'dockerfile': 'docker', 'golang': 'go'
+}
+
+
+def utf16_len(text: str) -> int:
+    """Notion은 글자 수를 UTF-16 단위로 셈 (이모지 등은 2)"""
+    return len(text.encode('utf-16-le')) // 2
+
+
+def split_text(text: str, limit: int = MAX_TEXT_CHARS) -> list:
+    """
+    text를 UTF-16 기준 limit 이하 조각으로 분할 (잘리는 글자 없음)
+    조각 뒷부분에 공백이 있으면 공백 뒤에서 자름
+    """
+    if len(text) <= limit and utf16_len(text) <= limit:
+        return [text]
+
+    pieces = []
+    start = 0
+    units = 0
+    space = -1
+
+    for i, char in enumerate(text):
+        width = 2 if ord(char) > 0xFFFF else 1
+        if units + width > limit:
+            cut = space + 1 if space - start > (i - start) // 2 else i
+            pieces.append(text[start:cut])
+            units = utf16_len(text[cut:i])
+            start = cut
+            space = -1
+        if char == ' ':
+            space = i
+        units += width
+
+    pieces.append(text[start:])
+    return pieces
+
+
+def rich_text(text: str, inline: bool = True) -> list:
+    """
+    텍스트 → rich_text 항목 목록
+    inline=True면 인라인 서식을 annotations로 변환, 2000자 넘는 항목은 나눔
+    """
+    items = []
+
+    def add(content, annotations=None, url=None):
+        if not content:
+            return
+        for piece in split_text(content):
+            item = {"text": {"content": piece}}
+            if url:
+                item["text"]["link"] = {"url": url}
+            if annotations:
+                item["annotations"] = annotations
+            items.append(item)
+
+    # 서식 기호가 없는 텍스트는 정규식 생략
+    if not inline or not any(marker in text for marker in INLINE_MARKERS):
+        add(text)
+        return items
+
+    pos = 0
+    for match in INLINE.finditer(text):
+        add(text[pos:match.start()])
+        kind = match.lastgroup
+        if kind == 'url':
+            add(match.group('link_text'), url=match.group('url'))
+        else:
+            add(match.group(kind), {INLINE_ANNOTATIONS[kind]: True})
+        pos = match.end()
+    add(text[pos:])
+
+    return items
+
+
+def text_blocks(block_type: str, text: str, inline: bool = True, **extra) -> list:
+    """
+    텍스트 블록 생성
+    rich_text 항목이 100개를 넘으면 같은 종류의 블록 여러 개로 이어서 작성
+    """
+    items = rich_text(text, inline) or [{"text": {"content": ""}}]
+    return [
+        {
+            "object": "block",
+            "type": block_type,
+            block_type: dict(extra, rich_text=items[i:i + MAX_RICH_TEXT_ITEMS])
+        }
+        for i in range(0, len(items), MAX_RICH_TEXT_ITEMS)
+    ]
+
+
+def code_language(lang: str) -> str:
+    lang = lang.lower()
+    lang = CODE_LANGUAGE_ALIASES.get(lang, lang)
+    return lang if lang in CODE_LANGUAGES else 'plain text'
+
+
+def indent_width(indent: str) -> int:
+    return len(indent.replace('\t', '    '))
+
+
+def markdown_to_blocks(markdown_text: str) -> list:
+    """
+    마크다운 텍스트를 Notion 블록으로 변환
+    Returns: 최상위 블록 목록 (목록 항목의 하위 항목은 children에 포함)
+    """
+    blocks = []
+    paragraph = []  # 합칠 문단 줄
+    quote = []  # 합칠 인용 줄
+    code = None  # 코드 블록 (fence, 언어, 줄 목록)
+    list_stack = []  # (들여쓰기, 블록, 깊이)
+
+    def flush_text():
+        if paragraph:
+            blocks.extend(text_blocks('paragraph', '\n'.join(paragraph)))
+            paragraph.clear()
+        if quote:
+            blocks.extend(text_blocks('quote', '\n'.join(quote)))
+            quote.clear()
+
+    def add_list_item(block_type: str, indent: int, text: str):
+        while list_stack and list_stack[-1][0] >= indent:
+            list_stack.pop()
+
+        item = text_blocks(block_type, text)
+        parent = list_stack[-1] if list_stack else None
+
+        if parent is None:
+            blocks.extend(item)
+            depth = 0
+        elif parent[2] < MAX_NESTING:
+            # 하위 항목이 MAX_CHILDREN개를 넘어도 같은 부모에 둠 (요청 단위 제한이므로 전송할 때 나눔)
+            parent[1][parent[1]['type']].setdefault('children', []).extend(item)
+            depth = parent[2] + 1
+        else:
+            # 중첩 한도를 넘으면 부모와 같은 단계에 추가
+            siblings = list_stack[-2][1][list_stack[-2][1]['type']]['children'] if len(list_stack) > 1 else blocks
+            siblings.extend(item)
+            list_stack.pop()
+            depth = parent[2]
+
+        list_stack.append((indent, item[-1], depth))
+
+    for line in markdown_text.split('\n'):
+        if code is not None:
+            if line.strip().startswith(code[0]) and not line.strip().strip(code[0][0]):
+                blocks.extend(text_blocks('code', '\n'.join(code[2]), inline=False, language=code[1]))
+                code = None
+            else:
+                code[2].append(line)
+            continue
+
+        if not line.strip():
+            # 빈 줄은 문단 / 인용을 끝냄 (목록은 빈 줄 뒤에도 이어질 수 있음)
+            flush_text()
+            continue
+
+        # 일반 문단 줄은 어느 패턴에도 맞지 않음 (match = None)
+        match = LINE.match(line)
+        kind = match.lastgroup if match else None
+
+        if kind in ('bullet_text', 'number_text'):
+            flush_text()
+            block_type = 'bulleted_list_item' if kind == 'bullet_text' else 'numbered_list_item'
+            add_list_item(block_type, indent_width(match.group('indent')), match.group(kind).strip())
+            continue
+
+        list_stack.clear()
+
+        if kind == 'quote_text':
+            if paragraph:
+                flush_text()
+            quote.append(match.group('quote_text').rstrip())
+        elif kind == 'lang':
+            flush_text()
+            code = (match.group('fence'), code_language(match.group('lang')), [])
+        elif kind == 'heading_text':
+            flush_text()
+            level = min(len(match.group('heading')), 3)
+            blocks.extend(text_blocks(f'heading_{level}', match.group('heading_text').strip().rstrip('#').strip()))
+        elif kind == 'rule':
+            flush_text()
+            blocks.append({"object": "block", "type": "divider", "divider": {}})
+        else:
+            if quote:
+                flush_text()
+            paragraph.append(line.strip())
+
+    # 닫히지 않은 코드 블록도 버리지 않음
+    if code is not None:
+        blocks.extend(text_blocks('code', '\n'.join(code[2]), inline=False, language=code[1]))
+    flush_text()
+
+    return blocks
+
+
+def count_blocks(blocks: list) -> int:
+    """하위 블록을 포함한 전체 블록 수"""
+    total = 0
+    for block in blocks:
+        total += 1 + count_blocks(block[block['type']].get('children', []))
+    return total
+
+
+if __name__ == '__main__':
+    # 테스트
+    import json
+
+    sample = """# 제목
+
+## 핵심 요약
+첫 줄과
+둘째 줄은 한 문단으로 **굵게** 와 `코드`, [링크](https://example.com)
+
+- 항목 1
+  - 하위 항목
+    - 더 하위 항목
+      - 너무 깊은 항목
+- 항목 2
+
+1. 첫째
+2. 둘째
+
+> 인용
+> 이어지는 인용
+
+```py
+print("hello")
+```
+---
+"""
+    result = markdown_to_blocks(sample)
+    print(json.dumps(result, ensure_ascii=False, indent=1)[:3000])
+    print(f"블록 수: {len(result)} (하위 포함 {count_blocks(result)})")
@@ -3,9 +3,80 @@ Notion 저장 모듈
 Notion API 사용
 """
 import os
-from notion_client import Client
+import json
 from datetime import datetime
 
+from core import clients
+from core.rate_limiter import rate_limiter
+from core.markdown_blocks import markdown_to_blocks, count_blocks
+
+# Notion API 요청 제한
+MAX_BLOCKS_PER_REQUEST = 100  # children 배열 최대 길이
+MAX_BLOCKS_PER_PAYLOAD = 1000  # 하위 블록을 포함한 요청당 최대 블록 수
+MAX_REQUEST_BYTES = 500 * 1000  # 요청 본문 최대 크기 (여유를 두고 500KB)
+
+
+def payload_bytes(payload) -> int:
+    return len(json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+
+
+def fits_request(block: dict) -> bool:
+    """하위 블록까지 한 요청에 보낼 수 있는지 (어느 단계든 children 100개 이하, 하위 포함 1000개, 크기 이하)"""
+    def children_fit(block):
+        children = block[block['type']].get('children', [])
+        return len(children) <= MAX_BLOCKS_PER_REQUEST and all(children_fit(child) for child in children)
+
+    return children_fit(block) and count_blocks([block]) <= MAX_BLOCKS_PER_PAYLOAD \
+        and payload_bytes(block) <= MAX_REQUEST_BYTES
+
+
+def split_children(block: dict) -> tuple:
+    """
+    한 요청에 보낼 수 없는 블록은 하위 블록을 떼어 냄
+    Returns: (이번 요청에 보낼 블록, 블록이 만들어진 뒤 그 블록 id에 이어서 추가할 하위 블록 목록 또는 None)
+    """
+    if fits_request(block):
+        return block, None
+    content = dict(block[block['type']])
+    children = content.pop('children')
+    return dict(block, **{block['type']: content}), children
+
+
+def batch_blocks(blocks: list, first_budget: int = MAX_REQUEST_BYTES) -> list:
+    """
+    블록 목록을 요청 단위로 분할
+    (요청당 최상위 100개, 하위 포함 1000개, MAX_REQUEST_BYTES 이하)
+    first_budget: 첫 요청에 남은 크기 (pages.create는 속성이 함께 전송됨)
+    한 요청에 넣을 수 없는 블록은 하위 블록을 뺀 크기로 셈 (하위 블록은 _append_batches가 이어서 추가)
+    """
+    batches = []
+    current = []
+    current_bytes = 0
+    current_count = 0
+    budget = first_budget
+
+    for block in blocks:
+        head, _ = split_children(block)
+        size = payload_bytes(head) + 1  # +1: 배열 구분자
+        count = count_blocks([head])
+        if current and (
+            len(current) >= MAX_BLOCKS_PER_REQUEST
+            or current_count + count > MAX_BLOCKS_PER_PAYLOAD
+            or current_bytes + size > budget
+        ):
+            batches.append(current)
+            current = []
+            current_bytes = 0
+            current_count = 0
+            budget = MAX_REQUEST_BYTES
+        current.append(block)
+        current_bytes += size
+        current_count += count
+
+    if current:
+        batches.append(current)
+    return batches
+
 
 class NotionSaver:
     def __init__(self):
@@ -14,8 +85,10 @@ class NotionSaver:
             print("⚠️ NOTION_API_KEY가 설정되지 않았습니다.")
             self.client = None
         else:
-            self.client = Client(auth=self.api_key)
-            print("✅ Notion 클라이언트 초기화 완료")
+            self.client = clients.get_notion_client(self.api_key)
+
+        # 마지막 저장/추가 작업의 요청 수 / 블록 수 / 전송 바이트
+        self.last_write_stats = {'requests': 0, 'blocks': 0, 'bytes': 0}
 
     def save_to_notion(
         self,
@@ -27,158 +100,183 @@ class NotionSaver:
     ) -> str:
         """
         Notion 데이터베이스에 페이지 생성
+        첫 100개 블록은 pages.create와 함께, 나머지는 blocks.children.append로 최대 크기씩 추가
         """
         if not self.client:
             print("❌ Notion 클라이언트가 초기화되지 않았습니다.")
             return None
 
+        page_id = None
         try:
-            # 페이지 속성 구성
-            properties = {
-                "Name": {
-                    "title": [
-                        {
-                            "text": {
-                                "content": video_info['title']
-                            }
-                        }
-                    ]
-                },
-                "URL": {
-                    "url": video_url
-                },
-                "Channel": {
-                    "rich_text": [
-                        {
-                            "text": {
-                                "content": video_info['channel']
-                            }
-                        }
-                    ]
-                },
-                "Duration": {
-                    "rich_text": [
-                        {
-                            "text": {
-                                "content": video_info.get('duration', 'N/A')
-                            }
-                        }
-                    ]
-                },
-                "Category": {
-                    "select": {
-                        "name": channel_name
-                    }
-                },
-                "Created": {
-                    "date": {
-                        "start": datetime.utcnow().isoformat()
-                    }
-                }
-            }
-
-            # 페이지 콘텐츠 구성 (요약 + YouTube 임베드)
-            children = [
-                # YouTube 임베드
-                {
-                    "object": "block",
-                    "type": "embed",
-                    "embed": {
-                        "url": video_url
-                    }
-                },
-                {
-                    "object": "block",
-                    "type": "divider",
-                    "divider": {}
-                }
-            ]
+            # 페이지 콘텐츠 구성 (YouTube 임베드 + 요약)
+            children = self._header_blocks(video_url)
 
             # 요약 내용을 블록으로 변환
             summary_blocks = self._markdown_to_blocks(summary)
             children.extend(summary_blocks)
 
+            parent = {"database_id": database_id}
+            properties = self._build_properties(video_info, video_url, channel_name)
+            # pages.create 응답에는 하위 블록 id가 없으므로 나누어 보내야 하는 블록부터는 append로 추가
+            inline = next((i for i, block in enumerate(children) if not fits_request(block)), len(children))
+            batches = batch_blocks(
+                children[:inline],
+                first_budget=MAX_REQUEST_BYTES - payload_bytes({'parent': parent, 'properties': properties})
+            ) + batch_blocks(children[inline:])
+            self.last_write_stats = {'requests': 0, 'blocks': 0, 'bytes': 0}
+
             # 페이지 생성
-            print(f"📄 Notion 페이지 생성 중...")
-            response = self.client.pages.create(
-                parent={"database_id": database_id},
-                properties=properties,
-                children=children
-            )
+            print(f"📄 Notion 페이지 생성 중... ({len(children)}개 블록, 요청 {len(batches)}회)")
+            payload = {'parent': parent, 'properties': properties, 'children': batches[0]}
+            response = rate_limiter.call('notion', self.client.pages.create, **payload)
+            self._count_request(payload, count_blocks(batches[0]))
+            page_id = response['id']
+
+            self._append_batches(page_id, batches[1:])
 
             page_url = response['url']
-            print(f"✅ Notion 저장 완료: {page_url}")
+            print(f"✅ Notion 저장 완료: {page_url} ({self.last_write_stats})")
             return page_url
 
         except Exception as e:
             print(f"❌ Notion 저장 오류: {e}")
             import traceback
             traceback.print_exc()
+
+            # 일부 블록만 들어간 페이지가 남지 않도록 보관 처리
+            if page_id:
+                self.archive_page(page_id)
             return None
 
-    def _markdown_to_blocks(self, markdown_text: str) -> list:
+    def create_page(
+        self,
+        video_info: dict,
+        video_url: str,
+        database_id: str,
+        channel_name: str = 'archive'
+    ) -> tuple:
         """
-        마크다운 텍스트를 Notion 블록으로 변환
-        간단한 변환만 지원 (제목, 본문, 리스트)
+        요약 없이 페이지만 먼저 생성 (스트리밍 모드)
+        Returns: (page_id, page_url) - 오류는 예외로 전달
         """
-        blocks = []
-        lines = markdown_text.split('\n')
-
-        for line in lines:
-            line = line.strip()
-
-            if not line:
-                continue
-
-            # 제목 처리
-            if line.startswith('# '):
-                blocks.append({
-                    "object": "block",
-                    "type": "heading_1",
-                    "heading_1": {
-                        "rich_text": [{"text": {"content": line[2:]}}]
-                    }
-                })
-            elif line.startswith('## '):
-                blocks.append({
-                    "object": "block",
-                    "type": "heading_2",
-                    "heading_2": {
-                        "rich_text": [{"text": {"content": line[3:]}}]
-                    }
-                })
-            elif line.startswith('### '):
-                blocks.append({
-                    "object": "block",
-                    "type": "heading_3",
-                    "heading_3": {
-                        "rich_text": [{"text": {"content": line[4:]}}]
+        if not self.client:
+            raise RuntimeError("Notion 클라이언트가 초기화되지 않았습니다.")
+
+        print(f"📄 Notion 페이지 생성 중 (스트리밍)...")
+        response = rate_limiter.call(
+            'notion',
+            self.client.pages.create,
+            parent={"database_id": database_id},
+            properties=self._build_properties(video_info, video_url, channel_name),
+            children=self._header_blocks(video_url)
+        )
+        return response['id'], response['url']
+
+    def append_markdown(self, page_id: str, markdown_text: str) -> int:
+        """
+        마크다운을 블록으로 변환하여 페이지 끝에 추가 (100개 / 요청 크기 단위로 나누어 전송)
+        Returns: 추가된 블록 수
+        """
+        blocks = self._markdown_to_blocks(markdown_text)
+        self.last_write_stats = {'requests': 0, 'blocks': 0, 'bytes': 0}
+        self._append_batches(page_id, batch_blocks(blocks))
+        return len(blocks)
+
+    def _append_batches(self, page_id: str, batches: list):
+        """
+        블록 묶음을 순서대로 추가 (순서 유지를 위해 동시에 보내지 않음)
+        한 요청에 넣을 수 없는 블록(하위 항목 100개 초과 등)은 먼저 만들고
+        떼어 낸 하위 블록을 그 블록 id에 이어서 추가 (목록 구조 유지)
+        """
+        for batch in batches:
+            split = [split_children(block) for block in batch]
+            payload = {'block_id': page_id, 'children': [head for head, _ in split]}
+            response = rate_limiter.call('notion', self.client.blocks.children.append, **payload)
+            self._count_request(payload, count_blocks(payload['children']))
+
+            # 응답의 results: 새로 만든 최상위 블록 (요청 순서대로)
+            for (_, children), created in zip(split, response.get('results', [])):
+                if children:
+                    self._append_batches(created['id'], batch_blocks(children))
+
+    def _count_request(self, payload: dict, block_count: int):
+        self.last_write_stats['requests'] += 1
+        self.last_write_stats['blocks'] += block_count
+        self.last_write_stats['bytes'] += payload_bytes(payload)
+
+    def archive_page(self, page_id: str):
+        """작성 도중 실패한 페이지 보관 처리 (휴지통)"""
+        try:
+            rate_limiter.call('notion', self.client.pages.update, page_id=page_id, archived=True)
+        except Exception as e:
+            print(f"⚠️ Notion 페이지 보관 처리 실패: {e}")
+
+    def _build_properties(self, video_info: dict, video_url: str, channel_name: str) -> dict:
+        """페이지 속성 구성"""
+        return {
+            "Name": {
+                "title": [
+                    {
+                        "text": {
+                            "content": video_info['title']
+                        }
                     }
-                })
-            # 리스트 처리
-            elif line.startswith('- ') or line.startswith('* '):
-                blocks.append({
-                    "object": "block",
-                    "type": "bulleted_list_item",
-                    "bulleted_list_item": {
-                        "rich_text": [{"text": {"content": line[2:]}}]
+                ]
+            },
+            "URL": {
+                "url": video_url
+            },
+            "Channel": {
+                "rich_text": [
+                    {
+                        "text": {
+                            "content": video_info['channel']
+                        }
                     }
-                })
-            # 일반 텍스트
-            else:
-                # Notion 블록 텍스트 길이 제한 (2000자)
-                if len(line) > 2000:
-                    line = line[:2000] + "..."
-
-                blocks.append({
-                    "object": "block",
-                    "type": "paragraph",
-                    "paragraph": {
-                        "rich_text": [{"text": {"content": line}}]
+                ]
+            },
+            "Duration": {
+                "rich_text": [
+                    {
+                        "text": {
+                            "content": video_info.get('duration', 'N/A')
+                        }
                     }
-                })
+                ]
+            },
+            "Category": {
+                "select": {
+                    "name": channel_name
+                }
+            },
+            "Created": {
+                "date": {
+                    "start": datetime.utcnow().isoformat()
+                }
+            }
+        }
 
-        return blocks
+    def _header_blocks(self, video_url: str) -> list:
+        """요약 앞에 들어가는 블록 (YouTube 임베드 + 구분선)"""
+        return [
+            # YouTube 임베드
+            {
+                "object": "block",
+                "type": "embed",
+                "embed": {
+                    "url": video_url
+                }
+            },
+            {
+                "object": "block",
+                "type": "divider",
+                "divider": {}
+            }
+        ]
+
+    def _markdown_to_blocks(self, markdown_text: str) -> list:
+        """마크다운 텍스트를 Notion 블록으로 변환 (core.markdown_blocks)"""
+        return markdown_to_blocks(markdown_text)
 
 
 if __name__ == '__main__':
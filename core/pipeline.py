@@ -0,0 +1,76 @@
+"""
+파이프라인 모듈
+작업 단계를 의존성 그래프로 표현하고, 서로 독립적인 단계는 동시에 실행
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class Pipeline:
+    def __init__(self, name: str = 'pipeline', max_workers: int = 4, state: dict = None, profiler=None):
+        self.name = name
+        self.max_workers = max_workers
+        self.stages = {}
+        self.timings = {}
+        # 단계 간 공유 상태 (실패한 뒤에도 호출한 쪽에서 읽을 수 있음)
+        self.state = state if state is not None else {}
+        # 단계별 CPU / 메모리 프로파일 (core.job_profiler.JobProfiler, None이면 끔)
+        self.profiler = profiler
+
+    def add(self, name: str, func, deps: tuple = ()):
+        """
+        단계 추가
+        func(results)는 선행 단계 결과 dict를 받아 이 단계의 결과를 반환
+        """
+        for dep in deps:
+            if dep not in self.stages:
+                raise ValueError(f"'{name}' 단계의 선행 단계 '{dep}'가 등록되지 않았습니다.")
+        self.stages[name] = (func, tuple(deps))
+        return self
+
+    def run(self) -> dict:
+        """
+        의존성이 충족된 단계부터 실행
+        한 단계라도 실패하면 남은 단계를 취소하고 그 예외를 그대로 전달
+        Returns: {단계 이름: 결과}
+        """
+        results = {}
+        remaining = dict(self.stages)
+        running = {}
+        error = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name) as executor:
+            while remaining or running:
+                if error is None:
+                    for name, (func, deps) in list(remaining.items()):
+                        if all(dep in results for dep in deps):
+                            del remaining[name]
+                            running[executor.submit(self._run_stage, name, func, results)] = name
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        if error is None:
+                            error = e
+                        remaining.clear()
+
+        if error is not None:
+            raise error
+
+        return results
+
+    def _run_stage(self, name: str, func, results: dict):
+        started = time.monotonic()
+        try:
+            if self.profiler is not None:
+                with self.profiler.stage(name):
+                    return func(results)
+            return func(results)
+        finally:
+            self.timings[name] = round(time.monotonic() - started, 3)
@@ -0,0 +1,253 @@
+"""
+요약 모델(provider) 상태 추적 & 서킷 브레이커
+- 모델별 최근 오류율 / 지연시간 기록
+- 연속 실패나 높은 오류율이면 서킷을 열어(open) 해당 모델 호출을 건너뜀
+- 일정 시간 후 시험 호출 1건(half-open)으로 복구 여부 확인
+
+저장소 (호출 간 상태 유지):
+- memory: 프로세스 메모리 (warm 인스턴스 동안 유지)
+- file: 로컬 JSON 파일 (장시간 실행 Worker)
+- supabase: Supabase 테이블 (모든 인스턴스 공유, supabase_schema.sql의 provider_health)
+"""
+import os
+import json
+import time
+import threading
+from datetime import datetime, timezone
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class MemoryHealthStore:
+    def load(self) -> dict:
+        return {}
+
+    def save(self, states: dict):
+        pass
+
+
+class FileHealthStore:
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def save(self, states: dict):
+        # 쓰는 도중 종료되어도 파일이 깨지지 않도록 임시 파일 후 교체
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(states, f)
+        os.replace(tmp_path, self.path)
+
+
+class SupabaseHealthStore:
+    def __init__(self, client, table: str = 'provider_health'):
+        self.client = client
+        self.table = table
+
+    def load(self) -> dict:
+        response = self.client.table(self.table).select('provider, state').execute()
+        return {row['provider']: row['state'] for row in response.data or []}
+
+    def save(self, states: dict):
+        now = datetime.now(timezone.utc).isoformat()
+        rows = [{'provider': provider, 'state': state, 'updated_at': now} for provider, state in states.items()]
+        if rows:
+            self.client.table(self.table).upsert(rows).execute()
+
+
+class ProviderHealth:
+    """
+    모델 이름별 서킷 상태
+      closed ──(연속 실패 / 오류율 초과)──> open ──(cooldown 경과)──> half_open
+      half_open ──(시험 호출 성공)──> closed, (실패)──> open (cooldown 2배)
+    """
+
+    def __init__(self, store=None):
+        self.store = store or MemoryHealthStore()
+        self.window = int(os.getenv('PROVIDER_HEALTH_WINDOW', '20'))
+        self.window_seconds = float(os.getenv('PROVIDER_HEALTH_WINDOW_SECONDS', '900'))
+        self.failure_threshold = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '3'))
+        self.error_rate_threshold = float(os.getenv('CIRCUIT_ERROR_RATE', '0.5'))
+        self.min_samples = int(os.getenv('CIRCUIT_MIN_SAMPLES', '10'))
+        self.open_seconds = float(os.getenv('CIRCUIT_OPEN_SECONDS', '60'))
+        self.max_open_seconds = float(os.getenv('CIRCUIT_MAX_OPEN_SECONDS', '900'))
+        self.probe_timeout = float(os.getenv('CIRCUIT_PROBE_TIMEOUT', '180'))
+        self._states = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        """저장소의 상태 반영 (다른 인스턴스가 연 서킷 포함, 배치 시작 시 호출)"""
+        try:
+            states = self.store.load()
+        except Exception as e:
+            print(f"⚠️ 모델 상태 불러오기 실패: {e}")
+            return
+        with self._lock:
+            self._states.update(states)
+            self._dirty = False
+
+    def save(self):
+        """변경된 상태가 있으면 저장"""
+        with self._lock:
+            if not self._dirty:
+                return
+            states = json.loads(json.dumps(self._states))
+            self._dirty = False
+        try:
+            self.store.save(states)
+        except Exception as e:
+            print(f"⚠️ 모델 상태 저장 실패: {e}")
+
+    def available(self, provider: str) -> bool:
+        """호출해도 되는 상태인지 (상태 변경 없음)"""
+        with self._lock:
+            state = self._state(provider)
+            if state['state'] == CLOSED:
+                return True
+            return self._probe_allowed(state, time.time())
+
+    def allow(self, provider: str) -> bool:
+        """
+        호출 허가 요청
+        open 상태에서 cooldown이 지났으면 half_open으로 바꾸고 시험 호출 1건만 허가
+        """
+        with self._lock:
+            state = self._state(provider)
+            if state['state'] == CLOSED:
+                return True
+
+            now = time.time()
+            if not self._probe_allowed(state, now):
+                return False
+
+            state['state'] = HALF_OPEN
+            state['probe_started_at'] = now
+            self._dirty = True
+
+        print(f"🩺 {provider} 시험 호출 (half-open)")
+        self.save()
+        return True
+
+    def record(self, provider: str, ok: bool, latency: float = None):
+        """호출 결과 기록 (상태가 바뀌면 바로 저장)"""
+        with self._lock:
+            now = time.time()
+            state = self._state(provider)
+            previous = state['state']
+
+            outcomes = [o for o in state['outcomes'] if now - o[0] <= self.window_seconds]
+            outcomes.append([now, ok, round(latency, 3) if latency is not None else None])
+            state['outcomes'] = outcomes[-self.window:]
+            state['failures'] = 0 if ok else state['failures'] + 1
+
+            if ok:
+                if previous != CLOSED:
+                    # 장애 기간의 실패 기록으로 바로 다시 열리지 않도록 초기화
+                    state['state'] = CLOSED
+                    state['open_count'] = 0
+                    state['outcomes'] = state['outcomes'][-1:]
+            elif previous == HALF_OPEN or self._should_open(state):
+                state['state'] = OPEN
+                state['opened_at'] = now
+                state['open_count'] = state.get('open_count', 0) + 1
+
+            state['probe_started_at'] = None
+            changed = state['state'] != previous
+            self._dirty = True
+
+        if changed:
+            icon = '✅' if state['state'] == CLOSED else '⚠️'
+            print(f"{icon} {provider} 서킷 {previous} → {state['state']}")
+            self.save()
+
+    def order(self, providers: list) -> list:
+        """
+        호출 가능한 모델을 우선순위대로 앞에, 서킷이 열린 모델은 뒤로
+        (모두 열려 있어도 작업 자체는 실패시키지 않도록 목록에서 빼지는 않음)
+        """
+        return sorted(providers, key=lambda provider: not self.available(provider))
+
+    def snapshot(self) -> dict:
+        """Returns: {provider: {'state', 'error_rate', 'p50_latency', 'samples'}}"""
+        with self._lock:
+            return {provider: self._summary(state) for provider, state in self._states.items()}
+
+    def _state(self, provider: str) -> dict:
+        if provider not in self._states:
+            self._states[provider] = {
+                'state': CLOSED,
+                'failures': 0,
+                'opened_at': None,
+                'open_count': 0,
+                'probe_started_at': None,
+                'outcomes': []
+            }
+        return self._states[provider]
+
+    def _probe_allowed(self, state: dict, now: float) -> bool:
+        if state['state'] == HALF_OPEN:
+            # 시험 호출 결과가 기록되지 않은 채 오래 지났으면 (인스턴스 종료 등) 다시 허가
+            return now - (state['probe_started_at'] or 0) >= self.probe_timeout
+        cooldown = min(self.open_seconds * 2 ** max(state.get('open_count', 1) - 1, 0), self.max_open_seconds)
+        return now - (state['opened_at'] or 0) >= cooldown
+
+    def _should_open(self, state: dict) -> bool:
+        if state['failures'] >= self.failure_threshold:
+            return True
+        outcomes = state['outcomes']
+        if len(outcomes) < self.min_samples:
+            return False
+        errors = sum(1 for o in outcomes if not o[1])
+        return errors / len(outcomes) >= self.error_rate_threshold
+
+    def _summary(self, state: dict) -> dict:
+        outcomes = state['outcomes']
+        latencies = sorted(o[2] for o in outcomes if o[1] and o[2] is not None)
+        return {
+            'state': state['state'],
+            'error_rate': round(sum(1 for o in outcomes if not o[1]) / len(outcomes), 3) if outcomes else 0.0,
+            'p50_latency': latencies[len(latencies) // 2] if latencies else None,
+            'samples': len(outcomes)
+        }
+
+
+def create_provider_health(supabase_client=None) -> ProviderHealth:
+    """환경변수 설정으로 ProviderHealth 생성"""
+    kind = os.getenv('PROVIDER_HEALTH_BACKEND', 'supabase' if supabase_client is not None else 'memory')
+
+    if kind == 'file':
+        store = FileHealthStore(os.getenv('PROVIDER_HEALTH_PATH', '/tmp/youtube_summarizer_provider_health.json'))
+    elif kind == 'supabase' and supabase_client is not None:
+        store = SupabaseHealthStore(supabase_client)
+    else:
+        if kind == 'supabase':
+            print("⚠️ Supabase 클라이언트가 없어 memory 모델 상태를 사용합니다.")
+            kind = 'memory'
+        store = MemoryHealthStore()
+
+    health = ProviderHealth(store)
+    print(f"✅ 모델 상태 추적 초기화 완료 (backend: {kind})")
+    return health
+
+
+if __name__ == '__main__':
+    # 테스트
+    os.environ.setdefault('CIRCUIT_OPEN_SECONDS', '0.1')
+    health = ProviderHealth()
+
+    for _ in range(3):
+        health.record('gemini', ok=False, latency=1.0)
+    print(health.allow('gemini'), health.order(['gemini', 'claude']))
+
+    time.sleep(0.15)
+    print(health.allow('gemini'), health.allow('gemini'))  # 시험 호출 1건만 허가
+    health.record('gemini', ok=True, latency=0.8)
+    print(health.snapshot())
@@ -0,0 +1,317 @@
+"""
+외부 API 요청 속도 제한 모듈
+서비스별 token bucket으로 요청 간격을 맞추고, 429 응답이면 Retry-After / jitter backoff 후 재시도
+
+- 서비스: notion, youtube, gemini, anthropic, telegram, telegram_chat
+- 한도: RATE_LIMIT_<SERVICE>="요청 수/초" (예: RATE_LIMIT_NOTION=3/1, RATE_LIMIT_GEMINI=15/60)
+- 'telegram_chat:<chat_id>'처럼 ':' 뒤에 대상을 붙이면 같은 한도를 대상별 버킷으로 따로 적용
+- RATE_LIMIT_BACKEND=supabase면 모든 인스턴스가 Supabase의 rate_limit_reserve RPC로 한도를 공유
+- 대상별 버킷은 다 채워진 뒤 RATE_LIMIT_IDLE_SECONDS 동안 쓰이지 않으면 삭제 (다시 만들어도 같은 상태)
+  Supabase의 rate_limits 행도 같은 주기로 prune_rate_limits RPC로 정리
+"""
+import os
+import time
+import random
+import threading
+
+from core import clients
+
+# 기본 한도 (요청 수, 초)
+DEFAULT_LIMITS = {
+    'notion': (3, 1),  # Notion 평균 3 req/s
+    'youtube': (10, 1),
+    'gemini': (15, 60),  # Gemini 무료 티어 RPM
+    'anthropic': (50, 60),
+    'telegram': (30, 1),  # Bot API 전체 한도
+    'telegram_chat': (1, 1),  # 채팅 하나에 보내는 메시지
+}
+
+
+class RateLimitedError(Exception):
+    """요청 한도 초과 (retry_after: 서버가 알려준 대기 시간(초), 없으면 None)"""
+
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_limit(value: str) -> tuple:
+    """'15/60' → (15, 60.0)"""
+    count, _, seconds = value.partition('/')
+    return int(count), float(seconds or 1)
+
+
+def retry_after_seconds(exc: Exception):
+    """
+    SDK별 예외에서 요청 한도 초과 여부와 Retry-After 추출
+    Returns: 한도 초과가 아니면 None, 한도 초과면 대기 시간(초, 헤더가 없으면 0)
+    """
+    if isinstance(exc, RateLimitedError):
+        return exc.retry_after or 0.0
+
+    headers = None
+    status = None
+
+    if getattr(exc, 'resp', None) is not None:
+        # googleapiclient HttpError (YouTube): 일일 할당량(quotaExceeded)은 재시도해도 소용없음
+        status = exc.resp.status
+        headers = exc.resp
+        if status == 403 and b'rateLimitExceeded' not in (getattr(exc, 'content', b'') or b''):
+            return None
+        if status == 403:
+            status = 429
+    else:
+        # anthropic (status_code), notion-client (status)
+        status = getattr(exc, 'status_code', None) or getattr(exc, 'status', None)
+
+    if status is None:
+        # google.api_core (Gemini): ResourceExhausted.code == 429
+        code = getattr(exc, 'code', None)
+        if isinstance(code, int):
+            status = int(code)
+
+    if status != 429:
+        return None
+
+    if headers is None:
+        headers = getattr(exc, 'headers', None) or getattr(getattr(exc, 'response', None), 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after') or headers.get('Retry-After') or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def raise_for_rate_limit(response):
+    """requests 응답이 429면 RateLimitedError (Telegram은 본문의 parameters.retry_after 사용)"""
+    if response.status_code != 429:
+        return
+    retry_after = response.headers.get('Retry-After')
+    if retry_after is None:
+        try:
+            retry_after = response.json().get('parameters', {}).get('retry_after')
+        except ValueError:
+            retry_after = None
+    raise RateLimitedError(f"429 Too Many Requests ({response.url})", float(retry_after) if retry_after else None)
+
+
+class TokenBucket:
+    """
+    rate개 / per초 속도로 채워지는 버킷 (최대 burst개)
+    pause_until: 429를 받으면 이 시각까지 모든 요청 대기
+    """
+
+    def __init__(self, rate: int, per: float, burst: int = None):
+        self.rate = rate / per
+        self.capacity = burst or rate
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.pause_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        토큰 1개 예약
+        Returns: 예약한 토큰을 쓸 수 있을 때까지 기다릴 시간(초)
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.pause_until - now)
+
+    def refund(self):
+        """예약했지만 쓰지 않은 토큰 반환"""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + 1)
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self.pause_until = max(self.pause_until, time.monotonic() + seconds)
+
+    def idle(self, now: float, idle_seconds: float) -> bool:
+        """토큰이 다 채워지고 일시 정지도 끝난 뒤 idle_seconds 동안 쓰이지 않았는지 (지워도 새 버킷과 같음)"""
+        with self._lock:
+            refilled = self.updated + (self.capacity - self.tokens) / self.rate
+            return now >= max(refilled, self.pause_until) + idle_seconds
+
+
+class SupabaseRateCoordinator:
+    """
+    인스턴스 간 한도 공유 (supabase_schema.sql의 rate_limits 테이블 + rate_limit_reserve RPC)
+    요청마다 서버에서 토큰을 예약하고 기다릴 시간을 받음
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def reserve(self, service: str, rate: int, per: float, burst: int) -> float:
+        response = self.client.rpc('rate_limit_reserve', {
+            'p_service': service,
+            'p_rate': rate / per,
+            'p_capacity': burst
+        }).execute()
+        return float(response.data or 0)
+
+    def pause(self, service: str, seconds: float):
+        self.client.rpc('rate_limit_pause', {'p_service': service, 'p_seconds': seconds}).execute()
+
+    def prune(self, idle_seconds: float) -> int:
+        """idle_seconds 동안 쓰이지 않은 행 삭제 (다음 예약 때 가득 찬 버킷으로 다시 생성)"""
+        response = self.client.rpc('prune_rate_limits', {'p_idle_seconds': idle_seconds}).execute()
+        return response.data or 0
+
+
+class RateLimiter:
+    def __init__(self):
+        self.max_retries = int(os.getenv('RATE_LIMIT_MAX_RETRIES', '4'))
+        self.max_wait = float(os.getenv('RATE_LIMIT_MAX_WAIT', '60'))
+        self.backoff_base = float(os.getenv('RATE_LIMIT_BACKOFF_BASE', '1'))
+        # 쓰이지 않는 대상별 버킷(채팅별 등)을 지우는 기준 시간 (장시간 실행 Worker에서 계속 늘어나지 않도록)
+        self.idle_seconds = float(os.getenv('RATE_LIMIT_IDLE_SECONDS', '600'))
+        self.coordinator = None
+        self._next_sweep = time.monotonic() + self.idle_seconds
+        self._buckets = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def use_supabase(self, client):
+        """모든 인스턴스가 Supabase로 한도 공유"""
+        self.coordinator = SupabaseRateCoordinator(client)
+
+    def limit(self, service: str) -> tuple:
+        """Returns: (요청 수, 초, burst)"""
+        service = service.partition(':')[0]
+        rate, per = DEFAULT_LIMITS.get(service, (10, 1))
+        value = os.getenv(f'RATE_LIMIT_{service.upper()}')
+        if value:
+            rate, per = parse_limit(value)
+        return rate, per, rate
+
+    def acquire(self, service: str):
+        """요청 전에 호출 - 한도 안에 들어올 때까지 대기 (max_wait를 넘기면 RateLimitedError)"""
+        self._sweep()
+        wait = self._reserve(service)
+        if wait > self.max_wait:
+            if not self.coordinator:
+                self._bucket(service).refund()
+            raise RateLimitedError(f"{service} 요청 한도 대기 시간 초과 ({wait:.1f}s)", wait)
+        if wait > 0:
+            self._count(service, 'waited_seconds', wait)
+            time.sleep(wait)
+        self._count(service, 'requests')
+
+    def call(self, service: str, func, *args, max_retries: int = None, **kwargs):
+        """
+        한도에 맞춰 func(*args, **kwargs) 실행
+        429면 Retry-After(없으면 jitter를 준 지수 backoff)만큼 서비스 전체를 멈춘 뒤 재시도
+        """
+        max_retries = self.max_retries if max_retries is None else max_retries
+        attempt = 0
+        while True:
+            self.acquire(service)
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                retry_after = retry_after_seconds(e)
+                if retry_after is None or attempt >= max_retries:
+                    raise
+
+                if retry_after:
+                    delay = retry_after + random.uniform(0, min(retry_after * 0.1 + 0.25, 5))
+                else:
+                    # full jitter: 여러 작업이 동시에 다시 몰리지 않도록 분산
+                    delay = random.uniform(0, self.backoff_base * 2 ** attempt) + self.backoff_base
+                attempt += 1
+                self._count(service, 'rate_limited')
+                print(f"⏳ {service} 요청 한도 초과, {delay:.1f}초 후 재시도 ({attempt}/{max_retries})")
+                self._pause(service, delay)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {service: dict(stats) for service, stats in self._stats.items()}
+
+    def _bucket(self, service: str) -> TokenBucket:
+        with self._lock:
+            if service not in self._buckets:
+                rate, per, burst = self.limit(service)
+                self._buckets[service] = TokenBucket(rate, per, burst)
+            return self._buckets[service]
+
+    def _sweep(self):
+        """idle_seconds마다 쓰이지 않는 대상별 버킷 / 공유 한도 행 삭제"""
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_sweep:
+                return
+            self._next_sweep = now + self.idle_seconds
+            idle = [service for service, bucket in self._buckets.items()
+                    if ':' in service and bucket.idle(now, self.idle_seconds)]
+            for service in idle:
+                del self._buckets[service]
+
+        if self.coordinator:
+            try:
+                self.coordinator.prune(self.idle_seconds)
+            except Exception as e:
+                print(f"⚠️ 공유 요청 한도 정리 실패: {e}")
+
+    def _reserve(self, service: str) -> float:
+        if self.coordinator:
+            try:
+                rate, per, burst = self.limit(service)
+                return self.coordinator.reserve(service, rate, per, burst)
+            except Exception as e:
+                print(f"⚠️ 공유 요청 한도 조회 실패 (인스턴스 한도로 대체): {e}")
+        return self._bucket(service).reserve()
+
+    def _pause(self, service: str, seconds: float):
+        self._bucket(service).pause(seconds)
+        if self.coordinator:
+            try:
+                self.coordinator.pause(service, seconds)
+            except Exception as e:
+                print(f"⚠️ 공유 요청 한도 일시 정지 실패: {e}")
+
+    def _count(self, service: str, key: str, amount: float = 1):
+        service = service.partition(':')[0]
+        with self._lock:
+            stats = self._stats.setdefault(service, {'requests': 0, 'rate_limited': 0, 'waited_seconds': 0.0})
+            stats[key] = round(stats[key] + amount, 3)
+
+
+# 프로세스 전체에서 공유 (동시 작업이 같은 버킷 사용)
+rate_limiter = RateLimiter()
+
+
+def post_json(service: str, url: str, payload: dict, timeout: float = 10, max_retries: int = None):
+    """한도에 맞춰 JSON POST (공용 HTTP 세션 사용, 429면 재시도)"""
+    def post():
+        response = clients.get_http_session().post(url, json=payload, timeout=timeout)
+        raise_for_rate_limit(response)
+        return response
+
+    return rate_limiter.call(service, post, max_retries=max_retries)
+
+
+if __name__ == '__main__':
+    # 테스트
+    os.environ.setdefault('RATE_LIMIT_NOTION', '3/1')
+    os.environ.setdefault('RATE_LIMIT_BACKOFF_BASE', '0.1')
+    limiter = RateLimiter()
+
+    started = time.monotonic()
+    for _ in range(9):
+        limiter.acquire('notion')
+    print(f"9회 요청: {time.monotonic() - started:.2f}s (3 req/s, burst 3 → 약 2s)")
+
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise RateLimitedError("429", retry_after=0.2 if len(calls) == 1 else None)
+        return 'ok'
+
+    print(limiter.call('telegram', flaky), limiter.stats())
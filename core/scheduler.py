@@ -0,0 +1,296 @@
+"""
+마감 시간 기반 작업 스케줄러
+Cloud Functions 호출 하나의 남은 시간(INVOCATION_TIMEOUT_SECONDS) 안에 끝낼 수 있는 만큼 작업을 계속 가져와 처리
+
+- JobCostEstimator: 최근 완료 작업의 result.cost(영상 길이 / 자막 글자 수 / 처리 시간)로 작업 처리 시간 추정
+  자막 글자 수 → 처리 시간은 최소제곱 직선 + 잔차 p90, 자막을 아직 모르면 영상 길이 × 초당 글자 수(중앙값)로 환산
+- DeadlineScheduler: Worker 자리가 빌 때마다 claim하고, 추정 시간이 남은 시간(안전 여유 제외)을 넘는 작업은
+  release_jobs RPC로 대기열에 되돌린 뒤 더 가져오지 않음 (남은 작업은 다음 호출에서 처리)
+"""
+import os
+import time
+import threading
+import statistics
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+def parse_duration(duration: str):
+    """YouTubeInfoExtractor의 길이 표시('15:30', '1:02:03')를 초로 변환 (형식이 다르면 None)"""
+    try:
+        seconds = 0
+        for part in (duration or '').split(':'):
+            seconds = seconds * 60 + int(part)
+        return seconds or None
+    except ValueError:
+        return None
+
+
+def _percentile(values: list, pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+class JobCostEstimator:
+    def __init__(self, history_size: int = None):
+        self.min_samples = int(os.getenv('SCHEDULER_MIN_SAMPLES', '5'))
+        # 기록이 부족할 때의 작업당 추정 시간 (초)
+        self.default_seconds = float(os.getenv('SCHEDULER_DEFAULT_JOB_SECONDS', '90'))
+        self.refresh_seconds = float(os.getenv('SCHEDULER_HISTORY_REFRESH', '600'))
+        self.samples = deque(maxlen=history_size or int(os.getenv('SCHEDULER_HISTORY', '200')))
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def observe(self, cost: dict):
+        """완료한 작업의 {'duration_seconds', 'transcript_chars', 'seconds'} 추가"""
+        if cost and cost.get('transcript_chars') and cost.get('seconds'):
+            with self._lock:
+                self.samples.append(cost)
+
+    def load(self, client, table: str = 'jobs'):
+        """
+        최근 완료 작업의 result.cost 불러오기 (warm 인스턴스에서는 SCHEDULER_HISTORY_REFRESH초마다)
+        실패해도 이 프로세스에서 관찰한 기록으로 계속 추정
+        """
+        if client is None or \
+                self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh_seconds:
+            return
+
+        try:
+            # 요약 결과 전체가 아니라 result.cost만 (PostgREST JSON 경로 select)
+            response = client.table(table) \
+                .select('cost:result->cost') \
+                .eq('status', 'completed') \
+                .order('completed_at', desc=True) \
+                .limit(self.samples.maxlen) \
+                .execute()
+        except Exception as e:
+            print(f"⚠️ 작업 처리 시간 기록 조회 실패: {e}")
+            return
+
+        costs = [row.get('cost') for row in reversed(response.data or [])]
+        with self._lock:
+            self.samples.clear()
+        for cost in costs:
+            self.observe(cost)
+        self._loaded_at = time.monotonic()
+
+    def estimate(self, duration_seconds: int = None, transcript_chars: int = None) -> float:
+        """작업 하나의 예상 처리 시간 (초, 보수적으로 잔차 p90을 더함)"""
+        with self._lock:
+            samples = list(self.samples)
+        if len(samples) < self.min_samples:
+            return self.default_seconds
+
+        seconds = [sample['seconds'] for sample in samples]
+        chars = transcript_chars
+        if chars is None and duration_seconds:
+            ratios = [sample['transcript_chars'] / sample['duration_seconds']
+                      for sample in samples if sample.get('duration_seconds')]
+            if ratios:
+                chars = duration_seconds * statistics.median(ratios)
+        if chars is None:
+            return _percentile(seconds, 90)
+
+        xs = [sample['transcript_chars'] for sample in samples]
+        if statistics.pstdev(xs) < 0.1 * statistics.mean(xs):
+            # 자막 길이가 거의 같은 기록만 있으면 기울기를 믿을 수 없음
+            return _percentile(seconds, 90)
+        slope, intercept = statistics.linear_regression(xs, seconds)
+
+        slope = max(slope, 0.0)
+        residuals = [y - (intercept + slope * x) for x, y in zip(xs, seconds)]
+        return max(intercept + slope * chars + max(_percentile(residuals, 90), 0.0), min(seconds))
+
+
+class DeadlineScheduler:
+    """
+    남은 호출 시간 안에 끝날 작업만 계속 가져와 최대 max_workers개씩 동시에 처리
+
+    run_job(job): 작업 처리 (예외를 던지지 않고 결과 dict 반환, 완료 시 result['cost'] 포함)
+    prepare(jobs): 추정에 쓸 {job_id: (영상 길이 초, 자막 글자 수)} (모르는 값은 None)
+    heartbeat: LeaseHeartbeat (가져온 작업을 추가하고 되돌린 작업을 제거)
+    stop: threading.Event - 설정되면 더 가져오지 않고 시작하지 않은 작업을 되돌린 뒤 처리 중인 작업만 마무리
+    """
+
+    def __init__(self, queue, run_job, deadline: float, max_workers: int, estimator: JobCostEstimator = None,
+                 prepare=None, heartbeat=None, batch_size: int = None, safety_margin: float = None, stop=None):
+        self.queue = queue
+        self.run_job = run_job
+        self.deadline = deadline  # time.monotonic() 기준
+        self.max_workers = max(max_workers, 1)
+        self.estimator = estimator or cost_estimator
+        self.prepare = prepare
+        self.heartbeat = heartbeat
+        self.batch_size = batch_size or self.max_workers
+        self.stop = stop
+        # 마지막 상태 기록 / 알림 전송 / 모델 상태 저장에 남겨 둘 시간 (초)
+        self.safety_margin = safety_margin if safety_margin is not None else \
+            float(os.getenv('SCHEDULER_SAFETY_SECONDS', '30'))
+        self.budget = self.deadline - time.monotonic() - self.safety_margin
+        self.claims = 0
+        self.released = 0
+        self.cheapest = None  # 지금까지 가져온 작업 중 가장 짧은 추정 시간
+
+    def remaining(self) -> float:
+        """안전 여유를 뺀 남은 시간 (초)"""
+        return self.deadline - time.monotonic() - self.safety_margin
+
+    def run(self, jobs: list = None) -> list:
+        """
+        jobs(이미 가져온 작업)부터 처리하고, 자리가 빌 때마다 더 가져옴
+        Returns: 처리한 작업의 결과 목록 (끝난 순서)
+        """
+        results = []
+        backlog = []  # 가져왔지만 아직 시작하지 않은 (작업, 추정 시간)
+        running = {}
+        accepting = True
+        if jobs:
+            self._accept(jobs, backlog)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job') as executor:
+            while True:
+                if self.stop is not None and self.stop.is_set() and (accepting or backlog):
+                    accepting = False
+                    if backlog:
+                        self._release([job for job, _ in backlog], "종료 요청으로")
+                        backlog.clear()
+
+                wanted = self.max_workers - len(running) - len(backlog)
+                if accepting and wanted > 0 and not self._worth_claiming():
+                    # 남은 시간에 가장 짧은 작업도 끝내지 못하면 가져왔다가 되돌리는 왕복(및 NOTIFY)을 하지 않음
+                    accepting = False
+                if accepting and wanted > 0:
+                    claimed = self._claim(min(self.batch_size, wanted))
+                    if claimed:
+                        self._accept(claimed, backlog)
+                    else:
+                        accepting = False  # 대기열이 비었음
+
+                while backlog and len(running) < self.max_workers:
+                    job, estimate = backlog[0]
+                    if not self._fits(estimate, started=bool(results or running)):
+                        self._release([job for job, _ in backlog],
+                                      f"남은 시간 {self.remaining():.0f}s 안에 끝나지 않을 것으로 추정되어({estimate:.0f}s)")
+                        backlog.clear()
+                        accepting = False
+                        break
+                    backlog.pop(0)
+                    running[executor.submit(self.run_job, job)] = job
+
+                if not running:
+                    break
+
+                # 종료 요청을 기다리는 중에도 확인하도록 주기적으로 깨어남
+                done, _ = wait(running, timeout=1 if self.stop is not None else None, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.pop(future)
+                    result = future.result()
+                    results.append(result)
+                    if result.get('status') == 'completed':
+                        self.estimator.observe(result.get('cost'))
+
+        print(f"⏳ 스케줄러: 작업 {len(results)}개 처리, 가져오기 {self.claims}회, "
+              f"되돌림 {self.released}개, 남은 시간 {self.remaining():.0f}s (안전 여유 {self.safety_margin:.0f}s 제외)")
+        return results
+
+    def _worth_claiming(self) -> bool:
+        """남은 시간이 받아들일 수 있는 가장 짧은 추정 시간 이상인지"""
+        shortest = self.estimator.estimate()
+        if self.cheapest is not None:
+            shortest = min(shortest, self.cheapest)
+        return self.remaining() >= shortest
+
+    def _claim(self, limit: int) -> list:
+        started = time.monotonic()
+        try:
+            jobs = self.queue.claim(limit)
+        except Exception as e:
+            print(f"⚠️ 작업 추가로 가져오기 실패: {e}")
+            return []
+        self.claims += 1
+
+        # 같이 가져온 작업은 같은 claim 시간을 기록
+        claim_seconds = round(time.monotonic() - started, 3)
+        for job in jobs:
+            job['claim_seconds'] = claim_seconds
+        return jobs
+
+    def _accept(self, jobs: list, backlog: list):
+        if self.heartbeat is not None:
+            self.heartbeat.add([job['id'] for job in jobs])
+
+        try:
+            features = self.prepare(jobs) if self.prepare else {}
+        except Exception as e:
+            print(f"⚠️ 작업 처리 시간 추정 정보 조회 실패: {e}")
+            features = {}
+
+        for job in jobs:
+            estimate = self.estimator.estimate(*features.get(job['id'], (None, None)))
+            job['estimated_seconds'] = round(estimate, 1)
+            self.cheapest = estimate if self.cheapest is None else min(self.cheapest, estimate)
+            backlog.append((job, estimate))
+
+    def _fits(self, estimate: float, started: bool) -> bool:
+        if estimate <= self.remaining():
+            return True
+        if not started and estimate > self.budget:
+            # 호출 시간 전체로도 부족하다고 추정되는 작업은 다음 호출에서도 마찬가지이므로 단독으로라도 실행
+            print(f"⚠️ 추정 처리 시간 {estimate:.0f}s가 호출 시간({self.budget:.0f}s)보다 길지만 실행합니다.")
+            return True
+        return False
+
+    def _release(self, jobs: list, reason: str):
+        job_ids = [job['id'] for job in jobs]
+        try:
+            released = self.queue.release(job_ids)
+        except Exception as e:
+            # 되돌리지 못한 작업은 임대가 만료된 뒤 reap_expired_jobs가 회수
+            print(f"⚠️ 작업 되돌리기 실패 (임대 만료 후 회수): {e}")
+            released = 0
+        if self.heartbeat is not None:
+            self.heartbeat.discard(job_ids)
+        self.released += released
+        print(f"⏳ {reason} 시작하지 않은 작업 {released}개를 대기열로 되돌렸습니다.")
+
+
+cost_estimator = JobCostEstimator()
+
+
+if __name__ == '__main__':
+    # 테스트
+    import random
+
+    estimator = JobCostEstimator()
+    print(f"기록 없음: {estimator.estimate(600):.1f}s")
+    for _ in range(50):
+        duration = random.randint(120, 3600)
+        chars = int(duration * random.uniform(8, 12))
+        estimator.observe({'duration_seconds': duration, 'transcript_chars': chars,
+                           'seconds': 20 + chars * 0.002 + random.uniform(0, 10)})
+    for duration in (300, 1800, 7200):
+        print(f"{duration // 60}분 영상: {estimator.estimate(duration):.1f}s")
+    print(f"자막 50000자: {estimator.estimate(None, 50000):.1f}s")
+
+    class FakeQueue:
+        def __init__(self, n):
+            self.jobs = [{'id': f"job-{i}"} for i in range(n)]
+
+        def claim(self, limit):
+            claimed, self.jobs = self.jobs[:limit], self.jobs[limit:]
+            return claimed
+
+        def release(self, job_ids):
+            print(f"release {job_ids}")
+            return len(job_ids)
+
+    def run_job(job):
+        time.sleep(0.2)
+        return {'job_id': job['id'], 'status': 'completed'}
+
+    fixed = JobCostEstimator()
+    fixed.estimate = lambda duration_seconds=None, transcript_chars=None: 0.2
+    scheduler = DeadlineScheduler(FakeQueue(100), run_job, time.monotonic() + 1.5, 3,
+                                  estimator=fixed, safety_margin=0.2)
+    print(len(scheduler.run()), 'jobs')
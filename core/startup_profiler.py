@@ -0,0 +1,136 @@
+"""
+Cold start 프로파일러
+
+1) 런타임 모드 (STARTUP_PROFILE=1)
+   main.py import 시점부터 첫 작업까지의 구간과, 지연 로드되는 SDK 클라이언트
+   초기화 시간을 기록하여 첫 작업이 끝나면 한 번 출력
+
+2) CLI 모드 (모듈별 import 비용)
+   python -m core.startup_profiler [--top 30] [--include-sdks]
+   `python -X importtime`으로 main.py를 import하여 모듈별 self/누적 시간 출력
+"""
+import os
+import sys
+import time
+import threading
+import subprocess
+from contextlib import contextmanager
+
+ENABLED = os.getenv('STARTUP_PROFILE') == '1'
+
+# 작업 처리 중 지연 로드되는 SDK (--include-sdks 시 함께 측정)
+LAZY_SDK_MODULES = [
+    'supabase',
+    'googleapiclient.discovery',
+    'google.generativeai',
+    'anthropic',
+    'notion_client',
+    'youtube_transcript_api',
+]
+
+_started = time.perf_counter()
+_marks = {}
+_inits = {}
+_reported = False
+_lock = threading.Lock()
+
+
+def mark(name: str):
+    """시작 시점 기준 경과 시간 기록 (이름별 최초 1회)"""
+    if not ENABLED:
+        return
+    with _lock:
+        _marks.setdefault(name, time.perf_counter() - _started)
+
+
+@contextmanager
+def timed(name: str):
+    """지연 초기화 구간 시간 기록 (SDK import + 클라이언트 생성)"""
+    if not ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            _inits[name] = time.perf_counter() - started
+
+
+def report():
+    """기록된 구간 출력 (프로세스당 1회)"""
+    global _reported
+    if not ENABLED:
+        return
+    with _lock:
+        if _reported:
+            return
+        _reported = True
+        marks = sorted(_marks.items(), key=lambda item: item[1])
+        inits = sorted(_inits.items(), key=lambda item: -item[1])
+
+    print(f"\n{'='*60}")
+    print("🚀 Cold start 프로파일")
+    for name, elapsed in marks:
+        print(f"  {name:<30} +{elapsed * 1000:8.1f} ms")
+    if inits:
+        print("  지연 초기화:")
+        for name, elapsed in inits:
+            print(f"    {name:<28} {elapsed * 1000:8.1f} ms")
+    print(f"{'='*60}")
+
+
+def parse_importtime(stderr: str) -> list:
+    """
+    `-X importtime` 출력 파싱
+    Returns: [(module, self_us, cumulative_us)] - module 앞의 공백은 중첩 깊이
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        try:
+            rows.append((parts[2][1:].rstrip(), int(parts[0]), int(parts[1])))
+        except ValueError:
+            continue
+    return rows
+
+
+def profile_imports(include_sdks: bool = False) -> list:
+    """새 인터프리터에서 main.py를 import하여 모듈별 import 비용 측정"""
+    code = 'import main'
+    if include_sdks:
+        code += '\n' + '\n'.join(f'import {module}' for module in LAZY_SDK_MODULES)
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=project_root,
+        capture_output=True,
+        text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    return parse_importtime(completed.stderr)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='main.py import 비용 측정')
+    parser.add_argument('--top', type=int, default=30, help='출력할 모듈 수')
+    parser.add_argument('--include-sdks', action='store_true', help='지연 로드 SDK도 함께 측정')
+    args = parser.parse_args()
+
+    rows = profile_imports(include_sdks=args.include_sdks)
+
+    # 최상위 import만 합산 (누적 시간에 하위 모듈 포함)
+    total_us = sum(cumulative for name, _, cumulative in rows if not name.startswith(' '))
+
+    print(f"📦 import된 모듈: {len(rows)}개, 총 {total_us / 1000:.1f} ms")
+    print(f"\n{'module':<50} {'self(ms)':>10} {'cumul(ms)':>10}")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda row: -row[2])[:args.top]:
+        print(f"{name.strip():<50} {self_us / 1000:>10.1f} {cumulative_us / 1000:>10.1f}")
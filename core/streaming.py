@@ -0,0 +1,183 @@
+"""
+스트리밍 요약 모듈
+LLM이 생성하는 텍스트를 섹션 단위로 Notion에 추가하고,
+Telegram 진행 메시지를 주기적으로 수정하여 사용자가 결과를 먼저 볼 수 있게 함
+"""
+import os
+import time
+import queue
+import threading
+
+from core import clients
+from core.rate_limiter import post_json
+
+# Telegram 메시지 최대 길이 (4096자) 안쪽으로 미리보기 제한
+TELEGRAM_PREVIEW_CHARS = 3500
+
+
+class SectionBuffer:
+    """
+    텍스트 조각을 받아 마크다운 제목(#) 단위로 완성된 섹션을 돌려줌
+    코드 블록(```) 안의 '#'은 제목으로 보지 않음
+    """
+
+    def __init__(self):
+        self._pending = ''
+        self._section = []
+        self._in_fence = False
+
+    def feed(self, text: str) -> list:
+        """Returns: 이번 조각으로 완성된 섹션 목록"""
+        self._pending += text
+        *lines, self._pending = self._pending.split('\n')
+
+        sections = []
+        for line in lines:
+            stripped = line.lstrip()
+            if stripped.startswith('```'):
+                self._in_fence = not self._in_fence
+            elif not self._in_fence and stripped.startswith('#') and any(l.strip() for l in self._section):
+                sections.append('\n'.join(self._section))
+                self._section = []
+            self._section.append(line)
+
+        return sections
+
+    def flush(self) -> str:
+        """남은 텍스트를 마지막 섹션으로 반환"""
+        if self._pending:
+            self._section.append(self._pending)
+            self._pending = ''
+        section = '\n'.join(self._section)
+        self._section = []
+        return section if section.strip() else None
+
+
+class TelegramProgressMessage:
+    """
+    진행 상황 메시지 하나를 보내고 editMessageText로 갱신, 작업이 끝나면 delete()로 삭제
+    Telegram 수정 빈도 제한을 피하기 위해 interval초에 한 번만 수정
+    """
+
+    def __init__(self, chat_id: int, interval: float = None):
+        self.chat_id = chat_id
+        self.token = os.getenv('TELEGRAM_BOT_TOKEN')
+        self.interval = interval or float(os.getenv('STREAMING_PROGRESS_INTERVAL', '2'))
+        self.message_id = None
+        self._last_text = None
+        self._last_sent = 0.0
+
+    def update(self, text: str, force: bool = False):
+        if not self.token or text == self._last_text:
+            return
+        if not force and time.monotonic() - self._last_sent < self.interval:
+            return
+
+        try:
+            if self.message_id is None:
+                response = self._call('sendMessage', {'chat_id': self.chat_id, 'text': text})
+                self.message_id = response.get('result', {}).get('message_id')
+            else:
+                self._call('editMessageText', {
+                    'chat_id': self.chat_id,
+                    'message_id': self.message_id,
+                    'text': text
+                })
+            self._last_text = text
+            self._last_sent = time.monotonic()
+        except Exception as e:
+            print(f"⚠️ Telegram 진행 메시지 전송 실패: {e}")
+
+    def delete(self):
+        """
+        진행 메시지 삭제 - 작업이 끝나면(완료 / 실패) 결과는 outbox 알림으로 따로 보내므로
+        "요약 생성 중..." 같은 중간 상태가 채팅에 남지 않도록 지움
+        """
+        if not self.token or self.message_id is None:
+            return
+        try:
+            self._call('deleteMessage', {'chat_id': self.chat_id, 'message_id': self.message_id})
+        except Exception as e:
+            print(f"⚠️ Telegram 진행 메시지 삭제 실패: {e}")
+        self.message_id = None
+        self._last_text = None
+
+    def _call(self, method: str, payload: dict) -> dict:
+        # 진행 메시지는 다음 갱신이 있으므로 한도 초과 시 기다려서 재시도하지 않음
+        response = post_json(
+            'telegram',
+            f"{clients.TELEGRAM_API_BASE}/bot{self.token}/{method}",
+            payload,
+            max_retries=0
+        )
+        return response.json()
+
+
+def progress_text(summary: str, done: bool = False) -> str:
+    """진행 메시지 내용 (요약 미리보기)"""
+    header = "✍️ 요약 작성 완료, Notion 정리 중..." if done else f"⏳ 요약 생성 중... ({len(summary)} 글자)"
+    preview = summary[:TELEGRAM_PREVIEW_CHARS]
+    if len(summary) > TELEGRAM_PREVIEW_CHARS:
+        preview += "\n..."
+    return f"{header}\n\n{preview}"
+
+
+def stream_summary(chunks, on_section, on_progress, timeout: float = None) -> str:
+    """
+    텍스트 조각 스트림을 소비하면서
+    - 섹션이 완성될 때마다 on_section(section) 호출 (Notion 블록 추가)
+    - 조각마다 on_progress(지금까지의 요약) 호출 (Telegram 진행 메시지)
+    timeout: 스트림 전체 제한 시간(초) - 넘기면 TimeoutError (다음 조각이 오지 않고 멈춘 경우 포함)
+    Returns: 전체 요약 텍스트
+    """
+    buffer = SectionBuffer()
+    parts = []
+
+    for chunk in with_deadline(chunks, timeout):
+        parts.append(chunk)
+        for section in buffer.feed(chunk):
+            on_section(section)
+        on_progress(''.join(parts))
+
+    rest = buffer.flush()
+    if rest:
+        on_section(rest)
+
+    return ''.join(parts)
+
+
+_DONE = object()
+
+
+def with_deadline(chunks, timeout: float = None):
+    """
+    timeout초 안에 끝나지 않으면 TimeoutError를 던지는 스트림
+    Gemini SDK(0.3.x)는 스트림에 제한 시간을 줄 수 없으므로 별도 스레드에서 읽고,
+    시간을 넘긴 스트림은 취소할 수 없어 기다리지 않고 버림
+    """
+    if timeout is None:
+        yield from chunks
+        return
+
+    deadline = time.monotonic() + timeout
+    received = queue.Queue()
+
+    def pump():
+        try:
+            for chunk in chunks:
+                received.put((chunk, None))
+            received.put((_DONE, None))
+        except Exception as e:
+            received.put((None, e))
+
+    threading.Thread(target=pump, name='stream', daemon=True).start()
+    while True:
+        try:
+            chunk, error = received.get(timeout=max(deadline - time.monotonic(), 0))
+        except queue.Empty:
+            raise TimeoutError(f"스트리밍 응답 시간 초과 ({timeout:g}s)") from None
+        if error is not None:
+            raise error
+        if chunk is _DONE:
+            return
+        yield chunk
@@ -2,8 +2,6 @@
 YouTube 자막 추출 모듈
 youtube-transcript-api 사용 (무료)
 """
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound
 
 
 class SubtitleExtractor:
@@ -15,6 +13,9 @@ class SubtitleExtractor:
         YouTube 자막 추출
         Returns: (transcript_text, source)
         """
+        from youtube_transcript_api import YouTubeTranscriptApi
+        from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound
+
         try:
             # 자막 추출 시도
             transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
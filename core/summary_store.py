@@ -0,0 +1,49 @@
+"""
+요약 결과 저장소
+(video_id, prompt_key, 모델, 시스템 프롬프트 해시)로 요약을 저장하여
+같은 영상 + 같은 프롬프트 요청은 LLM 호출 없이 재사용
+"""
+import os
+import hashlib
+
+from core.cache import VideoCache, create_cache_backend
+
+
+class SummaryStore:
+    def __init__(self, cache: VideoCache):
+        self.cache = cache
+
+    @staticmethod
+    def make_key(video_id: str, prompt_key: str, model_name: str, prompt_version: str, variant: str = '') -> str:
+        """
+        콘텐츠 주소 키
+        프롬프트가 바뀌면 prompt_version이 달라지므로 이전 요약은 자동으로 사용되지 않음
+        variant: 요약 입력을 바꾸는 설정 (예: 자막 전처리 버전)
+        """
+        raw = '|'.join([video_id, prompt_key, model_name, prompt_version, variant])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, video_id: str, prompt_key: str, summarizer, variant: str = '') -> str:
+        """summarizer(model_name, prompt_version 보유)로 만든 요약 조회"""
+        key = self.make_key(video_id, prompt_key, summarizer.model_name, summarizer.prompt_version(prompt_key), variant)
+        return self.cache.get('summary', key)
+
+    def set(self, video_id: str, prompt_key: str, summarizer, summary: str, variant: str = ''):
+        key = self.make_key(video_id, prompt_key, summarizer.model_name, summarizer.prompt_version(prompt_key), variant)
+        self.cache.set('summary', key, summary)
+
+    def stats(self) -> dict:
+        return self.cache.stats().get('summary', {})
+
+
+def create_summary_store(supabase_client=None) -> SummaryStore:
+    """환경변수 설정으로 SummaryStore 생성 (기본값은 영상 캐시와 같은 백엔드)"""
+    kind = os.getenv('SUMMARY_CACHE_BACKEND', os.getenv('VIDEO_CACHE_BACKEND', 'memory'))
+    backend = create_cache_backend(
+        kind,
+        supabase_client=supabase_client,
+        table='summary_cache',
+        max_entries=int(os.getenv('SUMMARY_CACHE_MAX_ENTRIES', '1000'))
+    )
+    print(f"✅ 요약 캐시 초기화 완료 (backend: {kind})")
+    return SummaryStore(VideoCache(backend, ttl_seconds=int(os.getenv('SUMMARY_CACHE_TTL', '2592000'))))
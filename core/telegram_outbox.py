@@ -0,0 +1,262 @@
+"""
+Telegram 알림 outbox 모듈
+작업 상태와 알림을 같은 트랜잭션으로 기록하고(supabase_schema.sql의 finish_jobs / reap_expired_jobs),
+작업 처리와 별개로 notification_outbox를 비우면서 전송
+
+- 공용 HTTP 세션(keep-alive)으로 채팅별 병렬 전송 (같은 채팅은 순서대로)
+- Bot API 전체 한도(rate_limiter 'telegram') + 채팅별 한도('telegram_chat', 기본 1 req/s)
+- 실패하면 지수 backoff 후 재시도, OUTBOX_MAX_ATTEMPTS 초과 또는 재시도해도 소용없는 오류(400/403)면 failed
+"""
+import os
+import html
+import random
+import threading
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+from core import clients
+from core.rate_limiter import rate_limiter, post_json
+
+CHANNEL_NAMES = {
+    'archive': '📚 Archive',
+    'agent-reference': '🤖 Agent Reference'
+}
+
+
+class TelegramSendError(Exception):
+    """Bot API가 ok=false로 응답 (permanent: 재시도해도 같은 결과인 오류)"""
+
+    def __init__(self, message: str, permanent: bool = False):
+        super().__init__(message)
+        self.permanent = permanent
+
+
+def telegram_enabled() -> bool:
+    return bool(os.getenv('TELEGRAM_BOT_TOKEN'))
+
+
+def success_notification(video_info: dict, notion_url: str, channel: str):
+    """
+    성공 알림 (sendMessage 본문, chat_id는 전송 시 작업의 telegram_chat_id 사용)
+    Returns: 알림 payload (TELEGRAM_BOT_TOKEN이 없으면 None)
+    """
+    if not telegram_enabled():
+        return None
+
+    # parse_mode=HTML이므로 제목의 <, & 등이 태그로 해석되지 않도록 escape
+    text = f"""✅ 요약 완료!
+
+📺 제목: {html.escape(video_info['title'])}
+📍 채널: {html.escape(video_info['channel'])}
+⏱️ 길이: {video_info['duration']}
+🗂️ 분류: {CHANNEL_NAMES.get(channel, channel)}
+
+📄 Notion: {notion_url}
+"""
+
+    return {
+        'text': text,
+        'parse_mode': 'HTML',
+        'reply_markup': {
+            'inline_keyboard': [[
+                {
+                    'text': '📄 Notion 열기',
+                    'url': notion_url
+                }
+            ]]
+        }
+    }
+
+
+def error_notification(error_message: str):
+    """오류 알림 (TELEGRAM_BOT_TOKEN이 없으면 None)"""
+    if not telegram_enabled():
+        return None
+
+    text = f"""❌ 요약 실패
+
+오류 내용:
+{error_message}
+
+💡 다시 시도하시거나 다른 영상을 보내주세요."""
+
+    return {'text': text}
+
+
+class TelegramOutbox:
+    def __init__(self, queue):
+        """queue: JobQueue - notification_outbox를 작업 큐와 같은 백엔드(Supabase / Postgres 연결)로 읽고 씀"""
+        self.queue = queue
+        self.worker_id = queue.worker_id
+        self.batch_size = int(os.getenv('OUTBOX_BATCH_SIZE', '50'))
+        self.max_attempts = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '8'))
+        self.lock_seconds = int(os.getenv('OUTBOX_LOCK_SECONDS', '60'))
+        self.backoff_base = float(os.getenv('OUTBOX_BACKOFF_BASE', '15'))
+        self.max_backoff = float(os.getenv('OUTBOX_MAX_BACKOFF', '1800'))
+        self.concurrency = int(os.getenv('OUTBOX_CONCURRENCY', '4'))
+        # 429는 rate_limiter가 짧게 재시도하고, 그래도 안 되면 outbox backoff로 넘김
+        self.rate_limit_retries = int(os.getenv('OUTBOX_RATE_LIMIT_RETRIES', '1'))
+        self._wakeup = threading.Event()
+        self._drain_lock = threading.Lock()
+
+    def wake(self):
+        """새 알림이 기록되었음을 OutboxDrainer에 알림"""
+        self._wakeup.set()
+
+    def wait(self, timeout: float) -> bool:
+        """새 알림이 기록되거나 timeout초가 지날 때까지 대기"""
+        return self._wakeup.wait(timeout)
+
+    def drain(self) -> dict:
+        """
+        전송할 차례가 된 알림을 가져와 전송
+        Returns: {'sent', 'retry', 'failed'} 건수
+        """
+        stats = {'sent': 0, 'retry': 0, 'failed': 0}
+        self._wakeup.clear()
+        if not telegram_enabled():
+            return stats
+
+        # 같은 인스턴스에서 동시에 drain하지 않음 (다른 인스턴스와는 claim RPC의 SKIP LOCKED로 분리)
+        with self._drain_lock:
+            rows = self._claim()
+            if not rows:
+                return stats
+
+            chats = {}
+            for row in sorted(rows, key=lambda row: row['id']):
+                chats.setdefault(row['chat_id'], []).append(row)
+
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(chats))) as executor:
+                outcomes = [o for chat in executor.map(self._deliver_chat, chats.values()) for o in chat]
+
+            self._settle(outcomes, stats)
+
+        print(f"📨 Telegram 알림: 전송 {stats['sent']}, 재시도 예정 {stats['retry']}, 실패 {stats['failed']}")
+        return stats
+
+    def _claim(self) -> list:
+        try:
+            return self.queue.claim_notifications(self.batch_size, self.lock_seconds)
+        except Exception as e:
+            print(f"⚠️ 알림 outbox 조회 실패: {e}")
+            return []
+
+    def _deliver_chat(self, rows: list) -> list:
+        """한 채팅의 알림을 순서대로 전송. Returns: [(row, 오류 또는 None)]"""
+        outcomes = []
+        for row in rows:
+            try:
+                self._send(row['chat_id'], row['payload'])
+                outcomes.append((row, None))
+            except Exception as e:
+                outcomes.append((row, e))
+        return outcomes
+
+    def _send(self, chat_id: int, payload: dict):
+        rate_limiter.acquire(f"telegram_chat:{chat_id}")
+        response = post_json(
+            'telegram',
+            f"{clients.TELEGRAM_API_BASE}/bot{os.getenv('TELEGRAM_BOT_TOKEN')}/sendMessage",
+            dict(payload, chat_id=chat_id),
+            max_retries=self.rate_limit_retries
+        )
+
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        if not body.get('ok'):
+            code = body.get('error_code') or response.status_code
+            # 400 (잘못된 요청 / 채팅 없음), 403 (봇 차단)은 재시도해도 같은 결과
+            raise TelegramSendError(f"{code} {body.get('description', response.reason)}", permanent=code in (400, 403))
+
+    def _settle(self, outcomes: list, stats: dict):
+        """전송 결과 기록 (성공은 한 번에, 실패는 행마다 다음 시도 시각 계산)"""
+        now = datetime.now(timezone.utc)
+        sent_ids = [row['id'] for row, error in outcomes if error is None]
+
+        try:
+            if sent_ids:
+                self.queue.update_notifications(sent_ids, {
+                    'status': 'sent',
+                    'sent_at': now.isoformat(),
+                    'last_error': None,
+                    'locked_by': None,
+                    'locked_until': None
+                })
+            stats['sent'] += len(sent_ids)
+
+            for row, error in outcomes:
+                if error is None:
+                    continue
+
+                # claim_notifications가 attempts를 이미 증가시킴
+                if getattr(error, 'permanent', False) or row['attempts'] >= self.max_attempts:
+                    fields = {'status': 'failed'}
+                    stats['failed'] += 1
+                    print(f"❌ Telegram 알림 전송 포기 (chat {row['chat_id']}, {row['attempts']}회): {error}")
+                else:
+                    delay = min(self.backoff_base * 2 ** (row['attempts'] - 1), self.max_backoff)
+                    delay = max(getattr(error, 'retry_after', None) or 0, random.uniform(delay / 2, delay))
+                    fields = {'next_attempt_at': (now + timedelta(seconds=delay)).isoformat()}
+                    stats['retry'] += 1
+                    print(f"⚠️ Telegram 알림 전송 실패, {delay:.0f}초 후 재시도 (chat {row['chat_id']}): {error}")
+
+                fields.update({'last_error': str(error)[:500], 'locked_by': None, 'locked_until': None})
+                self.queue.update_notifications([row['id']], fields)
+        except Exception as e:
+            # 기록하지 못한 알림은 잠금이 풀린 뒤 다시 전송됨 (중복 가능, 유실 없음)
+            print(f"⚠️ 알림 전송 결과 기록 실패: {e}")
+
+
+class OutboxDrainer:
+    """
+    with 블록 동안 백그라운드 스레드에서 outbox 전송
+    outbox.wake()가 호출되면 바로, 아니면 interval마다 전송하고 블록을 나갈 때 한 번 더 전송
+    """
+
+    def __init__(self, outbox: TelegramOutbox, interval: float = None):
+        self.outbox = outbox
+        self.interval = interval or float(os.getenv('OUTBOX_POLL_SECONDS', '30'))
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, name='outbox-drainer', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self.outbox.wake()
+        self._thread.join()
+        self._drain()
+        return False
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.outbox.wait(self.interval)
+            if self._stop.is_set():
+                break
+            self._drain()
+
+    def _drain(self):
+        try:
+            self.outbox.drain()
+        except Exception as e:
+            print(f"⚠️ Telegram 알림 전송 오류: {e}")
+
+
+if __name__ == '__main__':
+    # 테스트
+    from dotenv import load_dotenv
+    from supabase import create_client
+    from core.job_queue import JobQueue
+    load_dotenv()
+
+    outbox = TelegramOutbox(JobQueue(create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_KEY')),
+                                     'outbox-test'))
+    print(success_notification({'title': '<테스트> & 제목', 'channel': '채널', 'duration': '1:00'},
+                               'https://notion.so/test', 'archive'))
+    print(outbox.drain())
@@ -0,0 +1,127 @@
+"""
+자막 전처리 모듈
+자막 추출과 AI 요약 사이에서 토큰을 줄이는 정제 단계
+- [Music] 같은 효과음 태그 / 추임새 제거
+- 자동 생성 자막의 겹치는 반복(rolling caption) 제거
+- 한 단어짜리 줄 등 자막 조각을 문장 단위로 병합
+- 공백 정리
+"""
+import re
+import time
+
+# 전처리 규칙이 바뀌면 올려서 요약 캐시를 무효화
+PREPROCESSOR_VERSION = '1'
+
+# [Music], [음악], (박수), ♪ 등 효과음 표기
+NOISE_TAG = re.compile(
+    r'\[[^\]]{0,30}\]|\((?:music|applause|laughter|inaudible|음악|박수|웃음|박수 소리)\)|[♪♫]+',
+    re.IGNORECASE
+)
+
+# 단독으로 쓰인 추임새 (앞뒤가 공백/문장 경계인 경우만)
+# '그', '어', '아' 한 글자는 지시어/감탄사로도 쓰이므로 늘어지거나 말줄임표가 붙은 경우만 제거
+FILLER = re.compile(
+    r'(?<![\w])(?:um+|uh+|erm+|hmm+|mhm|음+|어{2,}|아{2,}|그{2,}|(?:어|아|그)(?:\.{2,}|…))(?![\w])[,.]?',
+    re.IGNORECASE
+)
+
+WHITESPACE = re.compile(r'\s+')
+
+# 문장 끝 (마침표/물음표/느낌표, 한국어 종결어미 + 마침표 포함)
+SENTENCE_END = re.compile(r'(?<=[.!?。？！])\s+')
+
+# 문장 부호가 없는 자동 자막은 이 길이 근처 단어 경계에서 줄바꿈
+MAX_LINE_CHARS = 300
+
+# 겹침을 검사할 이전 출력의 마지막 단어 수
+OVERLAP_WINDOW = 20
+
+
+class TranscriptPreprocessor:
+    def __init__(self, max_line_chars: int = MAX_LINE_CHARS):
+        self.max_line_chars = max_line_chars
+
+    def process(self, transcript: str) -> tuple:
+        """
+        Returns: (정제된 자막, 통계 dict)
+        """
+        started = time.process_time()
+
+        words = []
+        for line in transcript.split('\n'):
+            line_words = self._clean_line(line).split()
+            if not line_words:
+                continue
+            words.extend(line_words[self._overlap(words, line_words):])
+
+        text = self._to_lines(' '.join(words))
+
+        stats = {
+            'original_chars': len(transcript),
+            'processed_chars': len(text),
+            'compression_ratio': round(len(text) / len(transcript), 3) if transcript else 1.0,
+            'original_tokens': estimate_tokens(transcript),
+            'processed_tokens': estimate_tokens(text),
+            'cpu_ms': round((time.process_time() - started) * 1000, 2)
+        }
+        return text, stats
+
+    def _clean_line(self, line: str) -> str:
+        line = NOISE_TAG.sub(' ', line)
+        line = FILLER.sub(' ', line)
+        return WHITESPACE.sub(' ', line).strip()
+
+    def _overlap(self, words: list, line_words: list) -> int:
+        """
+        이전 출력 끝과 새 줄 앞이 겹치는 단어 수
+        우연한 한 단어 겹침은 무시하고, 줄 전체가 반복된 경우는 한 단어라도 제거
+        """
+        tail = [w.lower() for w in words[-OVERLAP_WINDOW:]]
+        head = [w.lower() for w in line_words[:OVERLAP_WINDOW]]
+
+        for k in range(min(len(tail), len(head)), 0, -1):
+            if tail[-k:] == head[:k] and (k >= 2 or k == len(line_words)):
+                return k
+        return 0
+
+    def _to_lines(self, text: str) -> str:
+        """문장마다 한 줄, 문장 부호가 없으면 max_line_chars 근처 단어 경계에서 줄바꿈"""
+        lines = []
+        for sentence in SENTENCE_END.split(text):
+            while len(sentence) > self.max_line_chars:
+                cut = sentence.rfind(' ', 0, self.max_line_chars)
+                if cut <= 0:
+                    cut = self.max_line_chars
+                lines.append(sentence[:cut])
+                sentence = sentence[cut:].lstrip()
+            if sentence:
+                lines.append(sentence)
+        return '\n'.join(lines)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    LLM 토큰 수 추정 (토크나이저 없이 비교용)
+    한글 약 1.5자당 1토큰, 그 외 약 4자당 1토큰
+    """
+    hangul = len(re.findall(r'[가-힣]', text))
+    other = len(text) - hangul - text.count(' ') - text.count('\n')
+    return int(hangul / 1.5 + max(other, 0) / 4)
+
+
+if __name__ == '__main__':
+    # 테스트
+    sample = """[Music]
+so today we're going to
+we're going to talk about
+talk about agents
+um
+agents
+[Applause]
+and how they work. uh they use tools.
+음 오늘은 에이전트에 대해
+에이전트에 대해 이야기해 보겠습니다."""
+
+    text, stats = TranscriptPreprocessor().process(sample)
+    print(text)
+    print(stats)
@@ -4,8 +4,11 @@ YouTube Data API v3 사용
 """
 import os
 import re
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+from core import clients
+from core.rate_limiter import rate_limiter
+
+# videos().list 요청 1회당 최대 id 개수
+MAX_IDS_PER_REQUEST = 50
 
 
 class YouTubeInfoExtractor:
@@ -15,9 +18,10 @@ class YouTubeInfoExtractor:
             print("⚠️ YOUTUBE_API_KEY가 설정되지 않았습니다.")
             self.youtube = None
         else:
-            self.youtube = build('youtube', 'v3', developerKey=self.api_key)
+            self.youtube = clients.get_youtube_service(self.api_key)
 
-    def extract_video_id(self, url: str) -> str:
+    @staticmethod
+    def extract_video_id(url: str) -> str:
         """YouTube URL에서 video_id 추출"""
         patterns = [
             r'(?:v=|\/)([0-9A-Za-z_-]{11}).*',
@@ -33,43 +37,77 @@ class YouTubeInfoExtractor:
 
     def get_video_info(self, video_id: str) -> dict:
         """YouTube Data API로 영상 정보 가져오기"""
+        return self.get_video_infos([video_id]).get(video_id)
+
+    def get_video_infos(self, video_ids: list) -> dict:
+        """
+        여러 영상 정보를 한 번에 가져오기
+        videos().list는 요청 1회에 최대 50개 id를 받으며 쿼터 비용은 동일
+
+        Returns: {video_id: video_info}
+          - 찾을 수 없는 영상: None
+          - API 오류로 조회하지 못한 영상: 키 없음 (호출 측에서 개별 재시도)
+        """
         if not self.youtube:
-            return None
-
-        try:
-            request = self.youtube.videos().list(
-                part='snippet,contentDetails,statistics',
-                id=video_id
-            )
-            response = request.execute()
-
-            if not response.get('items'):
-                print(f"❌ 영상을 찾을 수 없습니다: {video_id}")
-                return None
-
-            item = response['items'][0]
-            snippet = item['snippet']
-            content_details = item['contentDetails']
-
-            # ISO 8601 duration을 읽기 쉬운 형식으로 변환
-            duration = self._parse_duration(content_details['duration'])
-
-            video_info = {
-                'id': video_id,
-                'title': snippet['title'],
-                'channel': snippet['channelTitle'],
-                'description': snippet.get('description', ''),
-                'published_at': snippet['publishedAt'],
-                'duration': duration,
-                'thumbnail': snippet['thumbnails'].get('high', {}).get('url', ''),
-                'url': f'https://www.youtube.com/watch?v={video_id}'
-            }
-
-            return video_info
-
-        except HttpError as e:
-            print(f"❌ YouTube API 오류: {e}")
-            return None
+            return {}
+
+        from googleapiclient.errors import HttpError
+
+        # 중복 제거 (순서 유지)
+        video_ids = list(dict.fromkeys(vid for vid in video_ids if vid))
+        infos = {}
+
+        for i in range(0, len(video_ids), MAX_IDS_PER_REQUEST):
+            chunk = video_ids[i:i + MAX_IDS_PER_REQUEST]
+
+            try:
+                request = self.youtube.videos().list(
+                    part='snippet,contentDetails,statistics',
+                    id=','.join(chunk)
+                )
+                with clients.borrow_youtube_http() as http:
+                    response = rate_limiter.call('youtube', request.execute, http=http)
+
+            except HttpError as e:
+                print(f"❌ YouTube API 오류 ({len(chunk)}개 조회 실패): {e}")
+                continue
+
+            items = {item['id']: item for item in response.get('items', [])}
+
+            for video_id in chunk:
+                item = items.get(video_id)
+                if not item:
+                    print(f"❌ 영상을 찾을 수 없습니다: {video_id}")
+                    infos[video_id] = None
+                    continue
+
+                try:
+                    infos[video_id] = self._item_to_info(item)
+                except KeyError as e:
+                    print(f"❌ 영상 정보 형식 오류 ({video_id}): {e}")
+                    infos[video_id] = None
+
+        return infos
+
+    def _item_to_info(self, item: dict) -> dict:
+        """videos().list 응답 항목을 video_info dict로 변환"""
+        video_id = item['id']
+        snippet = item['snippet']
+        content_details = item['contentDetails']
+
+        # ISO 8601 duration을 읽기 쉬운 형식으로 변환
+        duration = self._parse_duration(content_details['duration'])
+
+        return {
+            'id': video_id,
+            'title': snippet['title'],
+            'channel': snippet['channelTitle'],
+            'description': snippet.get('description', ''),
+            'published_at': snippet['publishedAt'],
+            'duration': duration,
+            'thumbnail': snippet['thumbnails'].get('high', {}).get('url', ''),
+            'url': f'https://www.youtube.com/watch?v={video_id}'
+        }
 
     def _parse_duration(self, duration: str) -> str:
         """
@@ -17,32 +17,102 @@ gcloud functions deploy process-youtube-jobs \
   --timeout=540s
 """
 
+from core import startup_profiler
+
 import os
 import json
-import requests
+import time
 import functions_framework
-from datetime import datetime
 from dotenv import load_dotenv
-from supabase import create_client, Client
 
 # 환경변수 로드
 load_dotenv()
 
-# Core 모듈
+# Core 모듈 (무거운 SDK는 필요한 단계에서 지연 로드 - core/clients.py)
 from core.youtube_info import YouTubeInfoExtractor
 from core.subtitle_extractor import SubtitleExtractor
-from core.ai_summarizer import GeminiSummarizer, ClaudeSummarizer
+from core.ai_summarizer import GeminiSummarizer, ClaudeSummarizer, MAX_TRANSCRIPT_CHARS
 from core.notion_saver import NotionSaver
+from core import clients, job_profiler
+from core.job_queue import JobQueue, PostgresJobQueue, LeaseHeartbeat, FinishBatcher
+from core.pipeline import Pipeline
+from core.cache import create_video_cache
+from core.summary_store import create_summary_store
+from core.streaming import TelegramProgressMessage, progress_text, stream_summary
+from core.map_reduce import MapReduceSummarizer
+from core.transcript_preprocessor import TranscriptPreprocessor, PREPROCESSOR_VERSION
+from core.hedging import HedgePolicy, HedgeError, hedged_call
+from core.provider_health import create_provider_health
+from core.rate_limiter import rate_limiter
+from core.telegram_outbox import TelegramOutbox, OutboxDrainer, success_notification, error_notification
+from core.scheduler import DeadlineScheduler, cost_estimator, parse_duration
+
+# Supabase 클라이언트 / 작업 큐 / 캐시 (첫 호출 시 init_services에서 생성)
+supabase = None
+job_queue = None
+video_cache = None
+summary_store = None
+provider_health = None
+outbox = None
+
+# 한 번에 가져올 작업 수 & 동시 처리 개수 (Worker Pool)
+JOB_BATCH_SIZE = int(os.getenv('JOB_BATCH_SIZE', '5'))
+MAX_CONCURRENT_JOBS = int(os.getenv('MAX_CONCURRENT_JOBS', '5'))
+
+# 호출 제한 시간 (배포 시 --timeout과 같게), 남은 시간 안에 끝날 작업을 계속 가져옴 (core/scheduler.py)
+INVOCATION_TIMEOUT_SECONDS = float(os.getenv('INVOCATION_TIMEOUT_SECONDS', os.getenv('FUNCTION_TIMEOUT_SEC', '540')))
+
+# 스트리밍 모드: 요약을 생성되는 대로 Notion에 섹션 단위로 추가 + Telegram 진행 메시지
+STREAMING_MODE = os.getenv('STREAMING_MODE') == '1'
+
+# 자막 전처리 (효과음 태그 / 추임새 / 반복 제거로 토큰 절약, 0이면 끔)
+TRANSCRIPT_PREPROCESS = os.getenv('TRANSCRIPT_PREPROCESS', '1') == '1'
+
+# map-reduce로 처리되는 긴 자막의 hedging 대기 / 제한 시간 배수
+LONG_INPUT_TIMEOUT_FACTOR = float(os.getenv('LLM_LONG_INPUT_TIMEOUT_FACTOR', '3'))
+
+startup_profiler.mark('main_imported')
+
+
+def init_services() -> bool:
+    """
+    Supabase 클라이언트 / 작업 큐 / 캐시 생성 (warm 인스턴스에서는 한 번만)
+    import 시점이 아니라 첫 호출 시 생성하여 cold start 비용을 줄임
+    Returns: 작업 큐 설정 여부 (Supabase 또는 JOB_QUEUE_BACKEND=postgres)
+    """
+    global supabase, job_queue, video_cache, summary_store, provider_health, outbox
+
+    if job_queue is None:
+        supabase = clients.get_supabase()
+        if os.getenv('JOB_QUEUE_BACKEND') == 'postgres':
+            # 작업 큐 RPC를 Postgres에 직접 연결해 호출 (DATABASE_URL, 로컬 Postgres에서도 실행 가능)
+            job_queue = PostgresJobQueue(os.getenv('DATABASE_URL'))
+        elif not supabase:
+            print("⚠️ Supabase 환경변수가 설정되지 않았습니다.")
+            return False
+        else:
+            job_queue = JobQueue(supabase)
+
+        # Telegram 알림은 작업 상태와 함께 outbox에 기록하고 따로 전송
+        # (JOB_QUEUE_BACKEND=postgres면 작업 큐와 같은 Postgres 연결로 outbox를 읽고 씀)
+        outbox = TelegramOutbox(job_queue)
+
+        # 영상 정보 / 자막 캐시 (VIDEO_CACHE_BACKEND: memory | sqlite | supabase)
+        video_cache = create_video_cache(supabase)
+
+        # 요약 결과 캐시 (같은 영상 + 같은 프롬프트 + 같은 모델이면 LLM 호출 생략)
+        summary_store = create_summary_store(supabase)
+
+        # 외부 API 요청 한도를 모든 인스턴스가 공유 (RATE_LIMIT_BACKEND=supabase)
+        if os.getenv('RATE_LIMIT_BACKEND') == 'supabase':
+            rate_limiter.use_supabase(supabase)
 
-# Supabase 클라이언트
-supabase_url = os.getenv('SUPABASE_URL')
-supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
+        # 요약 모델 상태 / 서킷 브레이커 (PROVIDER_HEALTH_BACKEND: memory | file | supabase)
+        provider_health = create_provider_health(supabase)
 
-if supabase_url and supabase_key:
-    supabase: Client = create_client(supabase_url, supabase_key)
-else:
-    print("⚠️ Supabase 환경변수가 설정되지 않았습니다.")
-    supabase = None
+        startup_profiler.mark('services_ready')
+
+    return True
 
 
 @functions_framework.http
@@ -50,31 +120,20 @@ def process_pending_jobs(request):
     """
     Cloud Scheduler에서 호출되는 메인 함수
     """
+    deadline = time.monotonic() + INVOCATION_TIMEOUT_SECONDS
     try:
-        if not supabase:
+        if not init_services():
             return 'Supabase not configured', 500
 
-        # 1. Pending 작업 가져오기 (최대 5개)
-        response = supabase.table('jobs') \
-            .select('*') \
-            .eq('status', 'pending') \
-            .order('created_at') \
-            .limit(5) \
-            .execute()
-
-        jobs = response.data
-
-        if not jobs:
-            print("✅ 처리할 작업이 없습니다.")
+        # 작업별 CPU / 메모리 프로파일 (JOB_PROFILE=1 또는 X-Job-Profile 헤더)
+        results = run_pending_jobs(deadline, job_profiler.requested(request))
+        if not results:
             return 'No pending jobs', 200
 
-        print(f"🔄 처리할 작업: {len(jobs)}개")
-
-        # 2. 각 작업 처리
-        for job in jobs:
-            process_single_job(job)
+        completed = sum(1 for r in results if r['status'] == 'completed')
+        failed = len(results) - completed
 
-        return f'Processed {len(jobs)} jobs', 200
+        return f'Processed {len(results)} jobs ({completed} completed, {failed} failed)', 200
 
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -83,14 +142,167 @@ def process_pending_jobs(request):
         return f'Error: {str(e)}', 500
 
 
-def process_single_job(job: dict):
+def run_pending_jobs(deadline: float, profile: bool = False, stop=None) -> list:
+    """
+    만료된 작업 회수 → 작업 가져오기 → deadline(time.monotonic() 기준)까지 처리
+    (process_pending_jobs와 장시간 실행 Worker(worker.py)가 함께 사용, init_services 이후 호출)
+    stop: threading.Event - 설정되면 더 가져오지 않고 처리 중인 작업만 마무리
+    Returns: 작업별 결과 목록 (처리할 작업이 없으면 빈 목록)
+    """
+    # 0. 임대가 만료된 작업 회수 (비정상 종료된 Worker, 재시도 횟수를 넘은 작업은 실패 알림)
+    reaped = job_queue.reap(error_notification("처리 시간 초과 (최대 재시도 횟수 초과)"))
+    if reaped:
+        print(f"♻️ 만료된 작업 {reaped}개를 다시 대기열로 돌렸습니다.")
+
+    # 1. Pending 작업 가져오기 (최대 JOB_BATCH_SIZE개, 원자적 임대)
+    claim_started = time.monotonic()
+    jobs = job_queue.claim(JOB_BATCH_SIZE)
+    claim_seconds = round(time.monotonic() - claim_started, 3)
+
+    if not jobs:
+        # 이전 호출에서 재시도로 남은 알림 전송
+        outbox.drain()
+        print("✅ 처리할 작업이 없습니다.")
+        return []
+
+    print(f"🔄 처리할 작업: {len(jobs)}개 (동시 처리: {MAX_CONCURRENT_JOBS}개, worker: {job_queue.worker_id})")
+
+    # 배치 전체를 한 번에 가져오므로 같은 배치의 작업은 같은 claim 시간을 기록
+    for job in jobs:
+        job['claim_seconds'] = claim_seconds
+
+    # 다른 인스턴스가 기록한 모델 상태 / 작업 처리 시간 기록 반영
+    provider_health.load()
+    cost_estimator.load(supabase)
+
+    # 2. 작업 처리 (Worker Pool, 처리 중에는 임대 연장 + 끝난 작업의 상태를 모아서 기록 + 알림 전송)
+    # 자리가 빌 때마다 남은 시간 안에 끝날 작업을 더 가져오고, 가져온 작업의 영상 정보는 한 번에 조회
+    video_infos = {}
+    heartbeat = LeaseHeartbeat(job_queue)
+
+    def on_flush(finished):
+        heartbeat.discard(finished)
+        outbox.wake()
+
+    scheduler = DeadlineScheduler(
+        job_queue,
+        lambda job: _run_job_isolated(job, video_infos, profile),
+        deadline,
+        MAX_CONCURRENT_JOBS,
+        prepare=lambda claimed: job_cost_features(claimed, video_infos),
+        heartbeat=heartbeat,
+        batch_size=JOB_BATCH_SIZE,
+        stop=stop
+    )
+    with heartbeat, OutboxDrainer(outbox), FinishBatcher(job_queue, on_flush=on_flush), \
+            job_profiler.session(profile):
+        results = scheduler.run(jobs)
+    print_job_summary(results)
+
+    startup_profiler.mark('first_batch_completed')
+    startup_profiler.report()
+    print(f"🗃️ 캐시 통계: {video_cache.stats()} / 요약: {summary_store.stats()}")
+
+    provider_health.save()
+    print(f"🩺 모델 상태: {provider_health.snapshot()}")
+    print(f"🚦 요청 한도: {rate_limiter.stats()}")
+    return results
+
+
+def prefetch_video_infos(jobs: list) -> dict:
+    """
+    배치에 포함된 모든 영상 정보를 캐시 + YouTube API 1회 호출(50개 단위)로 조회
+    실패해도 작업별 개별 조회로 대체되므로 예외를 전파하지 않음
+    """
+    video_ids = [YouTubeInfoExtractor.extract_video_id(job['youtube_url']) for job in jobs]
+    video_ids = list(dict.fromkeys(vid for vid in video_ids if vid))
+
+    video_infos = {}
+    for video_id in video_ids:
+        cached = video_cache.get_video_info(video_id)
+        if cached:
+            video_infos[video_id] = cached
+
+    missing = [vid for vid in video_ids if vid not in video_infos]
+    if not missing:
+        return video_infos
+
+    try:
+        fetched = YouTubeInfoExtractor().get_video_infos(missing)
+        print(f"📺 영상 정보 일괄 조회: {len(fetched)}/{len(missing)}개 (캐시 적중 {len(video_infos)}개)")
+    except Exception as e:
+        print(f"⚠️ 영상 정보 일괄 조회 실패 (작업별 조회로 대체): {e}")
+        return video_infos
+
+    for video_id, video_info in fetched.items():
+        if video_info:
+            video_cache.set_video_info(video_id, video_info)
+    video_infos.update(fetched)
+    return video_infos
+
+
+def job_cost_features(jobs: list, video_infos: dict) -> dict:
+    """
+    작업 처리 시간 추정에 쓸 영상 길이 / 자막 글자 수 (이전에 처리한 영상이면 영상 정보 캐시에 저장된 값)
+    가져온 작업의 영상 정보를 일괄 조회하여 video_infos에 추가
+    Returns: {job_id: (영상 길이 초, 자막 글자 수)}
+    """
+    video_infos.update(prefetch_video_infos(jobs))
+
+    features = {}
+    for job in jobs:
+        video_id = YouTubeInfoExtractor.extract_video_id(job['youtube_url'])
+        video_info = video_infos.get(video_id)
+        features[job['id']] = (
+            parse_duration(video_info['duration']) if video_info else None,
+            video_info.get('transcript_chars') if video_info else None
+        )
+    return features
+
+
+def _run_job_isolated(job: dict, video_infos: dict = None, profile: bool = False) -> dict:
+    """
+    process_single_job 실행 중 빠져나온 예외까지 작업 결과로 변환
+    작업 하나의 예외가 다른 작업에 영향을 주지 않도록 격리
+    """
+    started = time.monotonic()
+    try:
+        return process_single_job(job, video_infos, profile)
+    except Exception as e:
+        print(f"❌ [{job.get('id')}] 처리 중 예상치 못한 오류: {e}")
+        return {
+            'job_id': job.get('id'),
+            'status': 'failed',
+            'error': str(e),
+            'elapsed_seconds': round(time.monotonic() - started, 2)
+        }
+
+
+def print_job_summary(results: list):
+    """작업별 처리 결과 요약 출력"""
+    print(f"\n{'='*60}")
+    print(f"📊 처리 결과 요약 ({len(results)}개)")
+    for r in results:
+        icon = '✅' if r['status'] == 'completed' else '❌'
+        detail = r.get('notion_url') or r.get('error') or ''
+        print(f"{icon} [{r['job_id']}] {r['status']} ({r['elapsed_seconds']}s) {detail}")
+    print(f"{'='*60}")
+
+
+def process_single_job(job: dict, video_infos: dict = None, profile: bool = False) -> dict:
     """
     단일 작업 처리
+    video_infos: prefetch_video_infos로 미리 조회한 영상 정보 (선택)
+    profile: 단계별 CPU / 메모리 프로파일을 JOB_PROFILE_DIR에 저장
+    Returns: {'job_id', 'status', 'elapsed_seconds', 'timings', 'notion_url' + 'cost' | 'error'}
     """
+    startup_profiler.mark('first_job_started')
+    started = time.monotonic()
     job_id = job['id']
     youtube_url = job['youtube_url']
-    chat_id = job['telegram_chat_id']
     channel = job['channel']
+    pipeline = None
+    profiler = job_profiler.JobProfiler(job_id) if profile else None
 
     print(f"\n{'='*60}")
     print(f"[{job_id}] 작업 시작")
@@ -99,21 +311,111 @@ def process_single_job(job: dict):
     print(f"{'='*60}")
 
     try:
-        # 상태 업데이트: processing
-        supabase.table('jobs').update({
-            'status': 'processing',
-            'started_at': datetime.utcnow().isoformat()
-        }).eq('id', job_id).execute()
-
-        # Step 1: YouTube 정보 추출
-        print(f"[{job_id}] Step 1/4: YouTube 정보 추출...")
-        info_extractor = YouTubeInfoExtractor()
-        video_id = info_extractor.extract_video_id(youtube_url)
+        video_id = YouTubeInfoExtractor.extract_video_id(youtube_url)
 
         if not video_id:
             raise Exception("YouTube URL에서 video_id를 추출할 수 없습니다.")
 
-        video_info = info_extractor.get_video_info(video_id)
+        pipeline = build_job_pipeline(job, video_id, video_infos or {}, profiler)
+        results = pipeline.run()
+        notion_url = results['notion']
+
+        timings = stage_timings(job, pipeline)
+        print(f"⏱️ [{job_id}] 단계별 소요 시간: {timings}")
+        print(f"✅ [{job_id}] 작업 완료!\n")
+
+        return {
+            'job_id': job_id,
+            'status': 'completed',
+            'notion_url': notion_url,
+            'timings': timings,
+            'cost': pipeline.state['cost'],
+            'elapsed_seconds': round(time.monotonic() - started, 2)
+        }
+
+    except Exception as e:
+        print(f"❌ [{job_id}] 오류 발생: {e}")
+        import traceback
+        traceback.print_exc()
+
+        # 상태 업데이트: failed (오류 알림은 outbox로, FinishBatcher가 다른 작업과 함께 기록)
+        # 실패한 작업도 어느 단계에서 얼마나 걸렸는지 남김
+        timings = stage_timings(job, pipeline)
+        job_queue.finish_later(job_id, {
+            'status': 'failed',
+            'error_message': str(e),
+            'result': {'timings': timings, 'llm': pipeline.state['llm'] if pipeline else None}
+        }, notification=error_notification(str(e)))
+
+        return {
+            'job_id': job_id,
+            'status': 'failed',
+            'error': str(e),
+            'timings': timings,
+            'elapsed_seconds': round(time.monotonic() - started, 2)
+        }
+
+    finally:
+        # 스트리밍 진행 메시지는 Notion 저장이 끝나거나 작업이 실패하면 삭제 (결과는 outbox 알림으로 전송)
+        if pipeline is not None and pipeline.state['progress'] is not None:
+            pipeline.state['progress'].delete()
+
+        if profiler is not None:
+            try:
+                profiler.write(supabase)
+            except Exception as e:
+                print(f"⚠️ [{job_id}] 프로파일 저장 실패: {e}")
+
+
+def stage_timings(job: dict, pipeline: Pipeline = None) -> dict:
+    """
+    작업 result.timings에 저장할 단계별 소요 시간(초)
+    claim: 작업을 가져온 RPC 시간, 나머지: 파이프라인 단계 (실행된 단계만)
+    LLM 시도별 지연은 result.llm.attempts, 알림 전송은 notification_outbox에 기록됨
+    """
+    timings = {'claim': job.get('claim_seconds')}
+    if pipeline is not None:
+        timings.update(pipeline.timings)
+    timings.pop('finish', None)
+    return {stage: seconds for stage, seconds in timings.items() if seconds is not None}
+
+
+def build_job_pipeline(job: dict, video_id: str, video_infos: dict, profiler=None) -> Pipeline:
+    """
+    단일 작업의 단계 의존성 그래프 구성
+
+      metadata ─────────────────┐
+                                ├──> summary ──> notion ──> finish (Supabase 상태 + Telegram 알림 outbox)
+      transcript ──> preprocess ┘
+
+    스트리밍 모드에서는 Notion 페이지를 요약 전에 만들고(notion_page),
+    summary 단계가 완성된 섹션을 바로 페이지에 추가
+    """
+    job_id = job['id']
+    youtube_url = job['youtube_url']
+    chat_id = job['telegram_chat_id']
+    channel = job['channel']
+
+    # 단계 간 공유 상태
+    # page/written: 스트리밍 모드의 현재 페이지, 요약이 페이지에 모두 기록되었는지
+    # llm: 요약을 만든 모델과 선택 이유, notion_writes: Notion 요청 수 / 전송 바이트
+    # progress: 스트리밍 모드의 Telegram 진행 메시지 (작업이 끝나면 삭제)
+    # cost: 스케줄러의 처리 시간 추정에 쓰는 영상 길이 / 자막 글자 수 / 처리 시간
+    state = {'page': None, 'written': False, 'llm': None, 'notion_writes': None, 'cost': None,
+             'progress': None, 'started': time.monotonic()}
+
+    # Step 1: YouTube 정보 추출
+    def fetch_metadata(results):
+        print(f"[{job_id}] Step 1/4: YouTube 정보 추출...")
+        if video_id in video_infos:
+            # 일괄 조회 결과 사용 (None이면 존재하지 않는 영상)
+            video_info = video_infos[video_id]
+        else:
+            video_info = video_cache.get_video_info(video_id)
+            if not video_info:
+                video_info = YouTubeInfoExtractor().get_video_info(video_id)
+                if video_info:
+                    video_cache.set_video_info(video_id, video_info)
 
         if not video_info:
             raise Exception("YouTube 영상 정보를 가져올 수 없습니다.")
@@ -121,176 +423,328 @@ def process_single_job(job: dict):
         print(f"✅ 제목: {video_info['title']}")
         print(f"✅ 채널: {video_info['channel']}")
         print(f"✅ 길이: {video_info['duration']}")
+        return video_info
 
-        # Step 2: 자막 추출
-        print(f"\n[{job_id}] Step 2/4: 자막 추출...")
-        subtitle_extractor = SubtitleExtractor()
-        transcript, source = subtitle_extractor.extract_subtitle_text(youtube_url, video_id)
+    # Step 2: 자막 추출 (metadata와 동시에 실행)
+    def fetch_transcript(results):
+        print(f"[{job_id}] Step 2/4: 자막 추출...")
+        transcript, source = video_cache.get_transcript(video_id)
 
         if not transcript:
-            raise Exception("자막을 추출할 수 없습니다. 자막이 없는 영상일 수 있습니다.")
+            transcript, source = SubtitleExtractor().extract_subtitle_text(youtube_url, video_id)
+
+            if not transcript:
+                raise Exception("자막을 추출할 수 없습니다. 자막이 없는 영상일 수 있습니다.")
+
+            video_cache.set_transcript(video_id, transcript, source)
 
         print(f"✅ 자막 추출 완료: {len(transcript)} 글자 (source: {source})")
+        return transcript, source
 
-        # Step 3: AI 요약
-        print(f"\n[{job_id}] Step 3/4: AI 요약 생성...")
+    # Step 2.5: 자막 전처리 (토큰 절약)
+    def preprocess(results):
+        transcript, _ = results['transcript']
+        if not TRANSCRIPT_PREPROCESS:
+            return transcript, None
 
-        # Gemini 우선 시도 (무료)
-        try:
-            summarizer = GeminiSummarizer()
-            summary = summarizer.summarize(video_info, transcript, channel)
+        cleaned, stats = TranscriptPreprocessor().process(transcript)
+        print(f"✅ 자막 전처리: {stats['original_chars']} → {stats['processed_chars']} 글자 "
+              f"(비율 {stats['compression_ratio']}, {stats['cpu_ms']}ms)")
+        return cleaned, stats
 
-            if "오류" in summary or "❌" in summary:
-                raise Exception("Gemini 요약 실패")
+    # Step 3: AI 요약
+    def summarize(results):
+        print(f"\n[{job_id}] Step 3/4: AI 요약 생성...")
+        video_info = results['metadata']
+        transcript, _ = results['preprocess']
 
-            print(f"✅ Gemini 요약 완료: {len(summary)} 글자")
+        cached, model_name = get_cached_summary(video_id, channel)
+        if cached:
+            state['llm'] = {'provider': model_name, 'reason': 'cache'}
+            return cached
 
-        except Exception as gemini_error:
-            print(f"⚠️ Gemini 실패, Claude Haiku로 전환: {gemini_error}")
+        try:
+            summary, state['llm'] = generate_summary(video_id, video_info, transcript, channel)
+        except HedgeError as e:
+            state['llm'] = {'provider': None, 'reason': 'failed', 'attempts': e.attempts}
+            raise
+        return summary
+
+    # Step 3 (스트리밍): 요약 조각을 받는 대로 섹션 단위로 Notion 페이지에 추가
+    def summarize_streaming(results):
+        print(f"\n[{job_id}] Step 3/4: AI 요약 생성 (스트리밍)...")
+        video_info = results['metadata']
+        transcript, _ = results['preprocess']
+        notion_saver = NotionSaver()
+        state['page'] = results['notion_page']
+
+        cached, model_name = get_cached_summary(video_id, channel)
+        if cached:
+            notion_saver.append_markdown(state['page'][0], cached)
+            state['written'] = True
+            state['llm'] = {'provider': model_name, 'reason': 'cache'}
+            return cached
+
+        progress = state['progress'] = TelegramProgressMessage(chat_id)
+
+        # 모델별 제한 시간 (generate_summary와 같음, Gemini는 stream_summary의 마감 시간으로만 제한)
+        policy = HedgePolicy()
+        timeout_factor = LONG_INPUT_TIMEOUT_FACTOR if len(transcript) > MAX_TRANSCRIPT_CHARS else 1.0
+        summarizers = {}
+        for summarizer, options in create_summarizers():
+            if summarizer.provider == 'anthropic':
+                options = dict(options, timeout=policy.timeout_for(summarizer.model_name))
+            summarizers[summarizer.model_name] = (summarizer, options)
+        preferred = next(iter(summarizers))
+        attempts = []
+
+        def candidates():
+            # 호출 허가(allow)를 받지 못한 모델(서킷 열림 / 다른 작업이 시험 호출 중)은 다른 모델이 모두 실패했을 때만 시도
+            denied = []
+            for name in provider_health.order(list(summarizers)):
+                if provider_health.allow(name):
+                    yield name
+                else:
+                    denied.append(name)
+            yield from denied
+
+        for name in candidates():
+            summarizer, options = summarizers[name]
+            started = time.monotonic()
+            appended = []
+
+            def on_section(section):
+                appended.append(notion_saver.append_markdown(state['page'][0], section))
+
+            try:
+                summary = stream_summary(
+                    summarizer.summarize_stream(video_info, transcript, channel, **options),
+                    on_section=on_section,
+                    on_progress=lambda text: progress.update(progress_text(text)),
+                    timeout=policy.timeout_for(name) * timeout_factor
+                )
+
+                if not summary.strip():
+                    raise Exception("빈 요약이 생성되었습니다.")
+
+            except Exception as e:
+                print(f"⚠️ {summarizer.model_name} 스트리밍 실패: {e}")
+                latency = time.monotonic() - started
+                provider_health.record(name, False, latency)
+                attempts.append({'provider': name, 'status': 'error', 'latency': round(latency, 3)})
+
+                # 일부 섹션이 이미 기록되었으면 그 페이지는 버리고 새 페이지에서 다시 시작
+                if appended:
+                    notion_saver.archive_page(state['page'][0])
+                    state['page'] = notion_saver.create_page(
+                        video_info, youtube_url, get_notion_database_id(channel), channel
+                    )
+                continue
+
+            print(f"✅ {summarizer.model_name} 스트리밍 요약 완료: {len(summary)} 글자")
+            latency = time.monotonic() - started
+            provider_health.record(name, True, latency)
+            attempts.append({'provider': name, 'status': 'ok', 'latency': round(latency, 3)})
+            progress.update(progress_text(summary, done=True), force=True)
+            summary_store.set(video_id, channel, summarizer, summary, summary_variant())
+            state['written'] = True
+            state['llm'] = {
+                'provider': name,
+                'reason': 'primary' if name == preferred else 'primary-failed',
+                'attempts': attempts
+            }
+            return summary
 
-            # Claude Haiku 백업 (유료지만 저렴)
-            claude_summarizer = ClaudeSummarizer(model_name='claude-3-haiku-20240307')
-            summary = claude_summarizer.summarize(
-                video_info,
-                transcript,
-                channel,
-                max_tokens=2048
-            )
+        notion_saver.archive_page(state['page'][0])
+        state['llm'] = {'provider': None, 'reason': 'failed', 'attempts': attempts}
+        raise Exception("AI 요약에 실패했습니다.")
 
-            if "오류" in summary or "❌" in summary:
-                raise Exception("AI 요약에 실패했습니다.")
+    # Step 4 (스트리밍): 요약보다 먼저 빈 페이지 생성
+    def create_notion_page(results):
+        print(f"[{job_id}] Notion 페이지 미리 생성...")
+        return NotionSaver().create_page(
+            results['metadata'], youtube_url, get_notion_database_id(channel), channel
+        )
 
-            print(f"✅ Claude 요약 완료: {len(summary)} 글자")
+    # Step 4: Notion 저장
+    def save_notion(results):
+        if state['written']:
+            notion_url = state['page'][1]
+            print(f"✅ Notion 스트리밍 저장 완료: {notion_url}")
+            return notion_url
 
-        # Step 4: Notion 저장
         print(f"\n[{job_id}] Step 4/4: Notion 저장...")
         notion_saver = NotionSaver()
 
-        # 채널별 Notion Database ID
-        database_ids = {
-            'archive': os.getenv('NOTION_DATABASE_ID_ARCHIVE'),
-            'agent-reference': os.getenv('NOTION_DATABASE_ID_AGENT_REF')
-        }
-
-        database_id = database_ids.get(channel)
-
-        if not database_id:
-            raise Exception(f"채널 '{channel}'의 Notion Database ID가 설정되지 않았습니다.")
-
         notion_url = notion_saver.save_to_notion(
-            video_info,
-            summary,
+            results['metadata'],
+            results['summary'],
             youtube_url,
-            database_id,
+            get_notion_database_id(channel),
             channel
         )
 
         if not notion_url:
             raise Exception("Notion 저장에 실패했습니다.")
+        state['notion_writes'] = notion_saver.last_write_stats
 
         print(f"✅ Notion 저장 완료: {notion_url}")
-
-        # Step 5: 상태 업데이트 & Telegram 알림
-        print(f"\n[{job_id}] Step 5/4: 완료 처리...")
-
-        supabase.table('jobs').update({
+        return notion_url
+
+    # Step 5: 상태 업데이트 & Telegram 알림 (FinishBatcher가 모아서 outbox와 함께 기록, 전송은 OutboxDrainer)
+    def finish(results):
+        transcript, source = results['transcript']
+        _, preprocess_stats = results['preprocess']
+        state['cost'] = {
+            'duration_seconds': parse_duration(results['metadata']['duration']),
+            'transcript_chars': len(transcript),
+            'seconds': round(time.monotonic() - state['started'], 3)
+        }
+        video_cache.set_transcript_chars(video_id, results['metadata'], len(transcript))
+        job_queue.finish_later(job_id, {
             'status': 'completed',
-            'completed_at': datetime.utcnow().isoformat(),
             'result': {
-                'notion_url': notion_url,
-                'summary_length': len(summary),
-                'transcript_source': source
+                'notion_url': results['notion'],
+                'summary_length': len(results['summary']),
+                'transcript_source': source,
+                'preprocess': preprocess_stats,
+                'llm': state['llm'],
+                'notion_writes': state['notion_writes'],
+                'timings': stage_timings(job, pipeline),
+                'cost': state['cost']
             }
-        }).eq('id', job_id).execute()
+        }, notification=success_notification(results['metadata'], results['notion'], channel))
+
+    pipeline = Pipeline(name=f"job-{job_id}", state=state, profiler=profiler) \
+        .add('metadata', fetch_metadata) \
+        .add('transcript', fetch_transcript) \
+        .add('preprocess', preprocess, deps=('transcript',))
+
+    if STREAMING_MODE:
+        # 자막이 없는 영상에 빈 페이지가 남지 않도록 자막 추출 후 페이지 생성
+        pipeline \
+            .add('notion_page', create_notion_page, deps=('metadata', 'transcript')) \
+            .add('summary', summarize_streaming, deps=('metadata', 'preprocess', 'notion_page'))
+    else:
+        pipeline.add('summary', summarize, deps=('metadata', 'preprocess'))
+
+    return pipeline \
+        .add('notion', save_notion, deps=('metadata', 'summary')) \
+        .add('finish', finish, deps=('metadata', 'transcript', 'preprocess', 'summary', 'notion'))
+
+
+def get_notion_database_id(channel: str) -> str:
+    """채널별 Notion Database ID"""
+    database_ids = {
+        'archive': os.getenv('NOTION_DATABASE_ID_ARCHIVE'),
+        'agent-reference': os.getenv('NOTION_DATABASE_ID_AGENT_REF')
+    }
 
-        send_telegram_success(chat_id, video_info, notion_url, channel)
+    database_id = database_ids.get(channel)
 
-        print(f"✅ [{job_id}] 작업 완료!\n")
+    if not database_id:
+        raise Exception(f"채널 '{channel}'의 Notion Database ID가 설정되지 않았습니다.")
 
-    except Exception as e:
-        print(f"❌ [{job_id}] 오류 발생: {e}")
-        import traceback
-        traceback.print_exc()
+    return database_id
 
-        # 상태 업데이트: failed
-        supabase.table('jobs').update({
-            'status': 'failed',
-            'completed_at': datetime.utcnow().isoformat(),
-            'error_message': str(e)
-        }).eq('id', job_id).execute()
 
-        send_telegram_error(chat_id, str(e))
+def create_summarizers() -> list:
+    """
+    요약 모델 우선순위: Gemini (무료) → Claude Haiku (유료지만 저렴)
+    긴 자막은 MapReduceSummarizer가 나누어 요약한 뒤 최종 요약
+    Returns: [(summarizer, summarize 추가 옵션)]
+    """
+    return [
+        (MapReduceSummarizer(GeminiSummarizer()), {}),
+        (MapReduceSummarizer(ClaudeSummarizer(model_name='claude-3-haiku-20240307')), {'max_tokens': 2048})
+    ]
 
 
-def send_telegram_success(chat_id: int, video_info: dict, notion_url: str, channel: str):
-    """Telegram 성공 알림"""
-    token = os.getenv('TELEGRAM_BOT_TOKEN')
-    if not token:
-        return
+def summary_variant() -> str:
+    """요약 입력을 바꾸는 설정 (요약 캐시 키에 포함)"""
+    return f"preprocess-v{PREPROCESSOR_VERSION}" if TRANSCRIPT_PREPROCESS else ''
 
-    channel_names = {
-        'archive': '📚 Archive',
-        'agent-reference': '🤖 Agent Reference'
-    }
 
-    text = f"""✅ 요약 완료!
+def get_cached_summary(video_id: str, channel: str) -> tuple:
+    """
+    같은 영상 + 프롬프트 + 모델로 만든 요약이 있으면 재사용
+    Returns: (요약, 모델 이름) 또는 (None, None)
+    """
+    for summarizer, _ in create_summarizers():
+        cached = summary_store.get(video_id, channel, summarizer, summary_variant())
+        if cached:
+            print(f"✅ 요약 캐시 적중 ({summarizer.model_name}): {len(cached)} 글자")
+            return cached, summarizer.model_name
+    return None, None
 
-📺 제목: {video_info['title']}
-📍 채널: {video_info['channel']}
-⏱️ 길이: {video_info['duration']}
-🗂️ 분류: {channel_names.get(channel, channel)}
 
-📄 Notion: {notion_url}
-"""
+def generate_summary(video_id: str, video_info: dict, transcript: str, channel: str) -> tuple:
+    """
+    Gemini 우선, 실패하거나 평소보다 늦어지면 Claude Haiku를 함께 실행 (hedging)
+    서킷이 열린 모델은 뒤로 보내고, 호출할 수 없는 상태면 hedging 대상에서 제외
+    Returns: (요약, {'provider', 'reason', 'attempts'})
+    모든 모델이 실패하면 HedgeError (attempts에 시도별 결과)
+    """
+    policy = HedgePolicy()
+    summarizers = {}
+    for summarizer, options in create_summarizers():
+        # Gemini SDK(0.3.x)는 요청별 제한 시간이 없어 hedged_call의 마감 시간으로만 제한
+        if summarizer.provider == 'anthropic':
+            options = dict(options, timeout=policy.timeout_for(summarizer.model_name))
+        summarizers[summarizer.model_name] = (summarizer, options)
+
+    # 호출 허가(allow)를 받은 모델을 1순위로 - half-open 시험 호출은 한 작업만 보냄
+    # (모두 허가받지 못해도 작업을 실패시키지 않도록 우선순위가 가장 높은 모델로 요청)
+    names = provider_health.order(list(summarizers))
+    first = next((name for name in names if provider_health.allow(name)), names[0])
+    second = next(name for name in names if name != first)
+    if first != next(iter(summarizers)):
+        print(f"⚡ {second} 호출 불가 (서킷 열림 또는 시험 호출 중), {first}로 바로 요청")
+    # 2순위는 허가를 받았을 때만 hedging (1순위가 실패하면 허가 없이도 마지막 수단으로 요청)
+    policy.enabled = policy.enabled and provider_health.allow(second)
+
+    # 긴 자막은 map-reduce로 여러 번 호출하므로 지연 기록과 제한 시간을 따로 적용
+    long_input = len(transcript) > MAX_TRANSCRIPT_CHARS
+
+    def call(name):
+        summarizer, options = summarizers[name]
+        return name, lambda: summarizer.summarize(video_info, transcript, channel, **options)
 
     try:
-        requests.post(
-            f"https://api.telegram.org/bot{token}/sendMessage",
-            json={
-                'chat_id': chat_id,
-                'text': text,
-                'parse_mode': 'HTML',
-                'reply_markup': {
-                    'inline_keyboard': [[
-                        {
-                            'text': '📄 Notion 열기',
-                            'url': notion_url
-                        }
-                    ]]
-                }
-            },
-            timeout=10
+        outcome = hedged_call(
+            call(first),
+            call(second),
+            is_valid=lambda result: result.success,
+            policy=policy,
+            latency_key=f"{first}:{'long' if long_input else 'short'}",
+            timeout_factor=LONG_INPUT_TIMEOUT_FACTOR if long_input else 1.0
         )
-        print(f"✅ Telegram 알림 전송 완료")
-    except Exception as e:
-        print(f"⚠️ Telegram 알림 전송 실패: {e}")
-
-
-def send_telegram_error(chat_id: int, error_message: str):
-    """Telegram 오류 알림"""
-    token = os.getenv('TELEGRAM_BOT_TOKEN')
-    if not token:
-        return
-
-    text = f"""❌ 요약 실패
-
-오류 내용:
-{error_message}
+    except HedgeError as e:
+        record_provider_attempts(e.attempts)
+        print(f"❌ 모든 요약 모델 실패: {e.attempts}")
+        raise HedgeError("AI 요약에 실패했습니다.", e.attempts) from e
+
+    record_provider_attempts(outcome['attempts'])
+
+    result = outcome['result']
+    summarizer, _ = summarizers[outcome['provider']]
+    print(f"✅ {summarizer.model_name} 요약 완료: {len(result.text)} 글자 ({outcome['reason']}, "
+          f"토큰 {result.input_tokens} → {result.output_tokens})")
+    summary_store.set(video_id, channel, summarizer, result.text, summary_variant())
+
+    return result.text, {
+        'provider': outcome['provider'],
+        'reason': outcome['reason'],
+        'attempts': outcome['attempts'],
+        'result': result.to_dict()
+    }
 
-💡 다시 시도하시거나 다른 영상을 보내주세요."""
 
-    try:
-        requests.post(
-            f"https://api.telegram.org/bot{token}/sendMessage",
-            json={
-                'chat_id': chat_id,
-                'text': text
-            },
-            timeout=10
-        )
-        print(f"✅ Telegram 오류 알림 전송 완료")
-    except Exception as e:
-        print(f"⚠️ Telegram 오류 알림 전송 실패: {e}")
+def record_provider_attempts(attempts: list):
+    """hedged_call 시도 결과를 모델 상태에 반영 (버려진 요청은 성공/실패를 알 수 없어 제외)"""
+    for attempt in attempts:
+        if attempt['status'] != 'abandoned':
+            provider_health.record(attempt['provider'], attempt['status'] == 'ok', attempt['latency'])
 
 
 if __name__ == '__main__':
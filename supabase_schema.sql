@@ -51,5 +51,597 @@ FROM jobs
 WHERE completed_at IS NOT NULL
 GROUP BY channel, status;
 
+-- ============================================
+-- 작업 임대(lease) - 여러 Worker 동시 실행 지원
+-- ============================================
+
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS lease_owner TEXT;
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE;
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS attempts INT DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS idx_jobs_lease_expires ON jobs(lease_expires_at) WHERE status = 'processing';
+
+-- 채팅별 공정 분배용 인덱스 (채팅별 가장 오래된 pending 작업 / 채팅별 처리 중 작업 수)
+CREATE INDEX IF NOT EXISTS idx_jobs_pending_chat ON jobs(telegram_chat_id, created_at) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_jobs_processing_chat ON jobs(telegram_chat_id) WHERE status = 'processing';
+
+-- pending 작업을 원자적으로 가져오기 (다른 Worker가 잠근 행은 건너뜀)
+-- Worker가 쓰는 열만 반환 (result 등 큰 JSONB는 보내지 않음)
+--
+-- 채팅(telegram_chat_id) 간 가중 공정 분배: 한 채팅이 목록을 한꺼번에 보내도 다른 채팅이 밀리지 않음
+-- - 채팅마다 오래된 순으로 작업 k개의 가상 시각 = (처리 중 작업 + 앞선 작업 k개)의 1/채널 가중치 합
+--   가상 시각이 작은 순(같으면 오래된 순)으로 가져옴 → 가중치가 모두 1이면 채팅별 라운드 로빈
+-- - p_channel_weights: {"agent-reference": 2}처럼 채널별 가중치 (없으면 1, 클수록 자주 차례가 옴)
+-- - p_chat_limit: 채팅별 동시 처리 상한 (0이면 제한 없음, 동시에 가져오는 Worker끼리는 약간 넘을 수 있음)
+-- - 채팅마다 최대 p_limit개만 보므로 pending 작업이 많아도 (채팅 수 × p_limit)개만 정렬
+DROP FUNCTION IF EXISTS claim_jobs(TEXT, INT, INT);
+DROP FUNCTION IF EXISTS claim_jobs(TEXT, INT, INT, INT, JSONB);
+CREATE OR REPLACE FUNCTION claim_jobs(
+  p_worker_id TEXT,
+  p_limit INT DEFAULT 5,
+  p_lease_seconds INT DEFAULT 120,
+  p_chat_limit INT DEFAULT 0,
+  p_channel_weights JSONB DEFAULT '{}'::JSONB
+)
+RETURNS TABLE (
+  id UUID,
+  youtube_url TEXT,
+  telegram_chat_id BIGINT,
+  channel TEXT,
+  created_at TIMESTAMP WITH TIME ZONE,
+  attempts INT
+)
+LANGUAGE sql
+AS $$
+  WITH RECURSIVE chats AS (
+    -- pending 작업이 있는 채팅 목록 (idx_jobs_pending_chat을 건너뛰며 읽는 loose index scan)
+    (
+      SELECT pending.telegram_chat_id
+      FROM jobs pending
+      WHERE pending.status = 'pending'
+      ORDER BY pending.telegram_chat_id
+      LIMIT 1
+    )
+    UNION ALL
+    SELECT (
+      SELECT pending.telegram_chat_id
+      FROM jobs pending
+      WHERE pending.status = 'pending'
+        AND pending.telegram_chat_id > chats.telegram_chat_id
+      ORDER BY pending.telegram_chat_id
+      LIMIT 1
+    )
+    FROM chats
+    WHERE chats.telegram_chat_id IS NOT NULL
+  ),
+  inflight AS (
+    SELECT running.telegram_chat_id,
+           COUNT(*) AS jobs,
+           SUM(1.0 / GREATEST(COALESCE((p_channel_weights->>running.channel)::NUMERIC, 1), 0.01)) AS virtual_time
+    FROM jobs running
+    WHERE running.status = 'processing'
+    GROUP BY running.telegram_chat_id
+  ),
+  candidates AS (
+    SELECT head.id,
+           head.created_at,
+           COALESCE(inflight.jobs, 0) + ROW_NUMBER() OVER chat_order AS position,
+           -- 1/3 + 1/3 + 1/3 같은 나눗셈 오차로 순서가 바뀌지 않도록 반올림 (같으면 오래된 순)
+           ROUND(COALESCE(inflight.virtual_time, 0) + SUM(head.cost) OVER chat_order, 6) AS virtual_time
+    FROM chats
+    CROSS JOIN LATERAL (
+      SELECT pending.id,
+             pending.created_at,
+             1.0 / GREATEST(COALESCE((p_channel_weights->>pending.channel)::NUMERIC, 1), 0.01) AS cost
+      FROM jobs pending
+      WHERE pending.status = 'pending'
+        AND pending.telegram_chat_id = chats.telegram_chat_id
+      ORDER BY pending.created_at
+      LIMIT p_limit
+    ) head
+    LEFT JOIN inflight ON inflight.telegram_chat_id = chats.telegram_chat_id
+    WHERE chats.telegram_chat_id IS NOT NULL
+    WINDOW chat_order AS (PARTITION BY chats.telegram_chat_id ORDER BY head.created_at, head.id
+                          ROWS UNBOUNDED PRECEDING)
+  ),
+  picked AS (
+    SELECT candidate.id, candidate.virtual_time, candidate.created_at
+    FROM candidates candidate
+    WHERE p_chat_limit <= 0 OR candidate.position <= p_chat_limit
+    ORDER BY candidate.virtual_time, candidate.created_at
+    LIMIT p_limit
+  ),
+  claimed AS (
+    UPDATE jobs j
+    SET status = 'processing',
+        started_at = NOW(),
+        lease_owner = p_worker_id,
+        lease_expires_at = NOW() + make_interval(secs => p_lease_seconds),
+        attempts = COALESCE(j.attempts, 0) + 1
+    FROM (
+      SELECT locked.id, picked.virtual_time
+      FROM jobs locked
+      JOIN picked ON picked.id = locked.id
+      WHERE locked.status = 'pending'
+      FOR UPDATE OF locked SKIP LOCKED
+    ) fair
+    WHERE j.id = fair.id
+    RETURNING j.id, j.youtube_url, j.telegram_chat_id, j.channel, j.created_at, j.attempts, fair.virtual_time
+  )
+  -- 가져온 차례대로 반환
+  SELECT claimed.id, claimed.youtube_url, claimed.telegram_chat_id, claimed.channel, claimed.created_at, claimed.attempts
+  FROM claimed
+  ORDER BY claimed.virtual_time, claimed.created_at;
+$$;
+
+-- 임대 연장 (heartbeat)
+CREATE OR REPLACE FUNCTION extend_job_leases(
+  p_worker_id TEXT,
+  p_job_ids UUID[],
+  p_lease_seconds INT DEFAULT 120
+)
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  extended INT;
+BEGIN
+  UPDATE jobs
+  SET lease_expires_at = NOW() + make_interval(secs => p_lease_seconds)
+  WHERE id = ANY(p_job_ids)
+    AND status = 'processing'
+    AND lease_owner = p_worker_id;
+  GET DIAGNOSTICS extended = ROW_COUNT;
+  RETURN extended;
+END;
+$$;
+
+-- 가져왔지만 시작하지 않은 작업 되돌리기 (남은 호출 시간 안에 끝나지 않을 작업)
+-- 시도하지 않았으므로 attempts도 되돌림
+CREATE OR REPLACE FUNCTION release_jobs(
+  p_worker_id TEXT,
+  p_job_ids UUID[]
+)
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  released INT;
+BEGIN
+  UPDATE jobs
+  SET status = 'pending',
+      started_at = NULL,
+      lease_owner = NULL,
+      lease_expires_at = NULL,
+      attempts = GREATEST(COALESCE(attempts, 0) - 1, 0)
+  WHERE id = ANY(p_job_ids)
+    AND status = 'processing'
+    AND lease_owner = p_worker_id;
+  GET DIAGNOSTICS released = ROW_COUNT;
+  RETURN released;
+END;
+$$;
+
+-- 임대가 만료된 작업 회수 (Worker 비정상 종료 대비)
+-- 최대 재시도 횟수를 넘어 failed가 된 작업은 같은 트랜잭션으로 notification_outbox에 실패 알림(p_notification) 추가
+DROP FUNCTION IF EXISTS reap_expired_jobs(INT);
+CREATE OR REPLACE FUNCTION reap_expired_jobs(
+  p_max_attempts INT DEFAULT 3,
+  p_notification JSONB DEFAULT NULL
+)
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  reaped INT;
+BEGIN
+  WITH expired AS (
+    UPDATE jobs
+    SET status = CASE WHEN COALESCE(attempts, 0) >= p_max_attempts THEN 'failed' ELSE 'pending' END,
+        completed_at = CASE WHEN COALESCE(attempts, 0) >= p_max_attempts THEN NOW() ELSE NULL END,
+        error_message = CASE WHEN COALESCE(attempts, 0) >= p_max_attempts
+                             THEN '처리 시간 초과 (최대 재시도 횟수 초과)' ELSE error_message END,
+        lease_owner = NULL,
+        lease_expires_at = NULL
+    WHERE status = 'processing'
+      AND lease_expires_at < NOW()
+    RETURNING id, telegram_chat_id, status
+  ),
+  notified AS (
+    INSERT INTO notification_outbox (job_id, chat_id, payload)
+    SELECT e.id, e.telegram_chat_id, p_notification
+    FROM expired e
+    WHERE e.status = 'failed'
+      AND jsonb_typeof(p_notification) = 'object'
+  )
+  SELECT COUNT(*) INTO reaped FROM expired;
+  RETURN reaped;
+END;
+$$;
+
+-- 새 작업 알림 (장시간 실행 Worker(worker.py)가 LISTEN jobs_pending)
+-- 새로 추가되거나 회수 / 되돌림으로 다시 pending이 된 작업
+-- payload가 같은 알림은 트랜잭션 안에서 하나로 합쳐지므로 여러 행을 한 번에 넣어도 알림은 1개
+CREATE OR REPLACE FUNCTION notify_job_pending()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  PERFORM pg_notify('jobs_pending', '');
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS jobs_notify_pending ON jobs;
+CREATE TRIGGER jobs_notify_pending
+  AFTER INSERT OR UPDATE OF status ON jobs
+  FOR EACH ROW
+  WHEN (NEW.status = 'pending')
+  EXECUTE FUNCTION notify_job_pending();
+
+-- ============================================
+-- 캐시 테이블 (video_id 기준 영상 정보 / 자막)
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS video_cache (
+  key TEXT PRIMARY KEY,
+  value JSONB NOT NULL,
+  expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+  accessed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_video_cache_accessed ON video_cache(accessed_at DESC);
+
+ALTER TABLE video_cache ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Service role can do everything"
+  ON video_cache
+  FOR ALL
+  TO service_role
+  USING (true)
+  WITH CHECK (true);
+
+-- 요약 결과 캐시 (key = sha256(video_id|prompt_key|model|prompt 해시))
+CREATE TABLE IF NOT EXISTS summary_cache (
+  key TEXT PRIMARY KEY,
+  value JSONB NOT NULL,
+  expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+  accessed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_summary_cache_accessed ON summary_cache(accessed_at DESC);
+
+ALTER TABLE summary_cache ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Service role can do everything"
+  ON summary_cache
+  FOR ALL
+  TO service_role
+  USING (true)
+  WITH CHECK (true);
+
+-- 만료 항목 삭제 + 최근 사용 순 p_max_entries개만 유지 (LRU)
+CREATE OR REPLACE FUNCTION evict_cache(p_table TEXT, p_max_entries INT DEFAULT 1000)
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  expired INT;
+  evicted INT;
+BEGIN
+  IF p_table NOT IN ('video_cache', 'summary_cache') THEN
+    RAISE EXCEPTION 'unknown cache table: %', p_table;
+  END IF;
+
+  EXECUTE format('DELETE FROM %I WHERE expires_at < NOW()', p_table);
+  GET DIAGNOSTICS expired = ROW_COUNT;
+
+  EXECUTE format(
+    'DELETE FROM %I WHERE key IN (SELECT key FROM %I ORDER BY accessed_at DESC OFFSET $1)',
+    p_table, p_table
+  ) USING p_max_entries;
+  GET DIAGNOSTICS evicted = ROW_COUNT;
+
+  RETURN expired + evicted;
+END;
+$$;
+
+-- 요약 모델 상태 / 서킷 브레이커 (provider = 모델 이름, 모든 Worker 인스턴스 공유)
+CREATE TABLE IF NOT EXISTS provider_health (
+  provider TEXT PRIMARY KEY,
+  state JSONB NOT NULL,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE provider_health ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Service role can do everything"
+  ON provider_health
+  FOR ALL
+  TO service_role
+  USING (true)
+  WITH CHECK (true);
+
+-- 외부 API 요청 한도 공유 (token bucket, 서비스별 한 행)
+CREATE TABLE IF NOT EXISTS rate_limits (
+  service TEXT PRIMARY KEY,
+  tokens DOUBLE PRECISION NOT NULL,
+  updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+  paused_until TIMESTAMP WITH TIME ZONE
+);
+
+ALTER TABLE rate_limits ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Service role can do everything"
+  ON rate_limits
+  FOR ALL
+  TO service_role
+  USING (true)
+  WITH CHECK (true);
+
+-- 토큰 1개 예약 후 기다릴 시간(초) 반환 (토큰이 없으면 음수로 빌려 쓰고 그만큼 대기)
+CREATE OR REPLACE FUNCTION rate_limit_reserve(
+  p_service TEXT,
+  p_rate DOUBLE PRECISION,
+  p_capacity DOUBLE PRECISION
+)
+RETURNS DOUBLE PRECISION
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_now TIMESTAMP WITH TIME ZONE := clock_timestamp();
+  v_row rate_limits%ROWTYPE;
+  v_tokens DOUBLE PRECISION;
+BEGIN
+  INSERT INTO rate_limits (service, tokens, updated_at)
+  VALUES (p_service, p_capacity, v_now)
+  ON CONFLICT (service) DO NOTHING;
+
+  SELECT * INTO v_row FROM rate_limits WHERE service = p_service FOR UPDATE;
+
+  v_tokens := LEAST(
+    p_capacity,
+    v_row.tokens + EXTRACT(EPOCH FROM (v_now - v_row.updated_at)) * p_rate
+  ) - 1;
+
+  UPDATE rate_limits
+  SET tokens = v_tokens, updated_at = v_now
+  WHERE service = p_service;
+
+  RETURN GREATEST(
+    CASE WHEN v_tokens < 0 THEN -v_tokens / p_rate ELSE 0 END,
+    COALESCE(EXTRACT(EPOCH FROM (v_row.paused_until - v_now)), 0)
+  );
+END;
+$$;
+
+-- 429를 받은 서비스는 p_seconds 동안 모든 인스턴스의 요청 중지
+CREATE OR REPLACE FUNCTION rate_limit_pause(p_service TEXT, p_seconds DOUBLE PRECISION)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+  UPDATE rate_limits
+  SET paused_until = GREATEST(
+    COALESCE(paused_until, clock_timestamp()),
+    clock_timestamp() + make_interval(secs => p_seconds)
+  )
+  WHERE service = p_service;
+$$;
+
+-- p_idle_seconds 동안 쓰이지 않은 행 삭제 (채팅별 버킷 등, 일시 정지 중인 행은 유지)
+-- 토큰은 그 사이에 다 채워졌으므로 다음 예약 때 가득 찬 상태로 다시 만들어도 같음
+CREATE INDEX IF NOT EXISTS idx_rate_limits_updated ON rate_limits(updated_at);
+
+CREATE OR REPLACE FUNCTION prune_rate_limits(p_idle_seconds DOUBLE PRECISION DEFAULT 600)
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  pruned INT;
+BEGIN
+  DELETE FROM rate_limits
+  WHERE updated_at < clock_timestamp() - make_interval(secs => p_idle_seconds)
+    AND (paused_until IS NULL OR paused_until < clock_timestamp());
+  GET DIAGNOSTICS pruned = ROW_COUNT;
+  RETURN pruned;
+END;
+$$;
+
+-- ============================================
+-- Telegram 알림 outbox (작업 상태와 같은 트랜잭션으로 기록, Worker가 별도로 전송)
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS notification_outbox (
+  id BIGSERIAL PRIMARY KEY,
+  job_id UUID REFERENCES jobs(id) ON DELETE CASCADE,
+  chat_id BIGINT NOT NULL,
+  payload JSONB NOT NULL,  -- sendMessage 본문 (chat_id 제외)
+  status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'sent', 'failed')),
+  attempts INT NOT NULL DEFAULT 0,
+  next_attempt_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+  locked_by TEXT,
+  locked_until TIMESTAMP WITH TIME ZONE,
+  last_error TEXT,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  sent_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS idx_outbox_pending ON notification_outbox(next_attempt_at) WHERE status = 'pending';
+
+ALTER TABLE notification_outbox ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Service role can do everything"
+  ON notification_outbox
+  FOR ALL
+  TO service_role
+  USING (true)
+  WITH CHECK (true);
+
+-- 여러 작업의 최종 상태 기록 + 알림 추가를 한 번에 (임대를 가진 Worker의 작업만)
+-- p_items: [{"job_id", "status", "result", "error_message", "notification"}]
+-- 반환: 기록된 작업 id (임대를 잃은 작업은 빠짐, 알림도 추가되지 않음)
+CREATE OR REPLACE FUNCTION finish_jobs(
+  p_worker_id TEXT,
+  p_items JSONB
+)
+RETURNS TABLE (job_id UUID)
+LANGUAGE sql
+AS $$
+  WITH items AS (
+    SELECT
+      (item->>'job_id')::UUID AS item_job_id,
+      item->>'status' AS item_status,
+      NULLIF(item->'result', 'null'::JSONB) AS item_result,
+      item->>'error_message' AS item_error,
+      NULLIF(item->'notification', 'null'::JSONB) AS item_notification
+    FROM jsonb_array_elements(p_items) AS item
+  ),
+  finished AS (
+    UPDATE jobs j
+    SET status = i.item_status,
+        result = COALESCE(i.item_result, j.result),
+        error_message = COALESCE(i.item_error, j.error_message),
+        completed_at = NOW(),
+        lease_owner = NULL,
+        lease_expires_at = NULL
+    FROM items i
+    WHERE j.id = i.item_job_id
+      AND j.lease_owner = p_worker_id
+    RETURNING j.id, j.telegram_chat_id, i.item_notification
+  ),
+  notified AS (
+    INSERT INTO notification_outbox (job_id, chat_id, payload)
+    SELECT f.id, f.telegram_chat_id, f.item_notification
+    FROM finished f
+    WHERE jsonb_typeof(f.item_notification) = 'object'
+  )
+  SELECT f.id FROM finished f;
+$$;
+
+-- 전송할 차례가 된 알림을 가져오면서 잠금 (다른 Worker와 겹치지 않음, 잠금이 만료되면 다시 가져감)
+DROP FUNCTION IF EXISTS claim_notifications(TEXT, INT, INT);
+CREATE OR REPLACE FUNCTION claim_notifications(
+  p_worker_id TEXT,
+  p_limit INT DEFAULT 50,
+  p_lock_seconds INT DEFAULT 60
+)
+RETURNS TABLE (
+  id BIGINT,
+  chat_id BIGINT,
+  payload JSONB,
+  attempts INT
+)
+LANGUAGE sql
+AS $$
+  UPDATE notification_outbox o
+  SET locked_by = p_worker_id,
+      locked_until = NOW() + make_interval(secs => p_lock_seconds),
+      attempts = o.attempts + 1
+  FROM (
+    SELECT due.id
+    FROM notification_outbox due
+    WHERE due.status = 'pending'
+      AND due.next_attempt_at <= NOW()
+      AND (due.locked_until IS NULL OR due.locked_until < NOW())
+    ORDER BY due.id
+    LIMIT p_limit
+    FOR UPDATE SKIP LOCKED
+  ) claimed
+  WHERE o.id = claimed.id
+  RETURNING o.id, o.chat_id, o.payload, o.attempts;
+$$;
+
+-- ============================================
+-- 단계별 지연시간 통계 (result.timings / result.llm.attempts / notification_outbox 기준)
+-- ============================================
+
+-- 작업 × 단계별 소요 시간(초) 한 행씩
+-- queue_wait: 등록 → 임대, total: 임대 → 완료, notify: 알림 기록 → 전송, 나머지: Worker가 기록한 단계
+CREATE OR REPLACE VIEW job_stage_latency AS
+SELECT j.id AS job_id, j.channel, j.status, j.completed_at, stage.key AS stage, (stage.value #>> '{}')::DOUBLE PRECISION AS seconds
+FROM jobs j
+CROSS JOIN LATERAL jsonb_each(j.result->'timings') AS stage
+WHERE j.completed_at IS NOT NULL
+  AND jsonb_typeof(stage.value) = 'number'
+UNION ALL
+SELECT j.id, j.channel, j.status, j.completed_at, 'queue_wait', EXTRACT(EPOCH FROM (j.started_at - j.created_at))
+FROM jobs j
+WHERE j.completed_at IS NOT NULL AND j.started_at IS NOT NULL
+UNION ALL
+SELECT j.id, j.channel, j.status, j.completed_at, 'total', EXTRACT(EPOCH FROM (j.completed_at - j.started_at))
+FROM jobs j
+WHERE j.completed_at IS NOT NULL AND j.started_at IS NOT NULL
+UNION ALL
+SELECT j.id, j.channel, j.status, j.completed_at, 'notify', EXTRACT(EPOCH FROM (o.sent_at - o.created_at))
+FROM notification_outbox o
+JOIN jobs j ON j.id = o.job_id
+WHERE o.status = 'sent';
+
+-- LLM 시도별 지연시간 (hedging으로 동시에 실행된 시도 포함)
+CREATE OR REPLACE VIEW llm_attempt_latency AS
+SELECT
+  j.id AS job_id,
+  j.channel,
+  j.completed_at,
+  attempt->>'provider' AS provider,
+  attempt->>'status' AS attempt_status,
+  j.result->'llm'->>'reason' AS reason,
+  (attempt->>'latency')::DOUBLE PRECISION AS seconds
+FROM jobs j
+CROSS JOIN LATERAL jsonb_array_elements(
+  CASE WHEN jsonb_typeof(j.result->'llm'->'attempts') = 'array' THEN j.result->'llm'->'attempts' END
+) AS attempt
+WHERE j.completed_at IS NOT NULL;
+
+-- 최근 7일 단계별 p50 / p95 / p99
+CREATE OR REPLACE VIEW stage_latency_stats AS
+SELECT
+  stage,
+  COUNT(*) AS samples,
+  percentile_cont(0.5) WITHIN GROUP (ORDER BY seconds) AS p50_seconds,
+  percentile_cont(0.95) WITHIN GROUP (ORDER BY seconds) AS p95_seconds,
+  percentile_cont(0.99) WITHIN GROUP (ORDER BY seconds) AS p99_seconds,
+  MAX(seconds) AS max_seconds
+FROM job_stage_latency
+WHERE completed_at > NOW() - INTERVAL '7 days'
+GROUP BY stage;
+
+-- 최근 7일 채널 × 단계별
+CREATE OR REPLACE VIEW stage_latency_by_channel AS
+SELECT
+  channel,
+  stage,
+  COUNT(*) AS samples,
+  percentile_cont(0.5) WITHIN GROUP (ORDER BY seconds) AS p50_seconds,
+  percentile_cont(0.95) WITHIN GROUP (ORDER BY seconds) AS p95_seconds,
+  percentile_cont(0.99) WITHIN GROUP (ORDER BY seconds) AS p99_seconds
+FROM job_stage_latency
+WHERE completed_at > NOW() - INTERVAL '7 days'
+GROUP BY channel, stage;
+
+-- 최근 7일 모델 × 시도 결과별 (ok / error / timeout / abandoned)
+CREATE OR REPLACE VIEW provider_latency_stats AS
+SELECT
+  provider,
+  attempt_status,
+  COUNT(*) AS samples,
+  percentile_cont(0.5) WITHIN GROUP (ORDER BY seconds) AS p50_seconds,
+  percentile_cont(0.95) WITHIN GROUP (ORDER BY seconds) AS p95_seconds,
+  percentile_cont(0.99) WITHIN GROUP (ORDER BY seconds) AS p99_seconds
+FROM llm_attempt_latency
+WHERE completed_at > NOW() - INTERVAL '7 days'
+GROUP BY provider, attempt_status;
+
+-- 일별 단계 p50 / p95 (배포 전후 회귀 확인)
+CREATE OR REPLACE VIEW stage_latency_daily AS
+SELECT
+  date_trunc('day', completed_at) AS day,
+  stage,
+  COUNT(*) AS samples,
+  percentile_cont(0.5) WITHIN GROUP (ORDER BY seconds) AS p50_seconds,
+  percentile_cont(0.95) WITHIN GROUP (ORDER BY seconds) AS p95_seconds
+FROM job_stage_latency
+GROUP BY 1, stage;
+
 -- 완료 알림
 SELECT 'Supabase schema created successfully!' as message;